@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 from .keywords import SessionKeywords, CheckKeywords, TargetKeywords
-from .resources import variables
+from .resources import variables, batches, logs, metrics, connections, domcache, results, reports
 from .version import __version__
 
 
@@ -14,6 +14,8 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
 
     = Table of contents =
     - `Before running tests`
+    - > `Connections to the Eyes server`
+    - > `DOM cache`
     - `Writing tests`
     - > `Test case example`
     - > `Open vs Check keyword arguments`
@@ -21,7 +23,19 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
     - > `Using selectors`
     - > `Defining Ignore and Floating regions`
     - > `Group tests into batches`
+    - > `Using multiple sessions`
+    - > `Hash gate`
+    - > `Adaptive match timeout`
+    - > `Page stability`
+    - > `Local comparison`
+    - > `Full page screenshots`
+    - > `Screenshot encoding`
+    - > `Screen streaming`
+    - > `Checkpoint timings`
+    - > `Recording and replaying the Eyes traffic`
+    - > `Reusing Eyes instances`
     - `Analysing the test results`
+    - > `Results report`
     - `Importing`
     - `Shortcuts`
     - `Keywords`
@@ -50,9 +64,54 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
     - Server URL (serverurl)
     - Match Timeout (matchtimeout)     
     - Save New Tests (save_new_tests)        
+    - Batch Store (batch_store)
+    - Eyes Log File (eyes_log_file)
+    - Eyes Log Level - Info or Debug (eyes_log_level)
+    - Metrics File (metrics_file)
+    - Prometheus File (prometheus_file)
+    - HTTP Pool Size (http_pool_size)
+    - HTTP Timeout (http_timeout)
+    - HTTP Retries (http_retries)
+    - HTTP Backoff (http_backoff)
+    - HTTP Pre-warm (http_prewarm)
+    - Eyes Pool (eyes_pool)
+    - DOM Cache (dom_cache)
+    - Results JSON (results_json)
+    - Results JUnit (results_junit)
+    - Close Threads (close_threads)
 
     Example:
         | Library | EyesLibrary | ApiKey | AppName | TestName | SeleniumLibrary | layout | ${true} | Windows | Firefox | https://myserver.com | 5000 | ${false} |
+
+    The Eyes logs are kept in memory and written at the end of each keyword, to the Robot log or to the Eyes Log File.
+    Enabling them on a keyword only affects the thread running it.
+
+    == Connections to the Eyes server ==
+
+    The requests of every session go through a single pool of keep-alive connections, so that the sessions don't open a new connection
+    (and TLS handshake) per request. The pool is configured on import: the number of connections kept open (http_pool_size),
+    the timeout of the requests (http_timeout) and the retries of failed connections with an exponential backoff (http_retries, http_backoff).
+    Requests that reached the server aren't retried.
+
+    With http_prewarm, the given number of connections to the Server URL are opened in background when the library is imported,
+    so that the first checkpoints of the execution don't wait for them.
+
+    Example:
+        | Library | EyesLibrary | serverurl=https://myserver.com | http_pool_size=20 | http_prewarm=4 |
+
+    == DOM cache ==
+
+    When Send DOM is enabled (send_dom argument of `Open Eyes Session`), the DOM of each checkpoint is sent along with its stylesheets.
+    The stylesheets are processed once per execution, and a DOM identical to one already uploaded isn't uploaded again:
+    the checkpoint refers to the uploaded one. With dom_cache on import, the uploads are also kept on that file,
+    so that the next and parallel executions reuse them for 12 hours.
+
+    Inline stylesheets are identified by the digest of their content. External stylesheets (link elements) are identified by their URL only,
+    as their content is only known once downloaded: they're downloaded once per execution, and a stylesheet changed on the server
+    during the execution isn't downloaded again. The same applies to the stylesheets they import.
+
+    Example:
+        | Library | EyesLibrary | dom_cache=${CURDIR}/eyes_dom_cache.json |
         
     = Writing tests =
 
@@ -77,6 +136,9 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
     3. *Close Eyes Session*
 
     See `Close Eyes Session`.
+
+    To avoid waiting for the Eyes server on every test teardown, the session may be closed with ``deferred`` enabled.
+    The results are then gathered by `Wait For All Eyes Results`, usually on Suite Teardown.
     	
     == Test case example ==
 
@@ -106,6 +168,7 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
     - `Check Eyes Region By Element`
     - `Check Eyes Region By Selector`
     - `Check Eyes Region In Frame By Selector`
+    - `Check Eyes Regions`
 
     == Using selectors ==
 
@@ -146,6 +209,12 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
         | {target}=         | Ignore Region By Coordinates | 20                      | 100   | 200 | 100 |
         | {target}=         | Floating Region By Selector  | //div[@id='my_element'] | xpath | 20  | 10  | 10 | 20 | {target} |
         | Check Eyes Window | Google Homepage              | target={target}         |          
+
+    The element and selector regions of a Target are resolved together, in a single round trip per checkpoint.
+    When the same Target is used on many checkpoints of a page, pass selector_cache=${true} on `Open Eyes Session` to keep the
+    regions of the selectors on the page, instead of searching the elements again on every checkpoint.
+    They're searched again once the DOM changes, the page is resized or scrolled, a resource is loaded or another page is opened.
+    Changes that don't touch the DOM, such as CSS animations or hover styles, aren't noticed: don't use the cache on elements that move on their own.
     
     == Group tests into batches ==
 
@@ -200,12 +269,278 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
         | Open Eyes Session | YourApplitoolsKey | AppName   | TestName          | batch=${batch} |
 
     For more information, read this [https://applitools.com/docs/topics/working-with-test-batches/batching-tests-in-a-distributed-environment.html|document].
+
+    === Parallel Executions ===
+
+    When running tests in parallel processes (e.g. with [https://pabot.org/|Pabot]), each process would create its own batch.
+    To group them into the same batch, import the library with the batch_store argument, pointing to the same file on every process.
+    The first process to open a session with a given batch registers its batch ID on that file, and the other processes attach to it.
+
+    The batch IDs registered on that file expire after 12 hours. Unless the file is removed before each execution,
+    the tests of executions started less than 12 hours apart are attached to the same batches.
+
+    Batches given an ID, through the batch_id argument of `Create Eyes Batch` or the APPLITOOLS_BATCH_ID environment variable,
+    keep that ID: the file is only used for batches without ID.
+
+    _Example_:
+
+        | Library           | EyesLibrary       | ${API KEY} | batch_store=${EXECDIR}/results/eyes_batches.json |
+        | Open Eyes Session | appname=AppName   | testname=TestName | batch=BatchName |
     
+    == Using multiple sessions ==
+
+    Several Eyes sessions may be open at the same time, for example to check a web application and a mobile application in the same test.
+    Give each session an alias through the alias argument of `Open Eyes Session`. The last opened session becomes the current session.
+
+    Every keyword that interacts with a session accepts an alias argument. When it's not provided, the current session is used.
+    The current session may be changed with `Switch Eyes Session`.
+
+    The current session is kept per thread, so keywords running concurrently (e.g. from a thread pool) don't interfere with each other.
+    Closing or aborting a session removes its alias, until a new session is opened with it. When the closed session was the current one,
+    there's no current session until another is opened or switched to.
+
+    _Example_:
+
+        | Open Eyes Session   | YourApplitoolsKey | AppName      | Web Test         | library=SeleniumLibrary | alias=Web    |
+        | Open Eyes Session   | YourApplitoolsKey | AppName      | Mobile Test      | library=AppiumLibrary   | alias=Mobile |
+        | Check Eyes Window   | Mobile Homepage   |
+        | Check Eyes Window   | Web Homepage      | alias=Web    |
+        | Switch Eyes Session | Web               |
+        | Close Eyes Session  |
+        | Close Eyes Session  | alias=Mobile      |
+
+    To run the same checkpoint on several browsers or viewports at once, open a browser per configuration with its own alias and use
+    `Check Eyes Window On Drivers`. It opens a session per browser, with the browser alias, in the same batch, and checks every browser concurrently.
+    A session may be opened on a given browser through the driver_alias argument of `Open Eyes Session`.
+
+        | Open Browser                 | https://www.google.com | chrome                | alias=Chrome  |
+        | Open Browser                 | https://www.google.com | firefox               | alias=Firefox |
+        | Check Eyes Window On Drivers | Google Homepage        | Chrome,Firefox        | testname=Cross Browser |
+        | Close Eyes Session           | deferred=${true}       | alias=Chrome          |
+        | Close Eyes Session           | deferred=${true}       | alias=Firefox         |
+        | Wait For All Eyes Results    |
+
+    == Hash gate ==
+
+    Checkpoints that capture exactly the same screen as on the last passing run may avoid the Eyes server round trip.
+    To activate it, set the hash_gate argument of `Open Eyes Session`:
+    - SHORTEN: The checkpoint is matched once, without the Match Timeout retries
+    - SKIP: The checkpoint isn't sent to the Eyes server. Eyes reports the skipped steps as missing, which is not considered a failure by `Close Eyes Session`
+
+    *Warning:* With SKIP, the Eyes dashboard and the Robot results disagree. Eyes never receives the skipped steps,
+    so the dashboard shows them as missing and the session as Unresolved, while the test passes.
+    Each session with skipped steps is reported by a warning when it's closed, with the number of steps and the URL of the session.
+
+    Each capture is hashed and compared with the hash of the same step (identified by application, test and step name) on the last passing run.
+    By default only identical captures are considered. Through the hash_gate_threshold argument, captures whose perceptual hash (256 bits) differs
+    up to the given number of bits are also considered identical.
+    The hashes are saved on the file given by hash_gate_store when the session is closed and passes.
+
+    Every checkpoint handled by the gate is reported in the log. The gate doesn't apply to full page screenshots, stitched content
+    nor regions outside of the viewport.
+    The capture hashed by the gate, taken after the wait set by wait_before_screenshots, is the screenshot sent to Eyes for the checkpoint,
+    so gated checkpoints don't take a second screenshot. Except when Eyes hides the scrollbars (hidescrollbars, or stitchmode CSS)
+    and for the checkpoints of elements and frames: Eyes takes its own screenshot then, as the gate captures the page as it is.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | hash_gate=skip | hash_gate_store=${CURDIR}/hashes.json |
+
+    == Adaptive match timeout ==
+
+    By default, Eyes retries the match of a checkpoint until the Match Timeout, so a genuine mismatch takes the whole timeout
+    while most checkpoints match on the first attempt. When the adaptive_timeout argument of `Open Eyes Session` is enabled,
+    the time each step (identified by application, test and step name) took to match is kept on the file given by timeout_history,
+    and the Match Timeout of the step is picked from its last runs:
+    - Steps that always matched on the first attempt, or never matched, are matched once, so a mismatch fails fast
+    - Flaky steps are retried up to one and a half times the longest they took to match, plus the retry interval
+    - Steps with a Match Timeout passed to the Check keyword, or with less than 3 runs recorded, keep their timeout
+
+    The history of the last 10 runs of each step is updated when the session is closed, whatever its results, and may be shared by parallel executions.
+    The timeout picked for each checkpoint is reported in the debug log.
+
+    Whatever the Match Timeout, the screenshots taken by the retries that are identical to the previous one aren't sent to Eyes,
+    as their match can't differ, and the retries stop early once the screen hasn't changed for longer than the time left.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | adaptive_timeout=${true} | timeout_history=${CURDIR}/timeouts.json |
+
+    == Page stability ==
+
+    Instead of a fixed number of milliseconds, wait_before_screenshots (on `Open Eyes Session` or on a Check keyword) may be set to STABLE:
+    before each screenshot, the page is polled until it's stable, so only the time the page actually needs is waited.
+    The page is considered stable once:
+    - The document is loaded and no fetch or XMLHttpRequest request is pending
+    - The DOM hasn't changed for 200 milliseconds
+    - No animation is running, except the endless ones, which should be covered by ignore regions
+    - No font nor image is loading
+
+    The requests are tracked from the first screenshot taken on the page. If the page isn't stable after stability_timeout milliseconds
+    (5000 by default), the screenshot is taken anyway and the signals still active are reported in the debug log.
+    Pages without javascript, such as native mobile apps, aren't waited for.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | wait_before_screenshots=stable | stability_timeout=10000 |
+        | Check Eyes Window | Search Results    | wait_before_screenshots=stable |
+
+    == Local comparison ==
+
+    The checkpoints may also be compared on the machine running the tests, against baselines kept on a local directory.
+    It requires NumPy, which is installed with: pip install robotframework-eyeslibrary[local]
+
+    To activate it, set the comparison argument of `Open Eyes Session`:
+    - EYES: The checkpoints are only compared by the Eyes server (default)
+    - LOCAL: The session isn't opened on Eyes. The checkpoints are only compared locally and `Close Eyes Session` fails if any of them mismatches
+    - PRESCREEN: The checkpoints are compared locally before being sent to Eyes. The ones that match are matched by Eyes once, without the Match Timeout retries
+
+    The comparison follows the match level of each checkpoint:
+    - EXACT: Any pixel difference is a mismatch
+    - STRICT: Color differences are a mismatch, ignoring small rendering differences such as anti-aliasing
+    - CONTENT: Differences of text and shapes are a mismatch, ignoring colors
+    - LAYOUT: Differences of the regions with content are a mismatch, ignoring the content itself
+
+    The ignore regions of the Target are not compared. Floating regions are compared if they are found within their bounds. See `Defining Ignore and Floating regions`.
+
+    The baselines are kept on the directory given by baseline_dir, by application, test and step name.
+    On Local mode, new steps become the baseline when Save New Tests is enabled. On Prescreen mode, the baselines are updated when the Eyes session passes.
+    Every comparison is reported in the log, with an image of the differences saved on the output directory, under eyes_diffs.
+
+    Full page screenshots and stitched content are captured by Eyes, so on Local mode only the viewport is compared,
+    and regions must be visible in the viewport. On Local mode, deferred closing has no effect as the results are already known.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | comparison=local | baseline_dir=${CURDIR}/baselines |
+
+    == Full page screenshots ==
+
+    Full page screenshots (see force_full_page_screenshot and stitchmode on `Open Eyes Session`) are stitched from several viewport screenshots.
+    On very tall pages, the stitched image and its upload may take hundreds of megabytes of memory on each checkpoint.
+
+    When the stitch_memory_limit argument of `Open Eyes Session` is set (in megabytes), the library stitches the page strip by strip:
+    - Only one strip is kept as an image at a time, the page is kept as raw pixels
+    - Pages bigger than the limit are kept on a memory-mapped temporary file instead of the process memory
+    - The screenshot is encoded into a temporary file, kept in memory up to the limit, and uploaded from there as a stream
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | force_full_page_screenshot=${true} | stitchmode=CSS | stitch_memory_limit=64 |
+
+    == Screenshot encoding ==
+
+    The screenshots are uploaded to Eyes as PNG, with the compression level used by Eyes (6).
+    The encoding may be set on `Open Eyes Session` and overridden on each Check keyword:
+    - compression: The PNG compression level, from 0 (fastest) to 9 (smallest). ADAPTIVE chooses the level from the upload throughput measured on the previous checkpoints
+    - screenshot_scale: Scales the screenshot down before uploading it, e.g. 0.5. Ignore and floating regions are scaled accordingly
+    - screenshot_format: PNG or WEBP (lossless). Only use WEBP with servers that accept it
+
+    The baselines must be created with the same scale, otherwise every checkpoint mismatches.
+    The format, compression, bytes sent and the time spent encoding and uploading the screenshot are reported in the log for each checkpoint.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName    | TestName | compression=adaptive |
+        | Check Eyes Window | Homepage          | compression=9 |
+
+    Steps such as shared headers, login screens or empty states often produce identical screenshots in different tests of a batch.
+    With deduplicate_screenshots on `Open Eyes Session`, each screenshot is uploaded apart the first time, and the identical screenshots
+    of any test of the same batch (identified by the digest of the encoded image) refer to that upload instead of being sent again,
+    including the retries of a checkpoint. The screenshots reused and the bytes saved in the batch are reported by `Close Eyes Session`.
+
+        | Open Eyes Session | YourApplitoolsKey | AppName    | TestName | batch=Nightly | deduplicate_screenshots=${true} |
+
+    == Screen streaming ==
+
+    On Appium, each screenshot is taken through the WebDriver screenshot endpoint, a PNG encoded in base64 over HTTP,
+    which often takes over a second on real devices. With the screen_stream argument of `Open Eyes Session`,
+    the viewport screenshots are taken from a MJPEG stream of the screen instead, read on the background for the whole execution:
+    - AUTO: The stream of the Appium server, given by the mjpegScreenshotUrl capability, the MJPEG server of WebDriverAgent on iOS
+    (mjpegServerPort capability, 9100 by default), or the screen streaming of UiAutomator2 on Android (mobile: startScreenStreaming, on port 8093)
+    - The URL of any other MJPEG stream of the screen
+
+    Each screenshot is the first frame received after it is requested, decoded and fitted locally to the size of the screenshots of
+    the endpoint, measured by the first screenshot of the stream. When no stream is found, the stream stops, or no frame is received within
+    a second, the screenshot is taken through the endpoint. The screenshots taken from the stream are reported by `Close Eyes Session`.
+
+    The frames are JPEG images, which aren't exact: create the baselines through the stream, with a high quality of the stream
+    (e.g. the mjpegServerScreenshotQuality capability on iOS), or use the LAYOUT or CONTENT match levels.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | AppiumLibrary | screen_stream=auto |
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | AppiumLibrary | screen_stream=http://127.0.0.1:9100 |
+
+    == Checkpoint timings ==
+
+    The time spent on each checkpoint of the Check keywords, and on `Close Eyes Session`, is reported in the log, split into phases:
+    - local: Hash gate and local comparison. See `Hash gate` and `Local comparison`
+    - capture / stitching: Taking the screenshot, stitched for full page screenshots and stitched content
+    - dom: Capturing and uploading the DOM, when Send DOM is enabled
+    - encoding: Encoding the screenshot. See `Screenshot encoding`
+    - upload / match: Sending the screenshot and waiting for the match of the Eyes server
+    - retries: Capturing and matching again until the Match Timeout, when the first match fails
+    - close: Waiting for the results of the session on `Close Eyes Session`
+    - other: Anything else, such as locating the elements
+
+    The timings are added up per suite and keyword, and written to the files set on library import (metrics_file as JSON, prometheus_file on
+    the Prometheus textfile format, e.g. for the textfile collector of the node exporter) whenever a session is closed.
+
+    _Example_:
+
+        | Library | EyesLibrary | metrics_file=${OUTPUT DIR}/eyes_metrics.json | prometheus_file=/var/lib/node_exporter/eyes.prom |
+
+    == Recording and replaying the Eyes traffic ==
+
+    The requests sent to the Eyes server and its responses may be recorded to an archive, and the same suite replayed later against the
+    recording instead of the server: without network nor server latency, e.g. to profile the library or load test it with realistic payloads.
+    To activate it, set the traffic argument of `Open Eyes Session`:
+    - RECORD: The requests are sent to the Eyes server, and the requests and responses are recorded to the archive
+    - REPLAY: The requests are answered by the responses of the archive, in their recorded order. The Eyes server is never contacted
+
+    The archive, given by traffic_archive, is a ZIP file rewritten on each recording execution. Identical uploads are stored once,
+    and the API key isn't recorded. The archive is completed each time a session is closed, and at the end of the execution.
+    Replaying requires the suite to send the same requests as when it was recorded: the results of the replayed checkpoints are the recorded ones.
+
+    _Example_:
+
+        | Open Eyes Session | YourApplitoolsKey | AppName | TestName | traffic=${TRAFFIC} | traffic_archive=${CURDIR}/traffic.zip |
+
+    == Reusing Eyes instances ==
+
+    By default, `Open Eyes Session` builds and configures a new Eyes instance for each session. With eyes_pool on import, or pooled on
+    `Open Eyes Session`, the instance of a closed (or aborted) session is kept and handed to the next session opened with the same arguments
+    (the same server, API key, batch, match level, stitch mode, timeouts, etc.), after clearing the state of its previous test.
+    It saves the setup of every session on suites with many short tests.
+
+    The instance is kept once the session is closed through `Close Eyes Session` or `Abort Eyes Session If Not Closed`,
+    so the alias of a closed session must not be used anymore.
+
+    _Example_:
+
+        | Library | EyesLibrary | YourApplitoolsKey | AppName | eyes_pool=${true} |
+
     = Analysing the test results =
 
     In order to review and analyse the test results, you have to access the  [https://eyes.applitools.com/app/test-results/|Test Manager].
 
     For more information on it, read the [https://applitools.com/docs/topics/test-manager/tm-overview.html|Test Manager Documentation].
+
+    == Results report ==
+
+    With results_json or results_junit on import, the results of every session closed in the execution (by `Close Eyes Session`, whatever its
+    results, or resolved by `Wait For All Eyes Results`) are summarized in a compact JSON report and in a JUnit XML report, for CI:
+    the status, steps, mismatches, missing steps and URL of each session, and the totals of the execution.
+    Each session is written to a temporary file as soon as it's resolved, so the memory stays flat with thousands of sessions.
+    The reports are written by `Wait For All Eyes Results`, usually on Suite Teardown, and at the end of the execution.
+
+    The sessions closed with ``deferred`` enabled are resolved concurrently in background, at most close_threads at once when it's set on import,
+    so that the Eyes server isn't flooded at the end of a large suite.
+
+    _Example_:
+
+        | Library | EyesLibrary | results_json=${OUTPUT DIR}/eyes_results.json | results_junit=${OUTPUT DIR}/eyes_results.xml | close_threads=8 |
     
     """
 
@@ -225,6 +560,21 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
         serverurl=None,
         matchtimeout=None,
         save_new_tests=True,
+        batch_store=None,
+        eyes_log_file=None,
+        eyes_log_level="INFO",
+        metrics_file=None,
+        prometheus_file=None,
+        http_pool_size=10,
+        http_timeout=None,
+        http_retries=3,
+        http_backoff=0.5,
+        http_prewarm=0,
+        eyes_pool=False,
+        dom_cache=None,
+        results_json=None,
+        results_junit=None,
+        close_threads=None,
     ):
         """
         EyesLibrary can be imported with optional arguments. These may also be defined in `Open Eyes Session`.
@@ -240,6 +590,21 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
         - ``serverurl``: The URL of the Eyes server
         - ``matchtimeout``: Time until Eyes stops retrying the matching (milliseconds)
         - ``save_new_tests``: Automatically accepting new tests
+        - ``batch_store``: Path of a file used to share batches between parallel executions. See `Parallel Executions`
+        - ``eyes_log_file``: Path of the file where the Eyes logs are written. By default, they're written to the Robot log
+        - ``eyes_log_level``: Level of the Eyes logs, INFO or DEBUG
+        - ``metrics_file``: Path of the JSON file where the timings of the checkpoints are written. See `Checkpoint timings`
+        - ``prometheus_file``: Path of the Prometheus textfile where the timings of the checkpoints are written
+        - ``http_pool_size``: Maximum number of connections to the Eyes server kept open, shared by every session. See `Connections to the Eyes server`
+        - ``http_timeout``: Time until a request to the Eyes server is abandoned (seconds). By default, 300
+        - ``http_retries``: Number of times a failed connection to the Eyes server is retried
+        - ``http_backoff``: Factor of the exponential delay between the connection retries (seconds)
+        - ``http_prewarm``: Number of connections to the Eyes server opened in background on import
+        - ``eyes_pool``: Reuses the Eyes instances of closed sessions for sessions opened with the same arguments. See `Reusing Eyes instances`
+        - ``dom_cache``: Path of a file where the DOM uploads are kept, to be reused by the next and parallel executions. See `DOM cache`
+        - ``results_json``: Path of the JSON report of the results of every session. See `Results report`
+        - ``results_junit``: Path of the JUnit XML report of the results of every session
+        - ``close_threads``: Maximum number of sessions closed at once in background with ``deferred``. By default, unlimited
         """
 
         self.library_arguments = {
@@ -254,7 +619,24 @@ class EyesLibrary(SessionKeywords, CheckKeywords, TargetKeywords):
             "serverurl": serverurl,
             "matchtimeout": matchtimeout,
             "save_new_tests": save_new_tests,
+            "batch_store": batch_store,
+            "eyes_pool": eyes_pool,
         }
 
         variables.init()
+        logs.init(enable_eyes_log, eyes_log_file, eyes_log_level)
+        metrics.init(metrics_file, prometheus_file)
+        domcache.init(dom_cache)
+        reports.init(results_json, results_junit)
+        results.init(close_threads)
+        connections.init(
+            http_pool_size,
+            http_timeout,
+            http_retries,
+            http_backoff,
+            serverurl,
+            http_prewarm,
+        )
+        if batch_store is not None:
+            variables.batches.store = batches.FileBatchStore(batch_store)
 
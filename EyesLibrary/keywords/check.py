@@ -1,22 +1,12 @@
 #!/usr/bin/env python
 
 from __future__ import absolute_import
-import os
-import six.moves.http_client
-import base64
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import InvalidElementStateException
+import functools
+import time
+import six
 from robot.libraries.BuiltIn import BuiltIn
-from applitools.core import logger
-from applitools.geometry import Region
-from applitools.eyes import Eyes, BatchInfo
-from applitools.selenium.webelement import EyesWebElement
 from .session import SessionKeywords
-from applitools.selenium.positioning import StitchMode
-from robot.api import logger as loggerRobot
-from EyesLibrary.resources import variables, utils
-import six
+from EyesLibrary.resources import variables, utils, capture, geometry, hashgate, comparison, metrics, stability, fanout
 
 
 class CheckKeywords:
@@ -32,7 +22,11 @@ class CheckKeywords:
         wait_before_screenshots=None,
         send_dom=None,
         matchlevel=None,
-        isdisabled=None
+        isdisabled=None,
+        alias=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
     ):
         """
         Takes a snapshot from the browser using the webdriver and matches
@@ -46,10 +40,14 @@ class CheckKeywords:
             | Match Timeout (int)               | Determines how much time in milliseconds Eyes continue to retry the matching before declaring a mismatch on this checkpoint                                     |
             | Target (Target)                   | The intended Target. See `Defining Ignore and Floating Regions`                                                                                                 |
             | Hide Scrollbars (bool)            | Sets if the scrollbars are hidden in the checkpoint, by passing 'True' or 'False' in the variable                                                               |
-            | Wait Before Screenshots (int)     | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint. Overrides the argument set on `Open Eyes Session` |
+            | Wait Before Screenshots (int or str) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint, or STABLE. Overrides the argument set on `Open Eyes Session` |
             | Send DOM (bool)                   | Sets if DOM information should be sent for this checkpoint                                                                                                      |    
             | Match Level (str)                 | The match level for the comparison of this checkpoint - can be STRICT, LAYOUT, CONTENT or EXACT                                                                 |
             | Is Disabled (bool)                | Determines whether or not interactions with Eyes will be silently ignored for this checkpoint                                                                   |    
+            | Alias (str)                       | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                                                    |
+            | Compression (int or str)          | PNG compression level of this checkpoint's screenshot, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                                      |
+            | Screenshot Scale (float)          | Scale of this checkpoint's screenshot, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                               |
+            | Screenshot Format (str)           | Format of this checkpoint's screenshot - can be PNG or WEBP (lossless)                                                                                          |
 
         *Example:*
             | Check Eyes Window | Google Homepage | ${true} | ${true} | ${true} | 5000 |
@@ -60,25 +58,34 @@ class CheckKeywords:
         In order to screenshot the correct element, it is added the value of 71 to the y coordinate of the element.
         """
 
-        original_properties = utils.save_current_properties()
-        utils.update_properties(force_full_page_screenshot, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, None, isdisabled)
-        
-        # Temporary workaround in order to capture the correct element on Safari
-        # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
-        # Current address bar height: 71
-        if variables.eyes.host_app == "Safari" and variables.eyes.host_os == "iOS":
-            size = variables.driver.get_window_size("current")
-
-            variables.eyes.check_region(
-                Region(0, 71, size.__getitem__("width"), size.__getitem__("height")),
-                name,
-                matchtimeout,
-                target,
-            )
-        else:
-            variables.eyes.check_window(name, int(matchtimeout), target)
-
-        utils.update_properties(**original_properties)
+        session = variables.sessions.get(alias)
+        original_properties = utils.save_current_properties(session)
+        try:
+            utils.update_properties(session, force_full_page_screenshot, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, None, isdisabled, compression, screenshot_scale, screenshot_format)
+
+            metrics.recorder.start("Check Eyes Window", name)
+            with metrics.recorder.phase(metrics.LOCAL):
+                matchtimeout = self._check_locally(session, name, matchtimeout, target)
+            if matchtimeout is None:
+                return
+
+            # Temporary workaround in order to capture the correct element on Safari
+            # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
+            # Current address bar height: 71
+            if session.eyes.host_app == "Safari" and session.eyes.host_os == "iOS":
+                size = session.driver.get_window_size("current")
+
+                session.eyes.check_region(
+                    geometry.Region(0, 71, size.__getitem__("width"), size.__getitem__("height")),
+                    name,
+                    matchtimeout,
+                    target,
+                )
+            else:
+                session.eyes.check_window(name, int(matchtimeout), target)
+        finally:
+            metrics.recorder.finish()
+            utils.update_properties(session, **original_properties)
       
     def check_eyes_region(
         self,
@@ -95,7 +102,11 @@ class CheckKeywords:
         wait_before_screenshots=None,
         send_dom=None,
         matchlevel=None,
-        isdisabled=None
+        isdisabled=None,
+        alias=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
     ):
         """
         Takes a snapshot of the given region from the browser using a Region
@@ -115,21 +126,41 @@ class CheckKeywords:
             | Match Timeout (int)           | Determines how much time in milliseconds  Eyes continue to retry the matching before declaring a mismatch on this checkpoint                                    |
             | Target (Target)               | The intended Target. See `Defining Ignore and Floating Regions`                                                                                                 |
             | Hide Scrollbars (bool)        | Sets if the scrollbars are hidden in the checkpoint, by passing 'True' or 'False' in the variable                                                               |
-            | Wait Before Screenshots (int) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint. Overrides the argument set on `Open Eyes Session` |
+            | Wait Before Screenshots (int or str) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint, or STABLE. Overrides the argument set on `Open Eyes Session` |
             | Send DOM (bool)               | Sets if DOM information should be sent for this checkpoint                                                                                                      |    
             | Match Level (str)             | The match level for the comparison of this checkpoint - can be STRICT, LAYOUT, CONTENT or EXACT                                                                 |
             | Is Disabled (bool)            | Determines whether or not interactions with Eyes will be silently ignored for this checkpoint                                                                   |    
+            | Alias (str)                   | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                                                    |
+            | Compression (int or str)      | PNG compression level of this checkpoint's screenshot, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                                      |
+            | Screenshot Scale (float)      | Scale of this checkpoint's screenshot, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                               |
+            | Screenshot Format (str)       | Format of this checkpoint's screenshot - can be PNG or WEBP (lossless)                                                                                          |
 
         *Example:*
             | Check Eyes Region | 100 | 150 | 500 | 120 | Google Logo | ${true} | ${true} | 5000 |
         """
-        original_properties = utils.save_current_properties()
-        utils.update_properties(None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, None, isdisabled)
+        session = variables.sessions.get(alias)
+        original_properties = utils.save_current_properties(session)
+        try:
+            utils.update_properties(session, None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, None, isdisabled, compression, screenshot_scale, screenshot_format)
 
-        region = Region(float(left), float(top), float(width), float(height))
-        variables.eyes.check_region(region, name, matchtimeout, target)
+            region = geometry.Region(float(left), float(top), float(width), float(height))
+
+            metrics.recorder.start("Check Eyes Region", name)
+            with metrics.recorder.phase(metrics.LOCAL):
+                matchtimeout = self._check_locally(
+                    session,
+                    name,
+                    matchtimeout,
+                    target,
+                    region={"left": region.left, "top": region.top, "width": region.width, "height": region.height},
+                )
+            if matchtimeout is None:
+                return
 
-        utils.update_properties(**original_properties)
+            session.eyes.check_region(region, name, matchtimeout, target)
+        finally:
+            metrics.recorder.finish()
+            utils.update_properties(session, **original_properties)
 
     def check_eyes_region_by_element(
         self,
@@ -144,7 +175,11 @@ class CheckKeywords:
         send_dom=None,
         stitchcontent=None,
         matchlevel=None,
-        isdisabled=None
+        isdisabled=None,
+        alias=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
     ):
         """
         Takes a snapshot of the region of the given element from the browser
@@ -158,11 +193,15 @@ class CheckKeywords:
             | Match Timeout (int)           | Determines how much time in milliseconds  Eyes continue to retry the matching before declaring a mismatch on this test                                          |
             | Target (Target)               | The intended Target. See `Defining Ignore and Floating Regions`                                                                                                 |
             | Hide Scrollbars (bool)        | Sets if the scrollbars are hidden in the checkpoint, by passing 'True' or 'False' in the variable                                                               |
-            | Wait Before Screenshots (int) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint. Overrides the argument set on `Open Eyes Session` |
+            | Wait Before Screenshots (int or str) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint, or STABLE. Overrides the argument set on `Open Eyes Session` |
             | Send DOM (bool)               | Sets if DOM information should be sent for this checkpoint                                                                                                      |    
             | Stitch Content (bool)         | Determines if Eyes will scroll this element to take a full element screenshot, when the element is scrollable                                                   |    
             | Match Level (str)             | The match level for the comparison of this checkpoint - can be STRICT, LAYOUT, CONTENT or EXACT                                                                 |
             | Is Disabled (bool)            | Determines whether or not interactions with Eyes will be silently ignored for this checkpoint                                                                   |    
+            | Alias (str)                   | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                                                    |
+            | Compression (int or str)      | PNG compression level of this checkpoint's screenshot, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                                      |
+            | Screenshot Scale (float)      | Scale of this checkpoint's screenshot, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                               |
+            | Screenshot Format (str)       | Format of this checkpoint's screenshot - can be PNG or WEBP (lossless)                                                                                          |
 
         *Example:*
             | ${element}=                  | Get Element | //*[@id="hplogo"] |
@@ -173,34 +212,42 @@ class CheckKeywords:
         Due to an issue regarding the height of the address bar not being taken into account when the screenshot is taken, a temporary workaround is in place.
         In order to screenshot the correct element, it is added the value of 71 to the y coordinate of the element.
         """
-        original_properties = utils.save_current_properties()
-        utils.update_properties(None, enable_eyes_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, stitchcontent, isdisabled)
-
-        # Temporary workaround in order to capture the correct element on Safari
-        # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
-        # Current address bar height: 71
-        if variables.eyes.host_app == "Safari" and variables.eyes.host_os == "iOS":
-            location = element.location
-            size = element.size
-
-            variables.eyes.check_region(
-                Region(
-                    location.__getitem__("x"),
-                    location.__getitem__("y") + 71,
-                    size.__getitem__("width"),
-                    size.__getitem__("height"),
-                ),
-                name,
-                matchtimeout,
-                target,
-                variables.stitchcontent,
-            )
-        else:
-            variables.eyes.check_region_by_element(
-                element, name, matchtimeout, target, variables.stitchcontent
-            )
-
-        utils.update_properties(**original_properties)
+        session = variables.sessions.get(alias)
+        original_properties = utils.save_current_properties(session)
+        try:
+            utils.update_properties(session, None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, stitchcontent, isdisabled, compression, screenshot_scale, screenshot_format)
+
+            metrics.recorder.start("Check Eyes Region By Element", name)
+            with metrics.recorder.phase(metrics.LOCAL):
+                matchtimeout = self._check_locally(session, name, matchtimeout, target, element=element)
+            if matchtimeout is None:
+                return
+
+            # Temporary workaround in order to capture the correct element on Safari
+            # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
+            # Current address bar height: 71
+            if session.eyes.host_app == "Safari" and session.eyes.host_os == "iOS":
+                rect = geometry.get_rects(session.driver, [element])[0]
+
+                session.eyes.check_region(
+                    geometry.Region(
+                        rect["left"],
+                        rect["top"] + 71,
+                        rect["width"],
+                        rect["height"],
+                    ),
+                    name,
+                    matchtimeout,
+                    target,
+                    session.stitchcontent,
+                )
+            else:
+                session.eyes.check_region_by_element(
+                    element, name, matchtimeout, target, session.stitchcontent
+                )
+        finally:
+            metrics.recorder.finish()
+            utils.update_properties(session, **original_properties)
 
     def check_eyes_region_by_selector(
         self,
@@ -216,7 +263,11 @@ class CheckKeywords:
         send_dom=None,
         stitchcontent=None,
         matchlevel=None,
-        isdisabled=None
+        isdisabled=None,
+        alias=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
     ):
         """
         Takes a snapshot of the region of the element found by calling
@@ -235,11 +286,15 @@ class CheckKeywords:
             | Match Timeout (int)           | Determines how much time in milliseconds Eyes continue to retry the matching before declaring a mismatch on this checkpoint                               |
             | Target (Target)               | The intended Target. See `Defining Ignore and Floating Regions`                                                                                           |
             | Hide Scrollbars (bool)        | Sets if the scrollbars are hidden in the checkpoint, by passing 'True' or 'False' in the variable                                                         |
-            | Wait Before Screenshots (int) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this test. Overrides the argument set on `Open Eyes Session` |
+            | Wait Before Screenshots (int or str) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this test, or STABLE. Overrides the argument set on `Open Eyes Session` |
             | Send DOM (bool)               | Sets if DOM information should be sent for this checkpoint                                                                                                |    
             | Stitch Content (bool)         | Determines if Eyes will scroll this element to take a full element screenshot, when the element is scrollable                                             |    
             | Match Level (str)             | The match level for the comparison of this checkpoint - can be STRICT, LAYOUT, CONTENT or EXACT                                                           |
             | Is Disabled (bool)            | Determines whether or not interactions with Eyes will be silently ignored for this checkpoint                                                             |    
+            | Alias (str)                   | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                                              |
+            | Compression (int or str)      | PNG compression level of this checkpoint's screenshot, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                                |
+            | Screenshot Scale (float)      | Scale of this checkpoint's screenshot, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                         |
+            | Screenshot Format (str)       | Format of this checkpoint's screenshot - can be PNG or WEBP (lossless)                                                                                    |
 
         *Example:*
             | Check Eyes Region By Selector | .first.expanded.dropdown | Css Element | css selector | ${true} | ${true} | 5000 |
@@ -249,42 +304,51 @@ class CheckKeywords:
         Due to an issue regarding the height of the address bar not being taken into account when the screenshot is taken, a temporary workaround is in place.
         In order to screenshot the correct element, it is added the value of 71 to the y coordinate of the element.
         """
-        original_properties = utils.save_current_properties()
-        utils.update_properties(None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, stitchcontent, isdisabled)
-        
-        selector_strategy = utils.get_selector_strategy(selector)
-
-        # Temporary workaround in order to capture the correct element on Safari
-        # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
-        # Current address bar height: 71
-        if variables.eyes.host_app == "Safari" and variables.eyes.host_os == "iOS":
-            element = variables.driver.find_element(selector_strategy, value)
-            location = element.location
-            size = element.size
-
-            variables.eyes.check_region(
-                Region(
-                    location.__getitem__("x"),
-                    location.__getitem__("y") + 71,
-                    size.__getitem__("width"),
-                    size.__getitem__("height"),
-                ),
-                name,
-                matchtimeout,
-                target,
-                variables.stitchcontent,
-            )
-        else:
-            variables.eyes.check_region_by_selector(
-                selector_strategy,
-                value,
-                name,
-                matchtimeout,
-                target,
-                variables.stitchcontent,
-            )
+        session = variables.sessions.get(alias)
+        original_properties = utils.save_current_properties(session)
+        try:
+            utils.update_properties(session, None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, stitchcontent, isdisabled, compression, screenshot_scale, screenshot_format)
 
-        utils.update_properties(**original_properties)
+            selector_strategy = utils.get_selector_strategy(selector)
+
+            metrics.recorder.start("Check Eyes Region By Selector", name)
+            with metrics.recorder.phase(metrics.LOCAL):
+                matchtimeout = self._check_locally(
+                    session, name, matchtimeout, target, selector=(selector_strategy, value)
+                )
+            if matchtimeout is None:
+                return
+
+            # Temporary workaround in order to capture the correct element on Safari
+            # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
+            # Current address bar height: 71
+            if session.eyes.host_app == "Safari" and session.eyes.host_os == "iOS":
+                rect = geometry.get_rects(session.driver, [(selector_strategy, value)])[0]
+
+                session.eyes.check_region(
+                    geometry.Region(
+                        rect["left"],
+                        rect["top"] + 71,
+                        rect["width"],
+                        rect["height"],
+                    ),
+                    name,
+                    matchtimeout,
+                    target,
+                    session.stitchcontent,
+                )
+            else:
+                session.eyes.check_region_by_selector(
+                    selector_strategy,
+                    value,
+                    name,
+                    matchtimeout,
+                    target,
+                    session.stitchcontent,
+                )
+        finally:
+            metrics.recorder.finish()
+            utils.update_properties(session, **original_properties)
 
     def check_eyes_region_in_frame_by_selector(
         self,
@@ -301,7 +365,11 @@ class CheckKeywords:
         send_dom=None,
         stitchcontent=None,
         matchlevel=None,
-        isdisabled=None
+        isdisabled=None,
+        alias=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
     ):
         """
         Takes a snapshot of the region of the element found by calling
@@ -319,11 +387,15 @@ class CheckKeywords:
             | Match Timeout (int)                      | Determines how much time in milliseconds Eyes continue to retry the matching before declaring a mismatch on this test                                           |
             | Target (Target)                          | The intended Target. See `Defining Ignore and Floating Regions`                                                                                                 |
             | Hide Scrollbars (bool)                   | Sets if the scrollbars are hidden in the checkpoint, by passing 'True' or 'False' in the variable                                                               |
-            | Wait Before Screenshots (int)            | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint. Overrides the argument set on `Open Eyes Session` |
+            | Wait Before Screenshots (int or str)     | Determines the number of milliseconds that Eyes will wait before capturing the screenshot of this checkpoint, or STABLE. Overrides the argument set on `Open Eyes Session` |
             | Send DOM (bool)                          | Sets if DOM information should be sent for this checkpoint                                                                                                      |    
             | Stitch Content (bool)                    | Determines if Eyes will scroll this element to take a full element screenshot, when the element is scrollable                                                   |    
             | Match Level (str)                        | The match level for the comparison of this checkpoint - can be STRICT, LAYOUT, CONTENT or EXACT                                                                 |
             | Is Disabled (bool)                       | Determines whether or not interactions with Eyes will be silently ignored for this checkpoint                                                                   |    
+            | Alias (str)                              | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                                                    |
+            | Compression (int or str)                 | PNG compression level of this checkpoint's screenshot, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                                      |
+            | Screenshot Scale (float)                 | Scale of this checkpoint's screenshot, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                               |
+            | Screenshot Format (str)                  | Format of this checkpoint's screenshot - can be PNG or WEBP (lossless)                                                                                          |
 
         *Example:*
             | Check Eyes Region In Frame By Selector | FrameName | .first.expanded.dropdown | Css Element | css selector | ${true} | ${true} | 5000 |
@@ -342,50 +414,327 @@ class CheckKeywords:
 
         """
 
-        original_properties = utils.save_current_properties()
-        utils.update_properties(None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, stitchcontent, isdisabled)
+        session = variables.sessions.get(alias)
+        original_properties = utils.save_current_properties(session)
+        try:
+            utils.update_properties(session, None, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, stitchcontent, isdisabled, compression, screenshot_scale, screenshot_format)
 
-        if type(framereference) is six.text_type:
-            try:
-                framereference = int(framereference)
-            except:
-                framereference = str(framereference)
-
-        selector_strategy = utils.get_selector_strategy(selector)
-
-        # Temporary workaround in order to capture the correct element on Safari
-        # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
-        # Current address bar height: 71
-        if variables.eyes.host_app == "Safari" and variables.eyes.host_os == "iOS":
+            if type(framereference) is six.text_type:
+                try:
+                    framereference = int(framereference)
+                except:
+                    framereference = str(framereference)
 
-            with variables.driver.switch_to.frame_and_back(framereference):
+            selector_strategy = utils.get_selector_strategy(selector)
 
-                element = variables.driver.find_element(selector_strategy, value)
-                location = element.location
-                size = element.size
-
-                variables.eyes.check_region(
-                    Region(
-                        location.__getitem__("x"),
-                        location.__getitem__("y") + 71,
-                        size.__getitem__("width"),
-                        size.__getitem__("height"),
-                    ),
+            metrics.recorder.start("Check Eyes Region In Frame By Selector", name)
+            with metrics.recorder.phase(metrics.LOCAL):
+                matchtimeout = self._check_locally(
+                    session, name, matchtimeout, target, selector=(selector_strategy, value), frame=framereference
+                )
+            if matchtimeout is None:
+                return
+
+            # Temporary workaround in order to capture the correct element on Safari
+            # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
+            # Current address bar height: 71
+            if session.eyes.host_app == "Safari" and session.eyes.host_os == "iOS":
+
+                with session.driver.switch_to.frame_and_back(framereference):
+
+                    rect = geometry.get_rects(session.driver, [(selector_strategy, value)])[0]
+
+                    session.eyes.check_region(
+                        geometry.Region(
+                            rect["left"],
+                            rect["top"] + 71,
+                            rect["width"],
+                            rect["height"],
+                        ),
+                        name,
+                        matchtimeout,
+                        target,
+                        session.stitchcontent,
+                    )
+            else:
+                session.eyes.check_region_in_frame_by_selector(
+                    framereference,
+                    selector_strategy,
+                    value,
                     name,
                     matchtimeout,
                     target,
-                    variables.stitchcontent,
+                    session.stitchcontent,
                 )
-        else:
-            variables.eyes.check_region_in_frame_by_selector(
-                framereference,
-                selector_strategy,
-                value,
-                name,
-                matchtimeout,
-                target,
-                variables.stitchcontent,
+        finally:
+            metrics.recorder.finish()
+            utils.update_properties(session, **original_properties)
+
+    def check_eyes_regions(
+        self,
+        regions,
+        selector="id",
+        enable_eyes_log=None,
+        enable_http_debug_log=None,
+        target=None,
+        hidescrollbars=None,
+        wait_before_screenshots=None,
+        send_dom=None,
+        matchlevel=None,
+        isdisabled=None,
+        alias=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
+    ):
+        """
+        Takes a single snapshot of the viewport and matches the region of each of the given elements with the expected output,
+        as a checkpoint named after the element. With a choice from eight selectors, to check by on `Using Selectors` section.
+
+        The regions are cropped from the same snapshot, so checking N regions of a page costs one capture instead of N.
+        Every element must be entirely visible in the viewport.
+
+            | =Arguments=                   | =Description=                                                                                                                                                   |
+            | Regions (dict)                | *Mandatory* - The names of the checkpoints and the elements to be checked, given by their selector value or as WebElement                                       |
+            | Selector (str)                | The strategy to locate the elements given by value. The supported selectors are specified in `Using Selectors`                                                  |
+            | Enable Eyes Log (bool)        | Determines if the trace logs of Applitools Eyes SDK are activated for these checkpoints. Overrides the argument set on `Open Eyes Session`                      |
+            | Enable HTTP Debug Log (bool)  | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable                                                                   |
+            | Target (Target)               | The intended Target, for every checkpoint. See `Defining Ignore and Floating Regions`                                                                           |
+            | Hide Scrollbars (bool)        | Sets if the scrollbars are hidden in the checkpoints, by passing 'True' or 'False' in the variable                                                              |
+            | Wait Before Screenshots (int or str) | Determines the number of milliseconds that Eyes will wait before capturing the screenshot, or STABLE. Overrides the argument set on `Open Eyes Session`          |
+            | Send DOM (bool)               | Sets if DOM information should be sent for these checkpoints                                                                                                    |
+            | Match Level (str)             | The match level for the comparison of these checkpoints - can be STRICT, LAYOUT, CONTENT or EXACT                                                               |
+            | Is Disabled (bool)            | Determines whether or not interactions with Eyes will be silently ignored for these checkpoints                                                                 |
+            | Alias (str)                   | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                                                    |
+            | Compression (int or str)      | PNG compression level of the screenshots, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                                                   |
+            | Screenshot Scale (float)      | Scale of the screenshots, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                                            |
+            | Screenshot Format (str)       | Format of the screenshots - can be PNG or WEBP (lossless)                                                                                                       |
+
+        As the regions share a single snapshot, their matches are not retried (Match Timeout). Use Wait Before Screenshots to let the page settle.
+
+        *Example:*
+            | ${logo}=           | Get WebElement | id=hplogo         |
+            | &{regions}=        | Create Dictionary | Logo=${logo}   | Search Box=.RNNXgb | Buttons=.FPdoLc |
+            | Check Eyes Regions | ${regions}     | css selector      |
+
+        *Note (Safari on mobile):*
+        When checking elements, provide osname=iOS and browsername=Safari on `Open Eyes Session`.
+        Due to an issue regarding the height of the address bar not being taken into account when the screenshot is taken, a temporary workaround is in place.
+        In order to screenshot the correct element, it is added the value of 71 to the y coordinate of the element.
+        """
+        session = variables.sessions.get(alias)
+        original_properties = utils.save_current_properties(session)
+        try:
+            utils.update_properties(session, False, enable_eyes_log, enable_http_debug_log, hidescrollbars, wait_before_screenshots, send_dom, matchlevel, False, isdisabled, compression, screenshot_scale, screenshot_format)
+
+            selector_strategy = utils.get_selector_strategy(selector)
+            driver = session.driver
+
+            # Every region is resolved in a single round trip, before the capture
+            rects = geometry.get_rects(
+                driver,
+                [
+                    (selector_strategy, value) if isinstance(value, six.string_types) else value
+                    for value in regions.values()
+                ],
+                relative_to_viewport=True,
             )
 
-        utils.update_properties(**original_properties)
+            viewport_size = capture.get_viewport_size(session)
+            scroll_position = capture.get_scroll_position(driver)
+            screenshot = None
+            if session.comparator is not None or session.hash_gate is not None:
+                screenshot = self._capture_locally(session)
+
+            with session.eyes.single_capture():
+                for name, rect in zip(regions.keys(), rects):
+                    if not capture.is_inside_viewport(rect, viewport_size):
+                        raise Exception(
+                            "The region '%s' isn't entirely visible in the viewport, which is captured once by Check Eyes Regions" % name
+                        )
+
+                    metrics.recorder.start("Check Eyes Regions", name)
+                    try:
+                        with metrics.recorder.phase(metrics.LOCAL):
+                            matchtimeout = self._check_locally(session, name, 0, target, region=rect, screenshot=screenshot)
+                        if matchtimeout is None:
+                            continue
+
+                        # Temporary workaround in order to capture the correct element on Safari
+                        # Element coordinate y doesn't take the address bar height into consideration, so it has to be added
+                        # Current address bar height: 71
+                        top = rect["top"] + scroll_position["y"]
+                        if session.eyes.host_app == "Safari" and session.eyes.host_os == "iOS":
+                            top += 71
+
+                        session.eyes.check_region(
+                            geometry.Region(rect["left"] + scroll_position["x"], top, rect["width"], rect["height"]),
+                            name,
+                            0,
+                            target,
+                        )
+                    finally:
+                        metrics.recorder.finish()
+        finally:
+            utils.update_properties(session, **original_properties)
+
+    def check_eyes_window_on_drivers(
+        self, name, drivers, library=None, threads=None, matchtimeout=-1, target=None, **options
+    ):
+        """
+        Takes a snapshot of the window of each of the given browsers or applications, concurrently, and matches them
+        with the expected output. Returns once every checkpoint is done.
 
+        Each driver is checked on its own Eyes session, whose alias is the alias of the driver. The sessions not open yet are opened
+        with the given options, in the same batch: the one given on the options or, by default, a batch named after the test.
+        The sessions are kept open for the next checkpoints, until closed by `Close Eyes Session` with their alias.
+
+            | =Arguments=           | =Description=                                                                                                                      |
+            | Name (str)            | *Mandatory* - Name that will be given to the checkpoints in Eyes                                                                   |
+            | Drivers (list or str) | *Mandatory* - Aliases of the browsers or applications opened by SeleniumLibrary or AppiumLibrary, as a list or separated by commas |
+            | Library (str)         | Library of the drivers (Either SeleniumLibrary or AppiumLibrary)                                                                   |
+            | Threads (int)         | Number of drivers checked at once. By default, all of them                                                                         |
+            | Match Timeout (int)   | Determines how much time in milliseconds Eyes continue to retry the matching before declaring a mismatch on these checkpoints      |
+            | Target (Target)       | The intended Target, for every checkpoint. See `Defining Ignore and Floating Regions`                                              |
+            | **options             | Arguments of `Open Eyes Session` for the sessions not open yet, e.g. testname, width, height or batch                              |
+
+        The sessions are opened one after the other, as the drivers are resolved through the library, then checked concurrently.
+        A failure on a driver doesn't stop the checkpoints of the others, the failures of every driver are reported once all are done.
+
+        *Example:*
+            | Open Browser                 | https://www.google.com | chrome         | alias=Chrome  |
+            | Open Browser                 | https://www.google.com | firefox        | alias=Firefox |
+            | Check Eyes Window On Drivers | Google Homepage        | Chrome,Firefox | width=1024    | height=768 |
+            | Close Eyes Session           | deferred=${true}       | alias=Chrome   |
+            | Close Eyes Session           | deferred=${true}       | alias=Firefox  |
+            | Wait For All Eyes Results    |
+        """
+        if isinstance(drivers, six.string_types):
+            drivers = [driver.strip() for driver in drivers.split(",") if driver.strip()]
+        if library is not None:
+            options["library"] = library
+        options.setdefault("batch", BuiltIn().get_variable_value("${TEST NAME}", name))
+
+        # Opening a session activates it, the current session of the caller is kept
+        current_alias = variables.sessions.current_alias
+        try:
+            for driver in drivers:
+                if not variables.sessions.has(driver):
+                    self.open_eyes_session(alias=driver, driver_alias=driver, **options)
+        finally:
+            if current_alias is not None and variables.sessions.has(current_alias):
+                variables.sessions.switch(current_alias)
+
+        outcomes = fanout.run_concurrently(
+            [
+                functools.partial(self.check_eyes_window, name, matchtimeout=matchtimeout, target=target, alias=driver)
+                for driver in drivers
+            ],
+            threads,
+            "EyesCheck",
+        )
+
+        failures = [
+            "%s: %s: %s" % (driver, error[0].__name__, error[1])
+            for driver, (_, error) in zip(drivers, outcomes)
+            if error is not None
+        ]
+        if failures:
+            raise Exception("Check Eyes Window failed on %d of %d drivers:\n%s" % (len(failures), len(drivers), "\n".join(failures)))
+
+    def _check_locally(
+        self,
+        session,
+        name,
+        matchtimeout,
+        target=None,
+        region=None,
+        element=None,
+        selector=None,
+        frame=None,
+        screenshot=None,
+    ):
+        """
+        Runs the checks of the library before the Eyes server match. See `Local comparison` and `Hash gate`.
+        The region is cropped from the given viewport screenshot, if any, instead of a new one.
+        The viewport screenshot is then used by Eyes for the checkpoint, instead of taking another one, unless Eyes hides
+        the scrollbars or the checkpoint is of an element or a frame.
+
+        Returns the match timeout of the checkpoint, shortened to a single match when the capture matches locally,
+        or None if the Eyes server match is skipped.
+        """
+        session.eyes.local_capture = None
+        comparator = session.comparator
+        offline = comparator is not None and comparator.mode == comparison.LOCAL
+
+        if comparator is None and session.hash_gate is None:
+            return matchtimeout
+        if session.eyes.is_disabled:
+            return None if offline else matchtimeout
+        # Full page and stitched captures are only taken by Eyes, which is not used on Local mode
+        if not offline and (session.eyes.force_full_page_screenshot or session.stitchcontent):
+            return matchtimeout
+
+        driver = session.driver
+        ignore_regions, floating_regions = [], []
+        if frame is not None:
+            frame_rect = capture.get_element_rect(driver, capture.get_frame_element(driver, frame))
+            driver.switch_to.frame(frame)
+            try:
+                region = geometry.get_rects(driver, [selector], relative_to_viewport=True)[0]
+                if comparator is not None:
+                    ignore_regions, floating_regions = comparison.get_target_regions(driver, target, region)
+            finally:
+                driver.switch_to.default_content()
+            region["left"] += frame_rect["left"]
+            region["top"] += frame_rect["top"]
+        else:
+            if selector is not None or element is not None:
+                region = geometry.get_rects(driver, [selector or element], relative_to_viewport=True)[0]
+            if comparator is not None:
+                ignore_regions, floating_regions = comparison.get_target_regions(driver, target, region)
+
+        viewport_image = screenshot
+        if viewport_image is None:
+            viewport_image = self._capture_locally(session)
+        image = viewport_image
+        viewport_size = capture.get_viewport_size(session)
+        pixel_ratio = capture.get_pixel_ratio(image, viewport_size)
+        if region is not None:
+            image = capture.crop_region(image, region, viewport_size)
+            # Regions outside of the viewport are captured by scrolling, so they can't be compared
+            if image is None:
+                if offline:
+                    raise Exception(
+                        "The region of '%s' isn't visible in the viewport, so it can't be compared locally" % name
+                    )
+                return matchtimeout
+
+        if comparator is not None:
+            matched = comparator.check(
+                name, image, session.eyes.match_level, ignore_regions, floating_regions, pixel_ratio
+            )
+            if offline:
+                return None
+            if matched:
+                matchtimeout = 0
+
+        if session.hash_gate is not None and session.hash_gate.matches(name, image):
+            session.hash_gate.report(name)
+            if session.hash_gate.mode == hashgate.SKIP:
+                return None
+            matchtimeout = 0
+
+        # Eyes hides the scrollbars, and the overflow of the checked element, before taking its screenshot of the main frame.
+        # The capture is only reused by Eyes when it holds the same pixels, otherwise the baselines would differ with the gate
+        if not session.eyes.hide_scrollbars and element is None and selector is None and frame is None:
+            session.eyes.local_capture = viewport_image
+        return matchtimeout
+
+    def _capture_locally(self, session):
+        # Waited for here in place of Eyes, which takes the checkpoint from this capture
+        if session.eyes.wait_before_screenshots == stability.STABLE:
+            stability.wait_for_stability(session.driver, session.eyes.stability_timeout)
+        elif session.eyes.wait_before_screenshots:
+            time.sleep(session.eyes.wait_before_screenshots / 1000.0)
+        return capture.get_viewport_screenshot(session)
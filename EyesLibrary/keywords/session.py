@@ -1,23 +1,13 @@
 #!/usr/bin/env python
 
 from __future__ import absolute_import
-import os
-import six.moves.http_client
-import base64
-from selenium import webdriver
+import time
+import six
+from collections import OrderedDict
+from datetime import datetime
 from robot.libraries.BuiltIn import BuiltIn
-from applitools import logger
-from applitools.logger import StdoutLogger
-from applitools.logger import FileLogger
-from applitools.geometry import Region
-from applitools.eyes import Eyes, BatchInfo
-from applitools.selenium.webelement import EyesWebElement
-from applitools.selenium.positioning import StitchMode
 from robot.api import logger as loggerRobot
-from datetime import datetime
-from ..version import __version__
-from EyesLibrary.resources import variables, utils
-import six
+from EyesLibrary.resources import variables, utils, results, hashgate, capture, geometry, logs, robotlog, metrics, sdk, stitching, encoding, comparison as local_comparison, traffic as eyes_traffic, instances, timeouts, stability, streaming, reports
 
 
 class SessionKeywords(object):
@@ -51,6 +41,26 @@ class SessionKeywords(object):
         send_dom=None,
         stitchcontent=False,
         isdisabled=None,
+        alias=None,
+        hash_gate=None,
+        hash_gate_threshold=0,
+        hash_gate_store="eyes_hash_gate.json",
+        comparison=None,
+        baseline_dir="eyes_baselines",
+        stitch_memory_limit=None,
+        compression=None,
+        screenshot_scale=None,
+        screenshot_format=None,
+        selector_cache=False,
+        traffic=None,
+        traffic_archive="eyes_traffic.zip",
+        pooled=None,
+        adaptive_timeout=False,
+        timeout_history="eyes_timeouts.json",
+        stability_timeout=None,
+        driver_alias=None,
+        deduplicate_screenshots=False,
+        screen_stream=None,
     ):
         """
         Starts a session (=test) with Applitools.
@@ -80,10 +90,30 @@ class SessionKeywords(object):
             | Match Timeout (int)               | Determines how much time in milliseconds Eyes continues to retry the matching before declaring a mismatch on this test checkpoints          |
             | Hide Scrollbars (bool)            | Sets if the scrollbars are hidden this session's tests, by passing 'True' or 'False' in the variable                                        |
             | Save New Tests (bool)             | Sets if the new checkpoints on this session are automatically accepted, by passing 'True' or 'False' in the variable                        |
-            | Wait Before Screenshots (int)     | Determines the number of milliseconds that Eyes will wait before capturing a screenshot on this test checkpoints                            |
+            | Wait Before Screenshots (int or str) | Determines the number of milliseconds that Eyes will wait before capturing a screenshot on this test checkpoints, or STABLE. See `Page stability` |
             | Send DOM (bool)                   | Sets if DOM information should be sent for this session's checkpoints                                                                       |    
             | Stitch Content (bool)             | If this test checkpoint's elements/region are scrollable, determines if Eyes will scroll this them to take a full region/element screenshot |    
             | Is Disabled (bool)                | Determines whether or not interactions with Eyes will be silently ignored for this test                                                     |    
+            | Alias (str)                       | Identifies this session, in order to use several sessions at once. See `Using multiple sessions`                                            |
+            | Hash Gate (str)                   | Skips or shortens the Eyes server match of checkpoints identical to the last passing run - can be SHORTEN or SKIP. See `Hash gate`          |
+            | Hash Gate Threshold (int)         | Number of differing bits of the perceptual hash up to which a capture is considered identical. By default, only exact captures              |
+            | Hash Gate Store (str)             | Path of the file where the hashes of the passing runs are kept. By default, eyes_hash_gate.json                                             |
+            | Comparison (str)                  | Where the checkpoints are compared - can be EYES, LOCAL or PRESCREEN. See `Local comparison`                                                |
+            | Baseline Directory (str)          | Directory of the baselines of the local comparison. By default, eyes_baselines                                                              |
+            | Stitch Memory Limit (int)         | Megabytes of memory a full page screenshot may take before it is kept on a temporary file. See `Full page screenshots`                      |
+            | Compression (int or str)          | PNG compression level of the screenshots, from 0 to 9, or ADAPTIVE. See `Screenshot encoding`                                               |
+            | Screenshot Scale (float)          | Scale of the screenshots, from 0 to 1, e.g. 0.5 uploads half of the width and height                                                        |
+            | Screenshot Format (str)           | Format of the screenshots - can be PNG or WEBP (lossless)                                                                                   |
+            | Selector Cache (bool)             | Keeps the regions of the selectors on the page until it changes. See `Defining Ignore and Floating Regions`                                 |
+            | Traffic (str)                     | Records the traffic with the Eyes server, or replays a recording - can be RECORD or REPLAY. See `Recording and replaying the Eyes traffic`  |
+            | Traffic Archive (str)             | Path of the archive of the recorded traffic. By default, eyes_traffic.zip                                                                   |
+            | Pooled (bool)                     | Reuses an Eyes instance of a closed session opened with the same arguments. See `Reusing Eyes instances`                                    |
+            | Adaptive Timeout (bool)           | Picks the match timeout of each checkpoint from the history of its last runs. See `Adaptive match timeout`                                  |
+            | Timeout History (str)             | Path of the file where the times the checkpoints took to match are kept. By default, eyes_timeouts.json                                     |
+            | Stability Timeout (int)           | Milliseconds to wait at most for the page to be stable, when waiting before screenshots until STABLE. By default, 5000                      |
+            | Driver Alias (str)                | Alias of the browser or application of the library to check. By default, the current one                                                    |
+            | Deduplicate Screenshots (bool)    | Uploads the screenshots identical to one already uploaded in the batch only once. See `Screenshot encoding`                                 |
+            | Screen Stream (str)               | Takes the Appium screenshots from a MJPEG stream of the screen - can be AUTO or its URL. See `Screen streaming`                             |
 
         *Mandatory Arguments:* They may be defined through this keyword, or when importing the library.
         In order to run a test, provide at least the API Key, Application Name and Test Name.
@@ -117,174 +147,466 @@ class SessionKeywords(object):
         if matchtimeout is None:
             matchtimeout = self.library_arguments["matchtimeout"]
 
-        if serverurl is None:
-            variables.eyes = Eyes()
-        else:
-            variables.eyes = Eyes(serverurl)
-
-        variables.eyes.api_key = apikey
-
-        try:
-            libraryInstance = BuiltIn().get_library_instance(library)
+        if alias is None:
+            alias = variables.DEFAULT_ALIAS
 
-            if library == "AppiumLibrary":
-                driver = libraryInstance._current_application()
-            else:
-                driver = libraryInstance.driver
-        except RuntimeError:
-            raise Exception("%s instance not found" % library)
+        driver = self._get_driver(library, driver_alias)
 
         utils.manage_logging(enable_eyes_log, enable_http_debug_log)
 
-        if osname is not None:
-            variables.eyes.host_os = osname
-        if browsername is not None:
-            variables.eyes.host_app = browsername
-        if baselinename is not None:
-            variables.eyes.baseline_branch_name = baselinename
         if batch is not None:
             if type(batch) is six.text_type:
                 batch = str(batch)
-            batches_list = variables.batches
 
-            # If batch argument is string
+            # If batch argument is string, use the batch with the same name
             if isinstance(batch, str):
-                # Check for batch with same name
-                for batch_element in batches_list:
-                    if batch_element.name == batch:
-                        variables.eyes.batch = batch_element
-                        break
-                # If a batch with this name is not yet on the list
-                if variables.eyes.batch is None:
-                    new_batch = BatchInfo(batch)
-                    variables.eyes.batch = new_batch
-                    variables.batches.append(new_batch)
-            # If batch argument is BatchInfo
+                batch = variables.batches.get_by_name(batch)
+            # If batch argument is BatchInfo, use the batch with the same name and date
             else:
-                # Check for batch with same name and date
-                for batch_element in batches_list:
-                    if (
-                        batch_element.name == batch.name
-                        and batch_element.started_at == batch.started_at
-                    ):
-                        variables.eyes.batch = batch_element
-                        break
-                # If the list doesn't contain a batch with the same name and date
-                if variables.eyes.batch is None:
-                    variables.eyes.batch = batch
-                    variables.batches.append(batch)
-
-        if matchlevel is not None:
-            variables.eyes.match_level = utils.get_match_level(matchlevel)
-        if parentbranch is not None:
-            variables.eyes.parent_branch_name = parentbranch
-        if branchname is not None:
-            variables.eyes.branch_name = branchname
-        if osname is not None:
-            variables.eyes.host_os = osname
-        if stitchmode is not None:
-            variables.eyes.stitch_mode = utils.get_stitch_mode(stitchmode)
-        if matchtimeout is not None:
-            variables.eyes.match_timeout = int(matchtimeout)
-        if force_full_page_screenshot is not None:
-            variables.eyes.force_full_page_screenshot = force_full_page_screenshot
-        if save_new_tests is not None:
-            variables.eyes.save_new_tests = save_new_tests
-        if wait_before_screenshots is not None:
-            variables.eyes.wait_before_screenshots = int(wait_before_screenshots)
-        if send_dom is not None:
-            variables.eyes.send_dom = send_dom
-        if stitchcontent is not False:
-            variables.stitchcontent = stitchcontent
+                batch = variables.batches.get_or_add(batch)
+
+        configuration = OrderedDict(
+            [
+                ("serverurl", serverurl),
+                ("apikey", apikey),
+                ("osname", osname),
+                ("browsername", browsername),
+                ("baselinename", baselinename),
+                ("matchlevel", matchlevel),
+                ("parentbranch", parentbranch),
+                ("branchname", branchname),
+                ("stitchmode", stitchmode),
+                ("matchtimeout", matchtimeout),
+                ("force_full_page_screenshot", force_full_page_screenshot),
+                ("save_new_tests", save_new_tests),
+                ("wait_before_screenshots", wait_before_screenshots),
+                ("stability_timeout", stability_timeout),
+                ("send_dom", send_dom),
+                ("stitch_memory_limit", stitch_memory_limit),
+                ("compression", compression),
+                ("screenshot_scale", screenshot_scale),
+                ("screenshot_format", screenshot_format),
+                ("traffic", traffic),
+                ("traffic_archive", traffic_archive),
+            ]
+        )
+
+        if pooled is None:
+            pooled = self.library_arguments["eyes_pool"]
+        if pooled:
+            eyes = instances.pool.acquire(
+                (tuple(configuration.items()), batch.id if batch is not None else None),
+                lambda: self._create_eyes(configuration, batch),
+            )
+        else:
+            eyes = self._create_eyes(configuration, batch)
 
-        if width is None and height is None:
-            variables.driver = variables.eyes.open(driver, appname, testname)
+        session = variables.EyesSession(alias, eyes)
+        if stitchcontent is not False:
+            session.stitchcontent = stitchcontent
+
+        comparison_mode = local_comparison.EYES
+        if comparison is not None:
+            comparison_mode = local_comparison.get_comparison_mode(comparison)
+            if comparison_mode != local_comparison.EYES:
+                session.comparator = local_comparison.LocalComparator(
+                    baseline_dir,
+                    appname,
+                    testname,
+                    comparison_mode,
+                    session.eyes.save_new_tests,
+                )
+
+        # On Local mode, the session is never opened on Eyes, so the checkpoints use the driver directly
+        if comparison_mode == local_comparison.LOCAL:
+            session.driver = driver
+            if width is not None or height is not None:
+                sdk.LibraryEyes.set_viewport_size(driver, {"width": int(width), "height": int(height)})
+        elif width is None and height is None:
+            session.driver = session.eyes.open(driver, appname, testname)
         else:
-            variables.driver = variables.eyes.open(
+            session.driver = session.eyes.open(
                 driver, appname, testname, {"width": int(width), "height": int(height)}
             )
 
+        geometry.set_selector_cache(session.driver, selector_cache)
+
         # Workaround - This property has to be called after opening session
         # Otherwise, the checks will throw exceptions
         if isdisabled is not None:
-            variables.eyes.is_disabled = isdisabled
+            session.eyes.is_disabled = isdisabled
+
+        if hash_gate is not None:
+            session.hash_gate = hashgate.HashGate(
+                hashgate.get_store(hash_gate_store),
+                appname,
+                testname,
+                hashgate.get_hash_gate_mode(hash_gate),
+                hash_gate_threshold,
+            )
+
+        if deduplicate_screenshots and comparison_mode != local_comparison.LOCAL:
+            session.eyes.deduplicate_screenshots = True
+
+        if screen_stream is not None:
+            stream_url = streaming.get_stream_url(driver, screen_stream)
+            if stream_url is None:
+                loggerRobot.info("No screen stream found for %s, the screenshots are taken through WebDriver" % library)
+            else:
+                session.eyes.screen_stream = streaming.get_stream(stream_url)
+
+        if adaptive_timeout and comparison_mode != local_comparison.LOCAL:
+            session.eyes.adaptive_timeout = timeouts.AdaptiveTimeout(timeouts.get_store(timeout_history), appname, testname)
+
+        variables.sessions.register(session)
+
+    @staticmethod
+    def _get_driver(library, driver_alias=None):
+        try:
+            libraryInstance = BuiltIn().get_library_instance(library)
+
+            # AppiumLibrary may be imported with a different name
+            if hasattr(libraryInstance, "_current_application"):
+                if driver_alias is None:
+                    return libraryInstance._current_application()
+                drivers = libraryInstance._cache
+            else:
+                if driver_alias is None:
+                    return libraryInstance.driver
+                drivers = libraryInstance._drivers
+        except RuntimeError:
+            raise Exception("%s instance not found" % library)
+
+        try:
+            return drivers.get_connection(driver_alias)
+        except RuntimeError:
+            raise Exception("No browser or application with alias '%s' was opened by %s" % (driver_alias, library))
+
+    @staticmethod
+    def _create_eyes(configuration, batch):
+        if configuration["serverurl"] is None:
+            eyes = sdk.LibraryEyes()
+        else:
+            eyes = sdk.LibraryEyes(configuration["serverurl"])
+
+        eyes.api_key = configuration["apikey"]
+        if configuration["traffic"] is not None:
+            eyes.traffic = eyes_traffic.get_archive(
+                configuration["traffic_archive"], eyes_traffic.get_traffic_mode(configuration["traffic"])
+            )
+
+        if configuration["osname"] is not None:
+            eyes.host_os = configuration["osname"]
+        if configuration["browsername"] is not None:
+            eyes.host_app = configuration["browsername"]
+        if configuration["baselinename"] is not None:
+            eyes.baseline_branch_name = configuration["baselinename"]
+        if batch is not None:
+            eyes.batch = batch
+
+        if configuration["matchlevel"] is not None:
+            eyes.match_level = utils.get_match_level(configuration["matchlevel"])
+        if configuration["parentbranch"] is not None:
+            eyes.parent_branch_name = configuration["parentbranch"]
+        if configuration["branchname"] is not None:
+            eyes.branch_name = configuration["branchname"]
+        if configuration["stitchmode"] is not None:
+            eyes.stitch_mode = utils.get_stitch_mode(configuration["stitchmode"])
+        if configuration["matchtimeout"] is not None:
+            eyes.match_timeout = int(configuration["matchtimeout"])
+        if configuration["force_full_page_screenshot"] is not None:
+            eyes.force_full_page_screenshot = configuration["force_full_page_screenshot"]
+        if configuration["save_new_tests"] is not None:
+            eyes.save_new_tests = configuration["save_new_tests"]
+        if configuration["wait_before_screenshots"] is not None:
+            eyes.wait_before_screenshots = stability.get_wait_before_screenshots(configuration["wait_before_screenshots"])
+        if configuration["stability_timeout"] is not None:
+            eyes.stability_timeout = int(configuration["stability_timeout"])
+        if configuration["send_dom"] is not None:
+            eyes.send_dom = configuration["send_dom"]
+        if configuration["stitch_memory_limit"] is not None:
+            eyes.stitcher = stitching.StripStitcher(int(configuration["stitch_memory_limit"]) * 1024 * 1024)
+        if configuration["compression"] is not None:
+            eyes.encoder.compression = encoding.get_compression(configuration["compression"])
+        if configuration["screenshot_scale"] is not None:
+            eyes.encoder.scale = encoding.get_scale(configuration["screenshot_scale"])
+        if configuration["screenshot_format"] is not None:
+            eyes.encoder.image_format = encoding.get_image_format(configuration["screenshot_format"])
+
+        return eyes
 
     def close_eyes_session(
-        self, enable_eyes_log=None, enable_http_debug_log=None, raise_exception=True, 
+        self, enable_eyes_log=None, enable_http_debug_log=None, raise_exception=True, deferred=False, alias=None,
     ):
         """
         Closes a session and returns the results of the session.
         If a test is running, aborts it. Otherwise, does nothing.
 
-            | =Arguments=                  | =Description=                                                                                                           |
-            | Enable Eyes Log (bool)       | The Eyes logs will not be included by default. To activate, pass 'True' in the variable                                 |
-            | Enable HTTP Debug Log (bool) | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable                           |
-            | Raise Exception (bool)       | If you don't want an exception to be thrown if there are new, missing or mismatched steps, pass 'False' in the variable |
+            | =Arguments=                  | =Description=                                                                                                                       |
+            | Enable Eyes Log (bool)       | The Eyes logs will not be included by default. To activate, pass 'True' in the variable                                             |
+            | Enable HTTP Debug Log (bool) | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable                                       |
+            | Raise Exception (bool)       | If you don't want an exception to be thrown if there are new, missing or mismatched steps, pass 'False' in the variable             |
+            | Deferred (bool)              | If 'True', returns immediately with a handle while the results resolve in the background. See `Wait For All Eyes Results`          |
+            | Alias (str)                  | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions`                        |
+
+        When ``deferred`` is enabled, the test does not wait for the Eyes server to finish matching its steps.
+        The failures are reported, mapped to the test that produced them, by `Wait For All Eyes Results`, usually called on Suite Teardown.
 
         *Example:*
-            | Close Eyes Session | ${false} |                                 
+            | Close Eyes Session | ${false} |
+            | Close Eyes Session | deferred=${true} |
         """
+        session = variables.sessions.get(alias)
         utils.manage_logging(enable_eyes_log, enable_http_debug_log)
 
-        variables.eyes.close(raise_exception)
-        variables.eyes.abort_if_not_closed()
+        if session.eyes.screen_stream is not None:
+            loggerRobot.info("Screen stream: %s" % session.eyes.screen_stream)
+
+        comparator = session.comparator
+        if comparator is not None and comparator.mode == local_comparison.LOCAL:
+            try:
+                return self._close_local_session(comparator, raise_exception, alias)
+            finally:
+                variables.sessions.unregister(session)
+                instances.release(session.eyes)
+
+        if session.eyes.upload_index is not None:
+            loggerRobot.info("Screenshot uploads of the batch: %s" % session.eyes.upload_index)
+
+        skipped_steps = 0
+        on_resolved = None
+        if session.hash_gate is not None:
+            skipped_steps = session.hash_gate.skipped_steps
+            on_resolved = session.hash_gate.on_close
+        if comparator is not None:
+            on_resolved = self._chain_on_resolved(on_resolved, comparator.on_close)
+        if session.eyes.adaptive_timeout is not None:
+            on_resolved = self._chain_on_resolved(on_resolved, session.eyes.adaptive_timeout.on_close)
+
+        if deferred:
+            test_name = BuiltIn().get_variable_value("${TEST NAME}", alias)
+            # The closing thread takes the log settings of the keyword, they're reset for the rest of the test
+            pending = results.defer_close(session.eyes, test_name, raise_exception, skipped_steps, on_resolved)
+            # The closing thread owns the session from now on, and aborts it if closing it fails
+            variables.sessions.unregister(session)
+            utils.manage_logging(False, False)
+            return pending
+
+        metrics.recorder.start("Close Eyes Session", BuiltIn().get_variable_value("${TEST NAME}", alias))
+        # Steps skipped by the hash gate are reported as missing by Eyes, so the results are evaluated here
+        try:
+            with metrics.recorder.phase(metrics.CLOSE):
+                try:
+                    test_results = session.eyes.close(raise_exception and not skipped_steps)
+                except Exception as e:
+                    # The exceptions of the sessions that didn't pass carry their results
+                    self._report_results(alias, getattr(e, "test_results", None), skipped_steps, e)
+                    raise
+                finally:
+                    # The session is only forgotten once it's ended on the server, by closing it or else by aborting it
+                    try:
+                        session.eyes.abort_if_not_closed()
+                    except Exception as e:
+                        loggerRobot.info("Failed to abort the session: %s" % e)
+                    finally:
+                        variables.sessions.unregister(session)
+                        instances.release(session.eyes)
+
+            if on_resolved is not None:
+                with metrics.recorder.phase(metrics.LOCAL):
+                    on_resolved(test_results)
+        finally:
+            metrics.recorder.finish()
+            metrics.recorder.write()
 
         utils.manage_logging(False, False)
 
+        self._report_results(alias, test_results, skipped_steps)
+        warning = results.get_skipped_steps_warning(test_results, skipped_steps)
+        if warning is not None:
+            loggerRobot.warn(warning)
+        failure = results.get_failure(test_results, skipped_steps)
+        if skipped_steps and raise_exception and failure is not None:
+            raise Exception(failure)
+        return test_results
+
+    def _close_local_session(self, comparator, raise_exception, alias=None):
+        metrics.recorder.start("Close Eyes Session", BuiltIn().get_variable_value("${TEST NAME}", alias))
+        try:
+            with metrics.recorder.phase(metrics.LOCAL):
+                test_results = comparator.close()
+        finally:
+            metrics.recorder.finish()
+            metrics.recorder.write()
+        loggerRobot.info(
+            "Local comparison: %d steps, %d matches, %d mismatches"
+            % (test_results.steps, test_results.matches, test_results.mismatches)
+        )
+        self._report_results(alias, test_results)
+
+        failure = results.get_failure(test_results)
+        if raise_exception and failure is not None:
+            raise Exception(failure)
+        return test_results
+
+    @staticmethod
+    def _report_results(alias, test_results, skipped_steps=0, error=None):
+        test_name = BuiltIn().get_variable_value("${TEST NAME}", alias)
+        suite = BuiltIn().get_variable_value("${SUITE NAME}")
+        if test_results is None:
+            reports.report.add(test_name, suite, None, error=error)
+        else:
+            reports.report.add(test_name, suite, test_results, results.get_failure(test_results, skipped_steps))
+
+    @staticmethod
+    def _chain_on_resolved(first, second):
+        if first is None:
+            return second
+
+        def on_resolved(test_results):
+            first(test_results)
+            second(test_results)
+
+        return on_resolved
+
+    def wait_for_all_eyes_results(self, raise_exception=True, timeout=None):
+        """
+        Waits for every session closed through `Close Eyes Session` with ``deferred`` enabled and returns their results.
+        Each session is reported in the log with the name of the test that produced it,
+        and the results of every session closed so far are written to the reports set on import. See `Results report`.
+
+            | =Arguments=            | =Description=                                                                                                               |
+            | Raise Exception (bool) | If you don't want an exception to be thrown if any of the sessions has new, missing or mismatched steps, pass 'False'       |
+            | Timeout (float)        | Maximum number of seconds to wait for all the results. By default, waits until every session is resolved                   |
+
+        *Example:*
+            | [Teardown]  | Wait For All Eyes Results |
+            | ${results}= | Wait For All Eyes Results | raise_exception=${false} | timeout=300 |
+        """
+        deadline = None if timeout is None else time.time() + float(timeout)
+        pending_results = results.collect_pending()
+        failures = []
+
+        for pending in pending_results:
+            remaining = None if deadline is None else max(deadline - time.time(), 0)
+            # The closing threads can't write to the Robot log, their messages are written here
+            if pending.wait(remaining):
+                robotlog.write(pending.messages)
+            logs.sink.flush()
+
+            warning = results.get_skipped_steps_warning(pending.results, pending.skipped_steps)
+            if warning is not None:
+                loggerRobot.warn("%s: %s" % (pending.test_name, warning))
+
+            failure = pending.failure
+            if failure is None:
+                loggerRobot.info("%s: Passed" % pending.test_name)
+            else:
+                loggerRobot.info("%s: %s" % (pending.test_name, failure))
+                if pending.raise_exception:
+                    failures.append("%s: %s" % (pending.test_name, failure))
+
+        metrics.recorder.write()
+        reports.report.write()
+
+        if failures and raise_exception:
+            raise Exception(
+                "%d of %d Eyes sessions failed:\n%s"
+                % (len(failures), len(pending_results), "\n".join(failures))
+            )
+
+        return [pending.results for pending in pending_results]
+
     def abort_eyes_session_if_not_closed(
-        self, enable_eyes_log=None, enable_http_debug_log=None
+        self, enable_eyes_log=None, enable_http_debug_log=None, alias=None
     ):
         """
         Stops execution without calling close(). 
         This method does all the cleanup normally done by close.
         If this method is called, and close has not been called, then the test will have a status of Aborted in the Test Manager.
 
-            | =Arguments=                  | =Description=                                                                                 |
-            | Enable Eyes Log (bool)       | The Eyes logs will not be included by default. To activate, pass 'True' in the variable       |
-            | Enable HTTP Debug Log (bool) | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable |
+            | =Arguments=                   | =Description=                                                                                                |
+            | Enable Eyes Log (bool)        | The Eyes logs will not be included by default. To activate, pass 'True' in the variable                      |
+            | Enable HTTP Debug Log (bool)  | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable                |
+            | Alias (str)                   | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions` |
 
         *Example:*
             | Abort Eyes Session If Not Closed |                             
         """
+        # Closed sessions are no longer registered, there's nothing to abort
+        if not variables.sessions.has(alias):
+            return
+        session = variables.sessions.get(alias)
         utils.manage_logging(enable_eyes_log, enable_http_debug_log)
 
-        variables.eyes.abort_if_not_closed()
+        try:
+            session.eyes.abort_if_not_closed()
+        finally:
+            variables.sessions.unregister(session)
+            instances.release(session.eyes)
 
         utils.manage_logging(False, False)
 
-    def eyes_session_is_open(self):
+    def eyes_session_is_open(self, alias=None):
         """
         Returns True if an Applitools Eyes session is currently running, otherwise it will return False.
-          
+
+            | =Arguments= | =Description=                                                                                                 |
+            | Alias (str) | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions` |
+
         *Example:*
             | ${isOpen}= | Eyes Session Is Open |                    
         """
 
-        return variables.eyes.is_open
+        if not variables.sessions.has(alias):
+            return False
+        session = variables.sessions.get(alias)
+        if session.comparator is not None and session.comparator.mode == local_comparison.LOCAL:
+            return session.comparator.is_open
+        return session.eyes.is_open
+
+    def switch_eyes_session(self, alias):
+        """
+        Switches the current Eyes session to the one identified by the given alias. See `Using multiple sessions`.
+
+        The current session is kept per thread. Returns the alias of the previous current session.
+
+            | =Arguments= | =Description=                                                          |
+            | Alias (str) | *Mandatory* - The alias given to the session on `Open Eyes Session`    |
+
+        *Example:*
+            | Switch Eyes Session | Mobile |
+        """
+
+        previous_alias = variables.sessions.current_alias
+        variables.sessions.switch(alias)
+        return previous_alias
 
-    def add_eyes_property(self, name, value):
+    def add_eyes_property(self, name, value, alias=None):
         """
         Adds a custom key name/value property that will be associated with the session.
         You can view these properties and filter and group by these properties in the [https://eyes.applitools.com/app/test-results/|Test Manager]
         Make sure to use this keyword right after `Open Eyes Session`.
 
-            | =Arguments= | =Description=                      |
-            | Name (str)  | The name of the property           |
-            | Value (str) | The value associated with the name |
+            | =Arguments=  | =Description=                                                                                                |
+            | Name (str)   | The name of the property                                                                                     |
+            | Value (str)  | The value associated with the name                                                                           |
+            | Alias (str)  | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions` |
 
         *Example:*
             | Add Eyes Property | Language | PT |                         
         """
 
-        variables.eyes.add_property(name, value)
+        variables.sessions.get(alias).eyes.add_property(name, value)
 
-    def get_viewport_size(self, enable_eyes_log=None, enable_http_debug_log=None):
+    def get_viewport_size(self, enable_eyes_log=None, enable_http_debug_log=None, alias=None):
         """
         Retrieves the value that was set for the viewport.
 
-            | =Arguments=                  | =Description=                                                                                 |
-            | Enable Eyes Log (bool)       | The Eyes logs will not be included by default. To activate, pass 'True' in the variable       |
-            | Enable HTTP Debug Log (bool) | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable |
+            | =Arguments=                   | =Description=                                                                                                |
+            | Enable Eyes Log (bool)        | The Eyes logs will not be included by default. To activate, pass 'True' in the variable                      |
+            | Enable HTTP Debug Log (bool)  | The HTTP Debug logs will not be included by default. To activate, pass 'True' in the variable                |
+            | Alias (str)                   | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions` |
 
         *Example:*
             | ${size}= | Get Viewport Size |                  
@@ -292,7 +614,7 @@ class SessionKeywords(object):
         logging_properties = utils.save_current_logging_properties()
         utils.manage_logging(enable_eyes_log, enable_http_debug_log)
 
-        viewport_size = variables.eyes.get_viewport_size()
+        viewport_size = capture.get_viewport_size(variables.sessions.get(alias))
 
         utils.manage_logging(**logging_properties)
         return viewport_size
@@ -324,27 +646,28 @@ class SessionKeywords(object):
                 started_at = datetime.strptime(started_at, "%Y-%m-%d %H:%M:%S")
 
         if name is not None and started_at is not None:
-            batch = BatchInfo(name, started_at)
+            batch = sdk.BatchInfo(name, started_at)
         elif name is not None:
-            batch = BatchInfo(name)
+            batch = sdk.BatchInfo(name)
         elif started_at is not None:
-            batch = BatchInfo(None, started_at)
+            batch = sdk.BatchInfo(None, started_at)
         else:
-            batch = BatchInfo()
+            batch = sdk.BatchInfo()
 
         if batch_id is not None:
-            batch.id = batch_id
+            variables.batches.set_id(batch, batch_id)
         return batch
 
-    def get_eyes_property(self, name):
+    def get_eyes_property(self, name, alias=None):
         """
         Returns the value of a given variable of Eyes. For a list of Eyes properties, consult [https://applitools.com/docs/api/eyes-sdk/index-gen/class-eyes-selenium-python.html|Eyes Documentation]
 
-            | =Arguments= | =Description=            |
-            | Name (str)  | The name of the variable |
+            | =Arguments=  | =Description=                                                                                                |
+            | Name (str)   | The name of the variable                                                                                     |
+            | Alias (str)  | The alias of the Eyes session to use. By default, the current session is used. See `Using multiple sessions` |
       
         *Example:*
             | ${value}= | Get Eyes Property | send_dom |      
         """
-        return vars(variables.eyes)[name]
+        return vars(variables.sessions.get(alias).eyes)[name]
 
@@ -1,17 +1,7 @@
 #!/usr/bin/env python
 
 from __future__ import absolute_import
-from applitools.geometry import Region
-from applitools.selenium.target import (
-    Target,
-    IgnoreRegionByElement,
-    IgnoreRegionBySelector,
-    FloatingRegion,
-    FloatingRegionByElement,
-    FloatingRegionBySelector,
-    FloatingBounds,
-)
-from EyesLibrary.resources import utils
+from EyesLibrary.resources import utils, geometry
 
 
 class TargetKeywords:
@@ -32,11 +22,12 @@ class TargetKeywords:
             | Check Eyes Window | Google Homepage              | target=${target} |
 
         """
+        from applitools.selenium.target import Target
 
         if target is None:
             target = Target()
 
-        ignore_region = Region(float(left), float(top), float(width), float(height))
+        ignore_region = geometry.Region(float(left), float(top), float(width), float(height))
         target.ignore(ignore_region)
 
         return target
@@ -55,11 +46,12 @@ class TargetKeywords:
             | ${target}=        | Ignore Region By Element | ${element}        | 
             | Check Eyes Window | Google Homepage          | target=${target}  |
         """
+        from applitools.selenium.target import Target
 
         if target is None:
             target = Target()
 
-        ignore_region = IgnoreRegionByElement(element)
+        ignore_region = geometry.IgnoreRegionByElement(element, geometry.get_resolver(target))
         target.ignore(ignore_region)
 
         return target
@@ -78,12 +70,15 @@ class TargetKeywords:
             | ${target}=        | Ignore Region By Selector | .first.expanded.dropdown | css selector |
             | Check Eyes Window | Google Homepage           | target=${target}         |
         """
+        from applitools.selenium.target import Target
 
         if target is None:
             target = Target()
 
         selector_strategy = utils.get_selector_strategy(selector)
-        ignore_region = IgnoreRegionBySelector(selector_strategy, value)
+        ignore_region = geometry.IgnoreRegionBySelector(
+            selector_strategy, value, geometry.get_resolver(target)
+        )
         target.ignore(ignore_region)
 
         return target
@@ -119,18 +114,19 @@ class TargetKeywords:
             | ${target}=    Floating Region By Coordinates |  10              | 10               | 200 | 150 | 10 | 0 | 50 | 50 | 
             | Check Eyes Window                            |  Google Homepage | target=${target} |
         """
+        from applitools.selenium.target import Target, FloatingBounds
 
         if target is None:
             target = Target()
 
-        region = Region(float(left), float(top), float(width), float(height))
+        region = geometry.Region(float(left), float(top), float(width), float(height))
         floating_bounds = FloatingBounds(
             int(max_left_offset),
             int(max_top_offset),
             int(max_right_offset),
             int(max_down_offset),
         )
-        floating_region = FloatingRegion(region, floating_bounds)
+        floating_region = geometry.FloatingRegion(region, floating_bounds)
         target.floating(floating_region)
 
         return target
@@ -161,6 +157,7 @@ class TargetKeywords:
             | ${target}=        | Floating Region By Element | ${element}        | 10 | 20 | 0 | 10 |
             | Check Eyes Window | Google Homepage            | target={target}   |
         """
+        from applitools.selenium.target import Target, FloatingBounds
 
         if target is None:
             target = Target()
@@ -171,7 +168,9 @@ class TargetKeywords:
             int(max_right_offset),
             int(max_down_offset),
         )
-        floating_region = FloatingRegionByElement(element, floating_bounds)
+        floating_region = geometry.FloatingRegionByElement(
+            element, floating_bounds, geometry.get_resolver(target)
+        )
         target.floating(floating_region)
 
         return target
@@ -203,6 +202,7 @@ class TargetKeywords:
             | ${target}=        | Floating Region By Selector | .first.expanded.dropdown | css selector | 20 | 10 | 20 | 10 |
             | Check Eyes Window | Google Homepage             | target=${target}         |
         """
+        from applitools.selenium.target import Target, FloatingBounds
 
         if target is None:
             target = Target()
@@ -214,8 +214,8 @@ class TargetKeywords:
             int(max_right_offset),
             int(max_down_offset),
         )
-        floating_region = FloatingRegionBySelector(
-            selector_strategy, value, floating_bounds
+        floating_region = geometry.FloatingRegionBySelector(
+            selector_strategy, value, floating_bounds, geometry.get_resolver(target)
         )
         target.floating(floating_region)
 
@@ -234,6 +234,7 @@ class TargetKeywords:
             | ${target}=        | Ignore Caret    | ${false}         |
             | Check Eyes Window | Google Homepage | target=${target} |
         """
+        from applitools.selenium.target import Target
 
         if target is None:
             target = Target()
@@ -1,7 +1,32 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import absolute_import
+from . import lazy
 from . import utils
 from . import variables
+from . import results
+from . import reports
+from . import batches
+from . import logs
+from . import robotlog
+from . import metrics
+from . import connections
+from . import instances
+from . import timeouts
+from . import stability
+from . import fanout
+from . import domcache
+from . import uploads
 
-__all__ = ["utils", "variables"]
+# Modules that load the Eyes SDK, Selenium or PIL, imported on first use. See `lazy.LazyModule`
+capture = lazy.LazyModule(__name__ + ".capture")
+hashgate = lazy.LazyModule(__name__ + ".hashgate")
+comparison = lazy.LazyModule(__name__ + ".comparison")
+stitching = lazy.LazyModule(__name__ + ".stitching")
+encoding = lazy.LazyModule(__name__ + ".encoding")
+geometry = lazy.LazyModule(__name__ + ".geometry")
+traffic = lazy.LazyModule(__name__ + ".traffic")
+streaming = lazy.LazyModule(__name__ + ".streaming")
+sdk = lazy.LazyModule(__name__ + ".sdk")
+
+__all__ = ["lazy", "utils", "variables", "results", "reports", "batches", "capture", "hashgate", "comparison", "stitching", "encoding", "geometry", "logs", "robotlog", "metrics", "connections", "traffic", "instances", "timeouts", "stability", "fanout", "domcache", "uploads", "streaming", "sdk"]
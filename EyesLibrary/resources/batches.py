@@ -0,0 +1,123 @@
+from __future__ import absolute_import
+import json
+import os
+import threading
+import time
+from .utils import lock_file, unlock_file
+
+
+# Seconds a batch ID registered on the store is attached to, so that the next executions don't reuse it
+BATCH_TTL = 12 * 60 * 60
+
+
+class BatchRegistry(object):
+    """
+    Batches used by the sessions, indexed by name and by name and start date.
+
+    When a store is set, batches are attached to the batch ID registered there by any process,
+    so that parallel executions (e.g. pabot workers) share the same batch.
+    Batches given an ID, through `set_id` or the APPLITOOLS_BATCH_ID environment variable, keep it.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._by_name = {}
+        self._by_name_and_date = {}
+        self._explicit_ids = set()
+        self._lock = threading.Lock()
+
+    def set_id(self, batch, batch_id):
+        """
+        Gives the batch an ID chosen by the user, which is used instead of the batches with the same name
+        and start date and of the store.
+        """
+        batch.id = batch_id
+        with self._lock:
+            self._explicit_ids.add(batch_id)
+        return batch
+
+    def get_by_name(self, name):
+        """
+        Returns the batch with the given name, creating it if necessary.
+        """
+        with self._lock:
+            batch = self._by_name.get(name)
+            if batch is None:
+                from applitools.eyes import BatchInfo
+
+                batch = BatchInfo(name)
+                if self.store is not None and not self._has_explicit_id(batch):
+                    self.store.attach(name, batch)
+                self._add(batch)
+            return batch
+
+    def get_or_add(self, batch):
+        """
+        Returns the batch with the same name and start date as the given one, registering it if necessary.
+        """
+        key = (batch.name, batch.started_at)
+        with self._lock:
+            if self._has_explicit_id(batch):
+                self._add(batch)
+                return batch
+            existing_batch = self._by_name_and_date.get(key)
+            if existing_batch is not None:
+                return existing_batch
+            if self.store is not None:
+                self.store.attach("%s|%s" % (batch.name, batch.started_at.isoformat()), batch)
+            self._add(batch)
+            return batch
+
+    def __len__(self):
+        return len(self._by_name_and_date)
+
+    def _has_explicit_id(self, batch):
+        return batch.id in self._explicit_ids or batch.id == os.environ.get("APPLITOOLS_BATCH_ID")
+
+    def _add(self, batch):
+        self._by_name.setdefault(batch.name, batch)
+        self._by_name_and_date[(batch.name, batch.started_at)] = batch
+
+
+class FileBatchStore(object):
+    """
+    Batch IDs shared between processes through a JSON file, guarded by an exclusive file lock.
+
+    The first process to register a batch key writes its batch ID, every other process reuses it,
+    until the registration expires after BATCH_TTL.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+    def attach(self, key, batch):
+        with open(self.path, "a+") as store_file:
+            lock_file(store_file)
+            try:
+                store_file.seek(0)
+                content = store_file.read()
+                batches = json.loads(content) if content.strip() else {}
+
+                now = time.time()
+                # Expired registrations are dropped, so that the file doesn't grow forever.
+                # Registrations without a date were written by previous versions and are dropped as well
+                expired = now - BATCH_TTL
+                for expired_key in [
+                    stored_key
+                    for stored_key, registration in batches.items()
+                    if not isinstance(registration, dict) or registration["registered"] < expired
+                ]:
+                    del batches[expired_key]
+
+                if key in batches:
+                    batch.id = batches[key]["id"]
+                else:
+                    batches[key] = {"id": batch.id, "registered": now}
+                    store_file.seek(0)
+                    store_file.truncate()
+                    store_file.write(json.dumps(batches))
+                    store_file.flush()
+                    os.fsync(store_file.fileno())
+            finally:
+                unlock_file(store_file)
+        return batch
@@ -0,0 +1,118 @@
+from __future__ import absolute_import
+from applitools.utils import image_utils
+from selenium.common.exceptions import NoSuchElementException, NoSuchFrameException, WebDriverException
+from selenium.webdriver.common.by import By
+from . import geometry
+
+
+SCROLL_POSITION_SCRIPT = """
+return {"x": window.pageXOffset, "y": window.pageYOffset};
+"""
+
+VIEWPORT_SIZE_SCRIPT = """
+return {"width": window.innerWidth, "height": window.innerHeight};
+"""
+
+
+def get_viewport_screenshot(session):
+    """
+    Returns the screenshot of the viewport of the session's driver, as a PIL Image.
+    """
+    if session.eyes.screen_stream is not None:
+        return session.eyes.screen_stream.get_screenshot(session.driver)
+    return image_utils.image_from_base64(session.driver.get_screenshot_as_base64())
+
+
+def get_viewport_size(session):
+    """
+    Returns the viewport size of the session's driver, also when the session isn't open on Eyes (local comparison).
+    """
+    if session.eyes.is_open:
+        return session.eyes.get_viewport_size()
+
+    try:
+        viewport_size = session.driver.execute_script(VIEWPORT_SIZE_SCRIPT)
+    except WebDriverException:
+        viewport_size = None
+
+    if not viewport_size:
+        viewport_size = session.driver.get_window_size()
+    return {"width": viewport_size["width"], "height": viewport_size["height"]}
+
+
+def get_scroll_position(driver):
+    """
+    Returns the scroll position of the page, or (0, 0) on native mobile apps.
+    """
+    try:
+        scroll_position = driver.execute_script(SCROLL_POSITION_SCRIPT)
+    except WebDriverException:
+        scroll_position = None
+    return scroll_position or {"x": 0, "y": 0}
+
+
+def get_region_screenshot(session, region):
+    """
+    Returns the part of the viewport screenshot given by the region (dict with left, top, width and height, in CSS pixels),
+    or None if the region isn't entirely visible in the viewport.
+    """
+    return crop_region(get_viewport_screenshot(session), region, get_viewport_size(session))
+
+
+def get_pixel_ratio(image, viewport_size):
+    return image.width / float(viewport_size["width"])
+
+
+def crop_region(image, region, viewport_size):
+    """
+    Returns the part of the viewport screenshot given by the region, or None if it isn't entirely visible in the viewport.
+    """
+    if not is_inside_viewport(region, viewport_size):
+        return None
+
+    pixel_ratio = get_pixel_ratio(image, viewport_size)
+    return image.crop(
+        (
+            int(round(region["left"] * pixel_ratio)),
+            int(round(region["top"] * pixel_ratio)),
+            int(round((region["left"] + region["width"]) * pixel_ratio)),
+            int(round((region["top"] + region["height"]) * pixel_ratio)),
+        )
+    )
+
+
+def get_element_rect(driver, element):
+    """
+    Returns the region of the element relative to the viewport.
+    """
+    # Native mobile apps don't run javascript, their element coordinates are already relative to the screen
+    return geometry.get_rects(driver, [element], relative_to_viewport=True)[0]
+
+
+def get_frame_element(driver, framereference):
+    """
+    Returns the frame element given by its name or id (str), its index on the page (int) or the element itself.
+    Names and ids are looked up like ``driver.switch_to.frame`` does, by id first, so that it's the frame switched to.
+    """
+    if isinstance(framereference, int):
+        return driver.find_elements_by_css_selector("frame, iframe")[framereference]
+    if isinstance(framereference, str):
+        try:
+            return driver.find_element(By.ID, framereference)
+        except NoSuchElementException:
+            try:
+                return driver.find_element(By.NAME, framereference)
+            except NoSuchElementException:
+                raise NoSuchFrameException(framereference)
+    return framereference
+
+
+def is_inside_viewport(region, viewport_size):
+    return (
+        region["width"] > 0
+        and region["height"] > 0
+        and region["left"] >= 0
+        and region["top"] >= 0
+        and region["left"] + region["width"] <= viewport_size["width"]
+        and region["top"] + region["height"] <= viewport_size["height"]
+    )
@@ -0,0 +1,357 @@
+from __future__ import absolute_import, division
+import os
+import re
+from PIL import Image
+from applitools.core import EyesIllegalArgument
+from applitools.eyes import MatchLevel
+from applitools.core.test_results import TestResults, TestResultsStatus
+from . import geometry, robotlog
+from .robotlog import logger as loggerRobot
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+EYES = "EYES"
+LOCAL = "LOCAL"
+PRESCREEN = "PRESCREEN"
+
+# Maximum difference of a color channel for pixels to be considered equal on Strict
+_STRICT_TOLERANCE = 32
+# Minimum luminance gradient for a pixel to be considered an edge on Content and Layout
+_EDGE_THRESHOLD = 48
+# Minimum number of differing pixels for a block to be considered mismatching on Strict and Content
+_BLOCK_SIZE = 4
+_MIN_BLOCK_DIFF = 4
+# Size of the blocks whose content occupancy is compared on Layout
+_LAYOUT_BLOCK_SIZE = 16
+# Maximum number of offsets tried when searching for a floating region
+_MAX_FLOATING_OFFSETS = 400
+
+
+def get_comparison_mode(comparison):
+
+    selected_mode = None
+
+    if comparison.upper() == EYES:
+        selected_mode = EYES
+    elif comparison.upper() == LOCAL:
+        selected_mode = LOCAL
+    elif comparison.upper() == PRESCREEN:
+        selected_mode = PRESCREEN
+    else:
+        raise EyesIllegalArgument("Please select a valid comparison: Eyes, Local, Prescreen")
+
+    if selected_mode != EYES and numpy is None:
+        raise EyesIllegalArgument(
+            "The %s comparison requires NumPy. Install it with: pip install robotframework-eyeslibrary[local]"
+            % selected_mode.capitalize()
+        )
+
+    return selected_mode
+
+
+def to_array(image):
+    return numpy.asarray(image.convert("RGB"))
+
+
+def get_luminance(pixels):
+    luminance = pixels[..., 0] * numpy.float32(0.299)
+    luminance += pixels[..., 1] * numpy.float32(0.587)
+    luminance += pixels[..., 2] * numpy.float32(0.114)
+    return luminance
+
+
+def get_edges(pixels):
+    """
+    Returns the pixels where the luminance gradient is above the edge threshold.
+    """
+    luminance = get_luminance(pixels)
+    edges = numpy.zeros(luminance.shape, dtype=bool)
+    edges[:, :-1] |= numpy.abs(numpy.diff(luminance, axis=1)) > _EDGE_THRESHOLD
+    edges[:-1, :] |= numpy.abs(numpy.diff(luminance, axis=0)) > _EDGE_THRESHOLD
+    return edges
+
+
+def sum_blocks(mask, block_size):
+    height, width = mask.shape
+    padded_height = -(-height // block_size) * block_size
+    padded_width = -(-width // block_size) * block_size
+    if (padded_height, padded_width) != mask.shape:
+        mask = numpy.pad(mask, ((0, padded_height - height), (0, padded_width - width)), "constant")
+    blocks = mask.reshape(padded_height // block_size, block_size, padded_width // block_size, block_size)
+    return blocks.sum(axis=(1, 3), dtype=numpy.int32)
+
+
+def get_pixel_diff(actual, expected, tolerance):
+    diff = numpy.zeros(actual.shape[:2], dtype=bool)
+    for channel in range(3):
+        diff |= (
+            numpy.abs(actual[..., channel].astype(numpy.int16) - expected[..., channel]) > tolerance
+        )
+    return diff
+
+
+def get_diff_blocks(actual, expected, match_level):
+    """
+    Returns the mismatching blocks of the two images (numpy arrays of equal shape) and the size of the blocks.
+
+    - Exact: any pixel difference
+    - Strict: color differences above a tolerance, ignoring isolated pixels (e.g. anti-aliasing)
+    - Content: differences of the edges (text and shapes), ignoring colors
+    - Layout: differences of the regions with content, ignoring the content itself
+    """
+    if match_level == MatchLevel.EXACT:
+        return numpy.any(actual != expected, axis=2), 1
+    elif match_level == MatchLevel.STRICT:
+        diff = get_pixel_diff(actual, expected, _STRICT_TOLERANCE)
+        return sum_blocks(diff, _BLOCK_SIZE) >= _MIN_BLOCK_DIFF, _BLOCK_SIZE
+    elif match_level == MatchLevel.CONTENT:
+        diff = get_edges(actual) != get_edges(expected)
+        return sum_blocks(diff, _BLOCK_SIZE) >= _MIN_BLOCK_DIFF, _BLOCK_SIZE
+    else:
+        actual_layout = sum_blocks(get_edges(actual), _LAYOUT_BLOCK_SIZE) > 0
+        expected_layout = sum_blocks(get_edges(expected), _LAYOUT_BLOCK_SIZE) > 0
+        return actual_layout != expected_layout, _LAYOUT_BLOCK_SIZE
+
+
+def find_floating_offset(actual, expected, region, bounds):
+    """
+    Returns True if the inner region of the actual image is found in the expected image, within the bounds.
+    """
+    left, top, width, height = region
+    patch = actual[top:top + height, left:left + width]
+    offsets = [
+        (x, y)
+        for y in range(-bounds["up"], bounds["down"] + 1)
+        for x in range(-bounds["left"], bounds["right"] + 1)
+    ]
+    step = max(1, int(len(offsets) / _MAX_FLOATING_OFFSETS))
+
+    # The original position is the most likely one, so it's tried first
+    for x, y in [(0, 0)] + offsets[::step]:
+        if top + y < 0 or left + x < 0:
+            continue
+        candidate = expected[top + y:top + y + height, left + x:left + x + width]
+        if candidate.shape == patch.shape and not get_pixel_diff(patch, candidate, _STRICT_TOLERANCE).any():
+            return True
+    return False
+
+
+def get_target_regions(driver, target, origin=None):
+    """
+    Returns the ignore regions and the floating regions (with their bounds) defined on the Target, in CSS pixels.
+    Element regions are relative to the origin, the viewport position of the checked region.
+    """
+    ignore_regions = []
+    floating_regions = []
+    if target is None:
+        return ignore_regions, floating_regions
+
+    wrappers = list(target._ignore_regions) + list(target._floating_regions)
+    regions = _get_regions(driver, wrappers, origin)
+
+    ignore_regions.extend(regions[:len(target._ignore_regions)])
+
+    for floating_wrapper, region in zip(target._floating_regions, regions[len(target._ignore_regions):]):
+        bounds = floating_wrapper.bounds
+        floating_regions.append(
+            (
+                region,
+                {
+                    "left": int(bounds.max_left_offset),
+                    "up": int(bounds.max_up_offset),
+                    "right": int(bounds.max_right_offset),
+                    "down": int(bounds.max_down_offset),
+                },
+            )
+        )
+
+    return ignore_regions, floating_regions
+
+
+def _get_regions(driver, region_wrappers, origin):
+    # The element and selector regions are resolved together, in a single round trip
+    items = []
+    for region_wrapper in region_wrappers:
+        if getattr(region_wrapper, "region", None) is None:
+            element = getattr(region_wrapper, "element", None)
+            items.append(element if element is not None else (region_wrapper.by, region_wrapper.value))
+    rects = iter(geometry.get_rects(driver, items, relative_to_viewport=True))
+
+    regions = []
+    for region_wrapper in region_wrappers:
+        region = getattr(region_wrapper, "region", None)
+        if region is not None:
+            regions.append((region.left, region.top, region.width, region.height))
+            continue
+
+        rect = next(rects)
+        if origin is not None:
+            rect["left"] -= origin["left"]
+            rect["top"] -= origin["top"]
+        regions.append((rect["left"], rect["top"], rect["width"], rect["height"]))
+    return regions
+
+
+def _scale(region, pixel_ratio, shape):
+    left, top, width, height = [int(round(value * pixel_ratio)) for value in region]
+    left, top = max(left, 0), max(top, 0)
+    return (left, top, max(min(width, shape[1] - left), 0), max(min(height, shape[0] - top), 0))
+
+
+def compare(image, baseline, match_level, ignore_regions=(), floating_regions=(), pixel_ratio=1.0):
+    """
+    Compares the image with the baseline. Returns the ratio of mismatching area (0 if they match) and
+    the mismatching blocks, upscaled to the size of the image, or None if the sizes differ.
+    """
+    actual = to_array(image)
+    expected = to_array(baseline)
+    if actual.shape != expected.shape:
+        return 1.0, None
+
+    # Ignored and matching floating regions are taken from the baseline, so they never differ
+    actual = actual.copy()
+    for region in ignore_regions:
+        left, top, width, height = _scale(region, pixel_ratio, actual.shape)
+        actual[top:top + height, left:left + width] = expected[top:top + height, left:left + width]
+
+    for region, bounds in floating_regions:
+        scaled_region = _scale(region, pixel_ratio, actual.shape)
+        scaled_bounds = dict((key, int(round(value * pixel_ratio))) for key, value in bounds.items())
+        if find_floating_offset(actual, expected, scaled_region, scaled_bounds):
+            left, top, width, height = _scale(
+                (
+                    region[0] - bounds["left"],
+                    region[1] - bounds["up"],
+                    region[2] + bounds["left"] + bounds["right"],
+                    region[3] + bounds["up"] + bounds["down"],
+                ),
+                pixel_ratio,
+                actual.shape,
+            )
+            actual[top:top + height, left:left + width] = expected[top:top + height, left:left + width]
+
+    diff_blocks, block_size = get_diff_blocks(actual, expected, match_level)
+    mismatch = diff_blocks.mean() if diff_blocks.size else 0.0
+    if not mismatch:
+        return 0.0, None
+
+    diff_mask = numpy.kron(diff_blocks, numpy.ones((block_size, block_size), dtype=bool))
+    return float(mismatch), diff_mask[:actual.shape[0], :actual.shape[1]]
+
+
+def draw_diff(baseline, diff_mask):
+    pixels = to_array(baseline).copy()
+    pixels[diff_mask] = (pixels[diff_mask] // 2) + numpy.array([127, 0, 0], dtype=numpy.uint8)
+    return Image.fromarray(pixels)
+
+
+def _get_file_name(name):
+    return re.sub(r"[^\w\-. ]", "_", name)
+
+
+class LocalComparator(object):
+    """
+    Compares the checkpoints of a session with the baselines kept on a local directory, without the Eyes server.
+
+    In Local mode, it replaces the Eyes session: new baselines are saved right away (when saving new tests).
+    In Prescreen mode, it runs before the Eyes server match and the baselines are only saved if the session passes.
+    """
+
+    def __init__(self, baseline_dir, appname, testname, mode=LOCAL, save_new_tests=True):
+        self.mode = mode
+        self.save_new_tests = save_new_tests
+        self.is_open = True
+        self.matches = 0
+        self.mismatches = 0
+        self.new_steps = 0
+        self.test_name = testname
+        self._directory = os.path.join(baseline_dir, _get_file_name(appname), _get_file_name(testname))
+        self._pending = {}
+        self._step_counts = {}
+
+    def check(self, name, image, match_level, ignore_regions=(), floating_regions=(), pixel_ratio=1.0):
+        """
+        Compares the image with the baseline of the step and reports the result in the log.
+        Returns True if it matches, or if it's a new step.
+        """
+        occurrence = self._step_counts.get(name, 0) + 1
+        self._step_counts[name] = occurrence
+        file_name = _get_file_name(name) + ("" if occurrence == 1 else "_%d" % occurrence) + ".png"
+        baseline_path = os.path.join(self._directory, file_name)
+
+        if not os.path.exists(baseline_path):
+            self.new_steps += 1
+            if self.mode == LOCAL:
+                if self.save_new_tests:
+                    self._save(image, baseline_path)
+            else:
+                self._pending[baseline_path] = image
+            loggerRobot.info("Local comparison: '%s' is a new step" % name)
+            return True
+
+        baseline = Image.open(baseline_path)
+        mismatch, diff_mask = compare(
+            image, baseline, match_level, ignore_regions, floating_regions, pixel_ratio
+        )
+        if self.mode == PRESCREEN:
+            self._pending[baseline_path] = image
+
+        if not mismatch:
+            self.matches += 1
+            loggerRobot.info("Local comparison: '%s' matches the baseline" % name)
+            return True
+
+        self.mismatches += 1
+        if diff_mask is None:
+            loggerRobot.info(
+                "Local comparison: '%s' has a different size than the baseline (%dx%d, expected %dx%d)"
+                % (name, image.width, image.height, baseline.width, baseline.height)
+            )
+        else:
+            diff_path = os.path.join(self._get_diff_directory(), file_name)
+            self._save(draw_diff(baseline, diff_mask), diff_path)
+            loggerRobot.info(
+                "Local comparison: '%s' differs from the baseline in %.2f%% of the area. See <a href=\"%s\">diff</a>"
+                % (name, mismatch * 100, diff_path),
+                html=True,
+            )
+        return False
+
+    def close(self):
+        """
+        Returns the results of the session, in the same format as Eyes.
+        """
+        self.is_open = False
+        steps = self.matches + self.mismatches + self.new_steps
+        if self.mismatches or (self.new_steps and not self.save_new_tests):
+            status = TestResultsStatus.Unresolved
+        else:
+            status = TestResultsStatus.Passed
+        test_results = TestResults(steps, self.matches, self.mismatches, status=status)
+        test_results.is_new = steps > 0 and self.new_steps == steps
+        test_results.url = self._directory
+        return test_results
+
+    def on_close(self, test_results):
+        """
+        Saves the captures as baselines, in Prescreen mode, if the Eyes session passed.
+        """
+        if test_results is not None and test_results.is_passed:
+            for baseline_path, image in self._pending.items():
+                self._save(image, baseline_path)
+        self._pending = {}
+
+    def _get_diff_directory(self):
+        output_dir = robotlog.get_variable_value("${OUTPUT DIR}") or os.getcwd()
+        return os.path.join(output_dir, "eyes_diffs", _get_file_name(self.test_name))
+
+    @staticmethod
+    def _save(image, path):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        image.save(path, format="PNG")
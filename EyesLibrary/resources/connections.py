@@ -0,0 +1,209 @@
+from __future__ import absolute_import
+import contextlib
+import threading
+from . import logs
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+_local = threading.local()
+
+
+class ConnectionPool(object):
+    """
+    Keep-alive connections to the Eyes server, shared by every session of the process instead of a new connection per request.
+
+    Connection errors are retried with an exponential backoff; requests that reached the server aren't,
+    as their body may have been streamed already. ``timeout`` (seconds), when set, replaces the timeout of the Eyes SDK.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, timeout=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        import requests
+        from requests.packages.urllib3.util.retry import Retry
+
+        self.size = size
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = _get_adapter_class()(
+            pool_connections=size,
+            pool_maxsize=size,
+            max_retries=Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=backoff),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        if self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        return self.session.request(method, url, **kwargs)
+
+    def prewarm(self, url, count):
+        """
+        Opens up to ``count`` connections to the server of the given URL on background threads,
+        so that the first requests of the sessions don't wait for the TLS handshakes.
+        """
+        threads = [
+            threading.Thread(target=self._open_connection, args=(url,), name="EyesPrewarm-%d" % index)
+            for index in range(min(count, self.size))
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        return threads
+
+    def _open_connection(self, url):
+        import requests
+        from applitools.core import logger
+
+        try:
+            self.session.head(url, verify=False, timeout=self.timeout or 30)
+        except requests.RequestException as e:
+            logger.debug("Pre-warming the connection to %s failed: %s" % (url, e))
+
+    def close(self):
+        self.session.close()
+
+
+_adapter_class = None
+
+
+def _get_adapter_class():
+    """
+    Returns the adapter of the pool, built on first use as requests is only imported with the pool. Its connections
+    read their debug level from `logs.http_debug_level`, so the HTTP debug log of the library only prints
+    the requests of the Eyes sessions instead of every HTTP connection of the process.
+    """
+    global _adapter_class
+
+    if _adapter_class is not None:
+        return _adapter_class
+
+    from requests.adapters import HTTPAdapter
+    from requests.packages.urllib3 import connection, connectionpool
+
+    class HTTPConnection(connection.HTTPConnection):
+        debuglevel = logs.http_debug_level
+
+    class HTTPSConnection(connection.HTTPSConnection):
+        debuglevel = logs.http_debug_level
+
+    class HTTPConnectionPool(connectionpool.HTTPConnectionPool):
+        ConnectionCls = HTTPConnection
+
+    class HTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+        ConnectionCls = HTTPSConnection
+
+    pool_classes = {"http": HTTPConnectionPool, "https": HTTPSConnectionPool}
+
+    class EyesHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super(EyesHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = pool_classes
+
+        def proxy_manager_for(self, *args, **kwargs):
+            manager = super(EyesHTTPAdapter, self).proxy_manager_for(*args, **kwargs)
+            manager.pool_classes_by_scheme = pool_classes
+            return manager
+
+    _adapter_class = EyesHTTPAdapter
+    return _adapter_class
+
+
+_settings = {"size": DEFAULT_POOL_SIZE, "timeout": None, "retries": DEFAULT_RETRIES, "backoff": DEFAULT_BACKOFF}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init(size=DEFAULT_POOL_SIZE, timeout=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, prewarm_url=None, prewarm=0):
+    """
+    Configures the connection pool of the Eyes sessions, on the library import.
+    The pool is built on its first use, or on a background thread when it's pre-warmed.
+    """
+    global _pool
+
+    with _pool_lock:
+        _settings.update(
+            size=int(size),
+            timeout=float(timeout) if timeout is not None else None,
+            retries=int(retries),
+            backoff=float(backoff),
+        )
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+    if int(prewarm) > 0:
+        thread = threading.Thread(target=_prewarm, args=(prewarm_url, int(prewarm)), name="EyesPrewarm")
+        thread.daemon = True
+        thread.start()
+
+
+def _prewarm(url, count):
+    if url is None:
+        from applitools.eyes import Eyes
+
+        url = Eyes.DEFAULT_EYES_SERVER
+    get_pool().prewarm(url, count)
+
+
+def get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(**_settings)
+        return _pool
+
+
+def request(method, url, **kwargs):
+    return get_pool().request(method, url, **kwargs)
+
+
+@contextlib.contextmanager
+def use_transport(transport):
+    """
+    Sends the requests of the Eyes SDK made by the current thread inside the block through the transport,
+    an object with a ``send(method, url, data, kwargs)`` method, instead of the connection pool.
+    """
+    previous = getattr(_local, "transport", None)
+    _local.transport = transport
+    try:
+        yield
+    finally:
+        _local.transport = previous
+
+
+class _ConnectorRequests(object):
+    """
+    Stands for the requests module in the agent connector of the Eyes SDK, which otherwise opens a connection per request.
+    """
+
+    def __getattr__(self, name):
+        import requests
+
+        return getattr(requests, name)
+
+    def post(self, url, data=None, **kwargs):
+        return self._send("POST", url, data, kwargs)
+
+    def delete(self, url, **kwargs):
+        return self._send("DELETE", url, None, kwargs)
+
+    @staticmethod
+    def _send(method, url, data, kwargs):
+        transport = getattr(_local, "transport", None)
+        if transport is None:
+            return request(method, url, data=data, **kwargs)
+        return transport.send(method, url, data, kwargs)
+
+
+_connector_requests = _ConnectorRequests()
+
+
+def install():
+    from applitools.core import agent_connector
+
+    # The agent connector sends its requests through the requests module it imported
+    agent_connector.requests = _connector_requests
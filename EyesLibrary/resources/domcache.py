@@ -0,0 +1,128 @@
+from __future__ import absolute_import
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import six
+from .utils import JsonStore
+
+
+# Seconds an uploaded DOM is reused for, before the Eyes server may have discarded it
+UPLOAD_TTL = 12 * 60 * 60
+# Stylesheets kept in memory, the least recently used are dropped
+MAX_STYLESHEETS = 1000
+
+
+def get_digest(text):
+    if isinstance(text, six.text_type):
+        text = text.encode("utf-8")
+    return hashlib.sha1(text).hexdigest()
+
+
+class UploadStore(JsonStore):
+    """
+    URLs of the DOM snapshots uploaded to the Eyes server, by digest, persisted in a JSON file shared by parallel executions.
+    """
+
+    def _merge(self, stored_values, values):
+        stored_values.update(values)
+        # Expired uploads are dropped, so that the file doesn't grow forever
+        expired = time.time() - UPLOAD_TTL
+        for digest in [digest for digest, upload in stored_values.items() if upload["uploaded"] < expired]:
+            del stored_values[digest]
+
+
+class DomCache(object):
+    """
+    Content-addressed cache of the resources sent with the DOM of the checkpoints (when ``send_dom`` is enabled),
+    kept for the whole execution, so that the same resources aren't processed nor uploaded again by every checkpoint:
+    - The stylesheets bundled into the DOM, by digest of their content, or by URL for the external ones, downloaded once:
+      their content isn't known before they're downloaded, so a stylesheet changed on its server keeps its first content
+    - The URLs of the DOM snapshots uploaded to the Eyes server, by digest of the snapshot
+
+    When ``path`` is set, the uploads are also kept on that file, shared with the next and parallel executions.
+    """
+
+    def __init__(self, path=None):
+        self.store = UploadStore(path) if path is not None else None
+        self.uploads_reused = 0
+        self.stylesheets_reused = 0
+        self._uploads = {}
+        self._stylesheets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_upload(self, dom_json):
+        """
+        Returns the URL of the snapshot on the Eyes server, if it was uploaded before and didn't expire.
+        """
+        digest = get_digest(dom_json)
+        with self._lock:
+            upload = self._uploads.get(digest)
+        if upload is None and self.store is not None:
+            upload = self.store.get(digest)
+        if upload is None or upload["uploaded"] < time.time() - UPLOAD_TTL:
+            return None
+        with self._lock:
+            self._uploads[digest] = upload
+            self.uploads_reused += 1
+        return upload["location"]
+
+    def add_upload(self, dom_json, location):
+        digest = get_digest(dom_json)
+        upload = {"location": location, "uploaded": time.time()}
+        with self._lock:
+            self._uploads[digest] = upload
+        if self.store is not None:
+            self.store.update({digest: upload})
+
+    def get_stylesheet(self, node, process):
+        """
+        Returns the bundled text of the stylesheet node of the Eyes SDK, processed by ``process`` on its first use.
+        Nodes with text (inline stylesheets) are keyed by their digest, along with the URL their imports are resolved against.
+        The capture of the Eyes SDK never gives the text of external stylesheets, which are keyed by URL.
+        """
+        key = node.url if node.text is None else "%s|%s" % (node.base_url, get_digest(node.text))
+        with self._lock:
+            text = self._stylesheets.pop(key, None)
+            if text is not None:
+                self._stylesheets[key] = text
+                self.stylesheets_reused += 1
+                return text
+        text = process(node)
+        with self._lock:
+            self._stylesheets[key] = text
+            if len(self._stylesheets) > MAX_STYLESHEETS:
+                self._stylesheets.popitem(last=False)
+        return text
+
+
+cache = DomCache()
+
+
+def init(path=None):
+    """
+    Sets the file where the uploads are kept, on the library import. The cache of the execution is emptied.
+    """
+    global cache
+
+    cache = DomCache(os.path.abspath(path) if path is not None else None)
+
+
+def _get_frame_bundled_css(driver):
+    # Same as the Eyes SDK, except the stylesheets are taken from the cache instead of being processed by a new process pool
+    from applitools.selenium.capture import dom_capture
+
+    base_url = driver.current_url
+    cssom_results = driver.execute_script(dom_capture._CAPTURE_CSSOM_SCRIPT)
+    return "".join(
+        cache.get_stylesheet(dom_capture.CssNode.create(base_url, css_href, css_text), dom_capture._process_raw_css_node)
+        for css_text, css_href in cssom_results
+    )
+
+
+def install():
+    from applitools.selenium.capture import dom_capture
+
+    # The DOM capture bundles the stylesheets of each frame through this module function
+    dom_capture._get_frame_bundled_css = _get_frame_bundled_css
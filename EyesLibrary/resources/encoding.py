@@ -0,0 +1,158 @@
+from __future__ import absolute_import, division
+import math
+import time
+from collections import OrderedDict
+from applitools.core import EyesIllegalArgument
+from applitools.utils import image_utils
+from . import metrics
+from .robotlog import logger as loggerRobot
+
+
+PNG = "PNG"
+WEBP = "WEBP"
+ADAPTIVE = "ADAPTIVE"
+
+# Compression level used by Eyes (the default of Pillow)
+DEFAULT_COMPRESSION = 6
+
+# Upload throughput (bytes per second) from which each compression level is chosen on adaptive mode.
+# Fast connections favour fast encoding, slow connections favour smaller screenshots
+_ADAPTIVE_LEVELS = ((50 * 1024 * 1024, 1), (10 * 1024 * 1024, 3), (2 * 1024 * 1024, 6), (0, 9))
+# Weight of the last upload on the measured throughput
+_THROUGHPUT_SMOOTHING = 0.5
+
+
+def get_compression(compression):
+
+    if str(compression).upper() == ADAPTIVE:
+        return ADAPTIVE
+
+    try:
+        selected_compression = int(compression)
+    except ValueError:
+        selected_compression = None
+
+    if selected_compression is None or not 0 <= selected_compression <= 9:
+        raise EyesIllegalArgument("Please select a valid compression: 0 to 9 or Adaptive")
+    return selected_compression
+
+
+def get_image_format(image_format):
+
+    selected_format = None
+
+    if image_format.upper() == PNG:
+        selected_format = PNG
+    elif image_format.upper() == WEBP:
+        selected_format = WEBP
+    else:
+        raise EyesIllegalArgument("Please select a valid screenshot format: PNG, WEBP")
+
+    return selected_format
+
+
+def get_scale(scale):
+
+    selected_scale = float(scale)
+    if not 0 < selected_scale <= 1:
+        raise EyesIllegalArgument("Please select a valid screenshot scale: greater than 0, up to 1")
+    return selected_scale
+
+
+def scale_region(region, scale):
+    """
+    Returns the ignore or floating region (as sent to Eyes) scaled to the screenshot.
+    """
+    return OrderedDict(
+        (key, int(math.ceil(value * scale))) for key, value in region.__getstate__().items()
+    )
+
+
+class ScreenshotEncoder(object):
+    """
+    Encodes the screenshots uploaded to Eyes, and measures the encoding and upload of each checkpoint.
+
+    On adaptive compression, the compression level is chosen from the upload throughput measured on the previous uploads.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION, scale=1.0, image_format=PNG):
+        self.compression = compression
+        self.scale = scale
+        self.image_format = image_format
+        self.throughput = None
+        self._check_stats = None
+
+    @property
+    def is_default(self):
+        return self.compression == DEFAULT_COMPRESSION and self.scale == 1.0 and self.image_format == PNG
+
+    def get_compression_level(self):
+        if self.compression != ADAPTIVE:
+            return self.compression
+        if self.throughput is None:
+            return DEFAULT_COMPRESSION
+        for throughput, level in _ADAPTIVE_LEVELS:
+            if self.throughput >= throughput:
+                return level
+        return DEFAULT_COMPRESSION
+
+    def encode(self, image, output):
+        """
+        Writes the encoded image to the output file and returns it.
+        """
+        start = time.time()
+        level = self.get_compression_level()
+
+        if self.scale != 1.0:
+            image = image_utils.scale_image(image, self.scale)
+
+        if self.image_format == WEBP:
+            # WebP only has methods 0 (fast) to 6 (small)
+            image.save(output, format="WEBP", lossless=True, method=int(round(level * 6 / 9.0)))
+        else:
+            image.save(output, format="PNG", compress_level=level)
+
+        encode_time = time.time() - start
+        metrics.recorder.add(metrics.ENCODING, encode_time)
+        if self._check_stats is not None:
+            self._check_stats["encode_time"] += encode_time
+            self._check_stats["level"] = level
+        return output
+
+    def record_upload(self, size, seconds):
+        if seconds > 0:
+            throughput = size / seconds
+            if self.throughput is None:
+                self.throughput = throughput
+            else:
+                self.throughput += _THROUGHPUT_SMOOTHING * (throughput - self.throughput)
+
+        if self._check_stats is not None:
+            self._check_stats["uploads"] += 1
+            self._check_stats["bytes"] += size
+            self._check_stats["upload_time"] += seconds
+
+    def start_check(self):
+        self._check_stats = {"uploads": 0, "bytes": 0, "encode_time": 0.0, "upload_time": 0.0, "level": None}
+
+    def report(self, name):
+        """
+        Reports the encoding and upload of the checkpoint in the log.
+        """
+        stats, self._check_stats = self._check_stats, None
+        if not stats or not stats["uploads"]:
+            return
+
+        loggerRobot.info(
+            "Screenshot encoding of '%s': %s (compression %s, scale %s), %d bytes sent in %d upload(s), encoded in %.3fs, uploaded in %.3fs"
+            % (
+                name,
+                self.image_format,
+                stats["level"],
+                self.scale,
+                stats["bytes"],
+                stats["uploads"],
+                stats["encode_time"],
+                stats["upload_time"],
+            )
+        )
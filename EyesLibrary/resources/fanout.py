@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+import sys
+import threading
+import six
+from six.moves import queue
+from . import logs, robotlog
+
+
+def run_concurrently(calls, threads=None, name="EyesFanOut"):
+    """
+    Runs the calls (functions without arguments) on up to ``threads`` threads, all of them by default,
+    and returns once every call is done, with the result of each call and the exception info it raised, in order.
+
+    The threads log like the calling thread. Their messages are written to the Robot log by the calling thread,
+    once every call is done. They read the variables of Robot through `robotlog.get_variable_value`, as they were on the call.
+    """
+    calls = list(calls)
+    outcomes = [(None, None)] * len(calls)
+    messages = [[] for _ in calls]
+    pending = queue.Queue()
+    for index, call in enumerate(calls):
+        pending.put((index, call))
+
+    enable_eyes_log = logs.sink.enabled
+    enable_http_debug_log = logs.is_http_debug_enabled()
+    variables = robotlog.get_variables()
+
+    def work():
+        logs.sink.enabled = enable_eyes_log
+        logs.set_http_debug(enable_http_debug_log)
+        while True:
+            try:
+                index, call = pending.get_nowait()
+            except queue.Empty:
+                return
+            with robotlog.collect(messages[index], variables):
+                try:
+                    outcomes[index] = (call(), None)
+                except Exception:
+                    outcomes[index] = (None, sys.exc_info())
+
+    workers = [
+        threading.Thread(target=work, name="%s-%d" % (name, number))
+        for number in six.moves.range(min(int(threads or len(calls)), len(calls)))
+    ]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    for worker in workers:
+        worker.join()
+    for call_messages in messages:
+        robotlog.write(call_messages)
+    logs.sink.flush()
+    return outcomes
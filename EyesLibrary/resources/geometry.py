@@ -0,0 +1,227 @@
+from __future__ import absolute_import
+import weakref
+from selenium.common.exceptions import WebDriverException
+from applitools.core.errors import OutOfBoundsError
+from applitools.geometry import Region
+from applitools.selenium.target import (
+    IgnoreRegionByElement as _IgnoreRegionByElement,
+    IgnoreRegionBySelector as _IgnoreRegionBySelector,
+    FloatingRegion,
+    FloatingRegionByElement as _FloatingRegionByElement,
+    FloatingRegionBySelector as _FloatingRegionBySelector,
+)
+
+
+# Returns the rect of each item (an element or a [by, value] selector), or null if the selector matches no element.
+# When the cache is used, the rects of the selectors are kept on the page until the DOM changes, the page is resized or
+# scrolled, or a resource is loaded. Navigating to another page discards it along with the window.
+RECTS_SCRIPT = """
+var items = arguments[0];
+var scrollX = arguments[1] ? 0 : window.pageXOffset;
+var scrollY = arguments[1] ? 0 : window.pageYOffset;
+var cache = arguments[2] ? getCache() : null;
+
+function getCache() {
+    var cache = window.__eyesLibrarySelectorCache;
+    if (!cache && window.MutationObserver) {
+        cache = window.__eyesLibrarySelectorCache = {"rects": {}};
+        var clear = function () { cache.rects = {}; };
+        new MutationObserver(clear).observe(document, {attributes: true, childList: true, characterData: true, subtree: true});
+        window.addEventListener("resize", clear);
+        window.addEventListener("scroll", clear, true);
+        window.addEventListener("load", clear, true);
+    }
+    return cache;
+}
+
+function find(by, value) {
+    switch (by) {
+        case "id": return document.getElementById(value);
+        case "css selector": return document.querySelector(value);
+        case "xpath": return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        case "name": return document.getElementsByName(value)[0];
+        case "class name": return document.getElementsByClassName(value)[0];
+        case "tag name": return document.getElementsByTagName(value)[0];
+    }
+    return null;
+}
+
+function getRect(element) {
+    var rect = element.getBoundingClientRect();
+    return {"left": rect.left, "top": rect.top, "width": rect.width, "height": rect.height};
+}
+
+return items.map(function (item) {
+    var rect = null;
+    if (!Array.isArray(item)) {
+        rect = getRect(item);
+    } else {
+        var key = item[0] + ":" + item[1];
+        rect = cache ? cache.rects[key] : null;
+        if (!rect) {
+            var element = find(item[0], item[1]);
+            rect = element ? getRect(element) : null;
+            if (rect && cache) {
+                cache.rects[key] = rect;
+            }
+        }
+    }
+    if (!rect) {
+        return null;
+    }
+    return {"left": rect.left + scrollX, "top": rect.top + scrollY, "width": rect.width, "height": rect.height};
+});
+"""
+
+
+# Selector strategies found by RECTS_SCRIPT, the others are found by WebDriver before the script runs
+_SCRIPT_STRATEGIES = ("id", "css selector", "xpath", "name", "class name", "tag name")
+
+# Drivers whose selector rects are cached on the page, see `set_selector_cache`
+_cached_drivers = weakref.WeakKeyDictionary()
+
+
+def set_selector_cache(driver, enabled):
+    """
+    Sets if the rects of the selectors resolved on the driver are cached on the page, until the page changes.
+    """
+    if enabled:
+        _cached_drivers[driver] = True
+    else:
+        _cached_drivers.pop(driver, None)
+
+
+def get_rects(driver, items, relative_to_viewport=False):
+    """
+    Returns the rect (dict with left, top, width and height) of each item, given as WebElement or (by, value) selector,
+    in a single round trip. The rects are relative to the page, like the element location, or to the viewport.
+
+    When javascript isn't available (e.g. native mobile apps) the items are resolved by WebDriver,
+    with their coordinates relative to the screen.
+    """
+    items = [
+        driver.find_element(*item) if isinstance(item, tuple) and item[0] not in _SCRIPT_STRATEGIES else item
+        for item in items
+    ]
+    if not items:
+        return []
+
+    try:
+        rects = driver.execute_script(
+            RECTS_SCRIPT,
+            [list(item) if isinstance(item, tuple) else item for item in items],
+            relative_to_viewport,
+            driver in _cached_drivers,
+        )
+    except WebDriverException:
+        rects = None
+
+    if not rects:
+        rects = [None] * len(items)
+    # Selectors not found by the script are searched again, so that WebDriver raises its usual exception
+    return [rect if rect else _get_rect(driver, item) for rect, item in zip(rects, items)]
+
+
+def _get_rect(driver, item):
+    element = driver.find_element(*item) if isinstance(item, tuple) else item
+    try:
+        # A single round trip on W3C drivers
+        rect = element.rect
+    except (AttributeError, WebDriverException):
+        rect = dict(element.location)
+        rect.update(element.size)
+    return {"left": rect["x"], "top": rect["y"], "width": rect["width"], "height": rect["height"]}
+
+
+def get_region_in_frame_viewport(eyes_screenshot, rect):
+    """
+    Returns the part of the rect (relative to the page) visible in the screenshot, as done by Eyes for elements.
+    """
+    location = eyes_screenshot.get_location_relative_to_frame_viewport({"x": rect["left"], "y": rect["top"]})
+    x, y = location["x"], location["y"]
+    width, height = rect["width"], rect["height"]
+    if x < 0:
+        width += x
+        x = 0
+    if y < 0:
+        height += y
+        y = 0
+
+    if width <= 0 or height <= 0:
+        raise OutOfBoundsError(
+            "Element's region is outside the viewport! [(%d, %d) %d x %d]"
+            % (rect["left"], rect["top"], rect["width"], rect["height"])
+        )
+    return Region(x, y, width, height)
+
+
+class RegionResolver(object):
+    """
+    Resolves the element and selector regions of a Target together, in a single round trip per screenshot.
+    """
+
+    def __init__(self):
+        self._regions = []
+        self._screenshot = None
+        self._rects = {}
+
+    def add(self, region):
+        self._regions.append(region)
+
+    def get_region(self, region, eyes_screenshot):
+        if self._screenshot is None or self._screenshot() is not eyes_screenshot:
+            rects = get_rects(eyes_screenshot._driver, [item.item for item in self._regions])
+            self._rects = dict((id(item), rect) for item, rect in zip(self._regions, rects))
+            self._screenshot = weakref.ref(eyes_screenshot)
+        return get_region_in_frame_viewport(eyes_screenshot, self._rects[id(region)])
+
+
+def get_resolver(target):
+    resolver = getattr(target, "_region_resolver", None)
+    if resolver is None:
+        resolver = target._region_resolver = RegionResolver()
+    return resolver
+
+
+class IgnoreRegionByElement(_IgnoreRegionByElement):
+    def __init__(self, element, resolver):
+        super(IgnoreRegionByElement, self).__init__(element)
+        self.item = element
+        self._resolver = resolver
+        resolver.add(self)
+
+    def get_region(self, eyes_screenshot):
+        return self._resolver.get_region(self, eyes_screenshot)
+
+
+class IgnoreRegionBySelector(_IgnoreRegionBySelector):
+    def __init__(self, by, value, resolver):
+        super(IgnoreRegionBySelector, self).__init__(by, value)
+        self.item = (by, value)
+        self._resolver = resolver
+        resolver.add(self)
+
+    def get_region(self, eyes_screenshot):
+        return self._resolver.get_region(self, eyes_screenshot)
+
+
+class FloatingRegionByElement(_FloatingRegionByElement):
+    def __init__(self, element, bounds, resolver):
+        super(FloatingRegionByElement, self).__init__(element, bounds)
+        self.item = element
+        self._resolver = resolver
+        resolver.add(self)
+
+    def get_region(self, eyes_screenshot):
+        return FloatingRegion(self._resolver.get_region(self, eyes_screenshot), self.bounds)
+
+
+class FloatingRegionBySelector(_FloatingRegionBySelector):
+    def __init__(self, by, value, bounds, resolver):
+        super(FloatingRegionBySelector, self).__init__(by, value, bounds)
+        self.item = (by, value)
+        self._resolver = resolver
+        resolver.add(self)
+
+    def get_region(self, eyes_screenshot):
+        return FloatingRegion(self._resolver.get_region(self, eyes_screenshot), self.bounds)
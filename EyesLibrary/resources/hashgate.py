@@ -0,0 +1,135 @@
+from __future__ import absolute_import
+import hashlib
+import os
+import threading
+from PIL import Image
+from applitools.core import EyesIllegalArgument
+from .utils import JsonStore
+from .results import get_failure
+from .robotlog import logger as loggerRobot
+
+
+SHORTEN = "SHORTEN"
+SKIP = "SKIP"
+
+_HASH_SIZE = 16
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_hash_gate_mode(hash_gate):
+
+    selected_mode = None
+
+    if hash_gate.upper() == SHORTEN:
+        selected_mode = SHORTEN
+    elif hash_gate.upper() == SKIP:
+        selected_mode = SKIP
+    else:
+        raise EyesIllegalArgument("Please select a valid hash gate mode: Shorten, Skip")
+
+    return selected_mode
+
+
+def get_store(path):
+    """
+    Returns the hash store of the given file, shared by every session of the process.
+    """
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = HashStore(path)
+        return _stores[path]
+
+
+def exact_hash(image):
+    digest = hashlib.sha256()
+    digest.update(("%s:%dx%d:" % (image.mode, image.width, image.height)).encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def perceptual_hash(image):
+    """
+    Difference hash: compares the brightness of adjacent cells of a downscaled grayscale copy of the image.
+    """
+    cells = image.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.BILINEAR)
+    pixels = list(cells.getdata())
+    bits = 0
+    for row in range(_HASH_SIZE):
+        for column in range(_HASH_SIZE):
+            offset = row * (_HASH_SIZE + 1) + column
+            bits = (bits << 1) | (pixels[offset] > pixels[offset + 1])
+    return "%0*x" % (_HASH_SIZE * _HASH_SIZE // 4, bits)
+
+
+def hash_distance(first_hash, second_hash):
+    return bin(int(first_hash, 16) ^ int(second_hash, 16)).count("1")
+
+
+class HashStore(JsonStore):
+    """
+    Hashes of the captures of the last passing run, persisted in a JSON file shared by parallel executions.
+    """
+
+
+class HashGate(object):
+    """
+    Compares the captures of a session with the ones of the last passing run of the same step.
+
+    The hashes of the session are only saved to the store once the session passes.
+    """
+
+    def __init__(self, store, appname, testname, mode=SHORTEN, threshold=0):
+        self.store = store
+        self.appname = appname
+        self.testname = testname
+        self.mode = mode
+        self.threshold = int(threshold)
+        self.skipped_steps = 0
+        self._pending = {}
+        self._step_counts = {}
+
+    def matches(self, name, image):
+        """
+        Records the hashes of the capture and returns True if it matches the last passing run of the step.
+        """
+        occurrence = self._step_counts.get(name, 0) + 1
+        self._step_counts[name] = occurrence
+        key = "%s|%s|%s|%d" % (self.appname, self.testname, name, occurrence)
+
+        hashes = {"exact": exact_hash(image), "perceptual": perceptual_hash(image)}
+        self._pending[key] = hashes
+
+        stored_hashes = self.store.get(key)
+        if stored_hashes is None:
+            return False
+        if stored_hashes["exact"] == hashes["exact"]:
+            return True
+        return (
+            self.threshold > 0
+            and hash_distance(stored_hashes["perceptual"], hashes["perceptual"]) <= self.threshold
+        )
+
+    def report(self, name):
+        """
+        Logs the step as matched by the gate, counting it when the server match is skipped.
+        """
+        if self.mode == SKIP:
+            self.skipped_steps += 1
+            loggerRobot.info(
+                "Hash gate: '%s' matches the last passing run. Eyes server match skipped." % name
+            )
+        else:
+            loggerRobot.info(
+                "Hash gate: '%s' matches the last passing run. Matching once, without retries." % name
+            )
+
+    def on_close(self, test_results):
+        """
+        Saves the hashes of the session if it passed.
+        """
+        if test_results is not None and get_failure(test_results, self.skipped_steps) is None:
+            self.store.update(self._pending)
+        self._pending = {}
@@ -0,0 +1,58 @@
+from __future__ import absolute_import
+import threading
+
+
+class EyesPool(object):
+    """
+    Eyes instances kept between tests, per configuration, so that sessions opened with the same arguments
+    reuse an instance built and configured once instead of creating a new one.
+
+    An instance is released back to the pool once its session is closed or aborted, and reset before being handed out again.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, configuration, create):
+        """
+        Returns an idle instance of the configuration (a hashable key), or a new one built by ``create``.
+        """
+        with self._lock:
+            idle = self._idle.get(configuration)
+            if idle:
+                eyes = idle.pop()
+                eyes.pool_idle = False
+                self.reused += 1
+                return eyes
+            self.created += 1
+
+        eyes = create()
+        eyes.keep_configuration()
+        eyes.pool = self
+        eyes.pool_configuration = configuration
+        eyes.pool_idle = False
+        return eyes
+
+    def release(self, eyes):
+        with self._lock:
+            if eyes.pool_idle:
+                return
+            eyes.pool_idle = True
+        eyes.reset()
+        with self._lock:
+            self._idle.setdefault(eyes.pool_configuration, []).append(eyes)
+
+
+def release(eyes):
+    """
+    Returns the instance to its pool, if it was acquired from one. Does nothing otherwise.
+    """
+    pool = getattr(eyes, "pool", None)
+    if pool is not None:
+        pool.release(eyes)
+
+
+pool = EyesPool()
@@ -0,0 +1,30 @@
+from __future__ import absolute_import
+import importlib
+
+
+class LazyModule(object):
+    """
+    Stands for a module imported on the first use of one of its attributes.
+
+    The modules that load the Eyes SDK, Selenium or PIL are referenced through it, so that importing the library
+    (done by every pabot worker and libdoc build) doesn't load them until a keyword needs them.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        return "<lazy module '%s'>" % self._name
@@ -0,0 +1,186 @@
+from __future__ import absolute_import
+import atexit
+import collections
+import io
+import logging
+import threading
+import time
+import six
+from robot.api import logger as loggerRobot
+
+
+# Messages kept in memory before they're written, older messages are dropped when they can't be written yet
+DEFAULT_CAPACITY = 10000
+
+
+def get_log_level(level):
+
+    selected_level = None
+
+    if str(level).upper() == "INFO":
+        selected_level = logging.INFO
+    elif str(level).upper() == "DEBUG":
+        selected_level = logging.DEBUG
+    else:
+        from applitools.core import EyesIllegalArgument
+
+        raise EyesIllegalArgument("Please select a valid Eyes log level: Info, Debug")
+
+    return selected_level
+
+
+class EyesLogSink(object):
+    """
+    Logger of the Eyes SDK, set once for the whole execution instead of being opened and closed by each keyword.
+
+    The messages are enabled per thread and kept in a ring buffer, which is written to the log file, if any,
+    or to the Robot log when it's flushed (at the end of the keywords) or full.
+    Robot only accepts messages from the main thread, so messages of other threads wait for the next flush of the main thread.
+    """
+
+    def __init__(self, level=logging.INFO, path=None, capacity=DEFAULT_CAPACITY):
+        # Read by the Eyes SDK, which saves debug screenshots on DEBUG level
+        self._level = level
+        self.path = path
+        self.default_enabled = False
+        self._records = collections.deque(maxlen=capacity)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def level(self):
+        return self._level
+
+    @level.setter
+    def level(self, level):
+        self._level = level
+
+    @property
+    def enabled(self):
+        """
+        Whether the messages of the current thread are logged. Threads that never set it use ``default_enabled``.
+        """
+        return getattr(self._local, "enabled", self.default_enabled)
+
+    @enabled.setter
+    def enabled(self, enabled):
+        self._local.enabled = enabled
+
+    # Logger interface of the Eyes SDK
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def info(self, msg):
+        self._add(logging.INFO, msg)
+
+    def debug(self, msg):
+        self._add(logging.DEBUG, msg)
+
+    def _add(self, level, msg):
+        if level < self._level or not self.enabled:
+            return
+
+        record = (time.time(), level, threading.current_thread().name, msg)
+        with self._lock:
+            if len(self._records) == self._records.maxlen:
+                if self._can_write():
+                    self._write(self._take())
+                else:
+                    self._dropped += 1
+            self._records.append(record)
+
+    def flush(self):
+        """
+        Writes the buffered messages. Does nothing outside the main thread when writing to the Robot log.
+        """
+        with self._lock:
+            if self._records and self._can_write():
+                self._write(self._take())
+
+    def _can_write(self):
+        return self.path is not None or threading.current_thread().name == "MainThread"
+
+    def _take(self):
+        records = list(self._records)
+        self._records.clear()
+
+        lines = [
+            "%s,%03d [%s] %s: %s"
+            % (
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created)),
+                int(created * 1000) % 1000,
+                logging.getLevelName(level),
+                thread_name,
+                msg,
+            )
+            for created, level, thread_name, msg in records
+        ]
+        if self._dropped:
+            lines.insert(0, "%d older Eyes log messages were dropped" % self._dropped)
+            self._dropped = 0
+        return lines
+
+    def _write(self, lines):
+        if self.path is None:
+            loggerRobot.info("\n".join(lines))
+            return
+
+        with io.open(self.path, "a", encoding="utf-8") as log_file:
+            for line in lines:
+                log_file.write(six.text_type(line) + u"\n")
+
+
+class _ThreadDebugLevel(object):
+    """
+    Debug level of the HTTP connections of `connections.ConnectionPool`, per thread. The other HTTP connections
+    of the process keep their own debug level.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __get__(self, instance, owner):
+        return self.get()
+
+    def get(self):
+        return getattr(self._local, "level", 0)
+
+    def set(self, level):
+        self._local.level = level
+
+
+sink = EyesLogSink()
+http_debug_level = _ThreadDebugLevel()
+
+
+def init(enabled=False, path=None, level=None):
+    """
+    Configures the sink, on the library import. It's set as the logger of the Eyes SDK by `install`, once the SDK is loaded.
+    """
+    sink.default_enabled = enabled is True
+    sink.path = path
+    if level is not None:
+        sink.level = get_log_level(level)
+
+
+def install():
+    from applitools.core import logger
+
+    logger.set_logger(sink)
+    logger.open_()
+
+
+def set_http_debug(enabled):
+    http_debug_level.set(1 if enabled else 0)
+
+
+def is_http_debug_enabled():
+    return http_debug_level.get() > 0
+
+
+atexit.register(sink.flush)
@@ -0,0 +1,255 @@
+from __future__ import absolute_import
+import atexit
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import six
+from robot.libraries.BuiltIn import RobotNotRunningError
+from . import robotlog
+from .robotlog import logger as loggerRobot
+
+
+LOCAL = "local"
+CAPTURE = "capture"
+STITCHING = "stitching"
+DOM = "dom"
+ENCODING = "encoding"
+UPLOAD = "upload"
+MATCH = "match"
+RETRIES = "retries"
+CLOSE = "close"
+OTHER = "other"
+
+# Order of the phases in the reports
+PHASES = (LOCAL, CAPTURE, STITCHING, DOM, ENCODING, UPLOAD, MATCH, RETRIES, CLOSE, OTHER)
+
+
+def _get_suite_name():
+    try:
+        return robotlog.get_variable_value("${SUITE NAME}")
+    except RobotNotRunningError:
+        return None
+
+
+class CheckMetrics(object):
+    """
+    Time spent on each phase of a checkpoint (or of closing a session).
+
+    The phases of the matches retried until the match timeout are accounted together as retries,
+    from the end of the first match to the end of the checkpoint.
+    """
+
+    def __init__(self, keyword, name, suite=None):
+        self.keyword = keyword
+        self.name = name
+        self.suite = suite
+        self.started = time.time()
+        self.phases = {}
+        self.attempts = 0
+        self.total = None
+        self._first_match_end = None
+
+    def add(self, phase, seconds):
+        if self.attempts:
+            return
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_match(self, upload_seconds, match_seconds):
+        self.add(UPLOAD, upload_seconds)
+        self.add(MATCH, match_seconds)
+        self.attempts += 1
+        if self.attempts == 1:
+            self._first_match_end = time.time()
+
+    def finish(self):
+        end = time.time()
+        self.total = end - self.started
+        if self.attempts > 1:
+            self.phases[RETRIES] = end - self._first_match_end
+        self.phases[OTHER] = max(self.total - sum(self.phases.values()), 0.0)
+
+    def __str__(self):
+        return "%.3fs (%s)" % (
+            self.total,
+            ", ".join(
+                "%s %.3fs" % (phase, self.phases[phase]) for phase in PHASES if self.phases.get(phase)
+            ),
+        )
+
+
+class MetricsRecorder(object):
+    """
+    Measures the phases of the checkpoint running on each thread, reports them in the Robot log and
+    aggregates them per suite and keyword into a JSON file and a Prometheus textfile, if set.
+    """
+
+    def __init__(self):
+        self.json_path = None
+        self.prometheus_path = None
+        self._suites = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        return getattr(self._local, "check", None)
+
+    def create(self, keyword, name):
+        """
+        Returns the metrics of a checkpoint of the current suite, measured by the caller, e.g. on another thread.
+        """
+        return CheckMetrics(keyword, name, _get_suite_name())
+
+    def start(self, keyword, name):
+        """
+        Starts measuring a checkpoint on the current thread, until `finish`.
+        """
+        self._local.check = self.create(keyword, name)
+        return self._local.check
+
+    def add(self, phase, seconds):
+        check = self.current
+        if check is not None:
+            check.add(phase, seconds)
+
+    def add_match(self, upload_seconds, match_seconds):
+        check = self.current
+        if check is not None:
+            check.add_match(upload_seconds, match_seconds)
+
+    @contextlib.contextmanager
+    def phase(self, phase):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(phase, time.time() - start)
+
+    def finish(self):
+        check = self.current
+        self._local.check = None
+        if check is not None:
+            self.record(check)
+
+    def record(self, check):
+        """
+        Reports the finished checkpoint and adds it to the totals of its suite and keyword.
+        """
+        if check.total is None:
+            check.finish()
+        loggerRobot.info("Timings of '%s': %s" % (check.name, check))
+
+        with self._lock:
+            keywords = self._suites.setdefault(check.suite or "", OrderedDict())
+            totals = keywords.setdefault(
+                check.keyword, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "attempts": 0, "phases": {}}
+            )
+            totals["count"] += 1
+            totals["seconds"] += check.total
+            totals["max_seconds"] = max(totals["max_seconds"], check.total)
+            totals["attempts"] += check.attempts
+            for phase, seconds in check.phases.items():
+                totals["phases"][phase] = totals["phases"].get(phase, 0.0) + seconds
+
+    def write(self):
+        """
+        Writes the totals to the JSON file and to the Prometheus textfile, if set.
+        """
+        with self._lock:
+            if self.json_path is not None:
+                _write_file(self.json_path, self._to_json())
+            if self.prometheus_path is not None:
+                _write_file(self.prometheus_path, self._to_prometheus())
+
+    def _to_json(self):
+        suites = []
+        for suite, keywords in self._suites.items():
+            suite_totals = OrderedDict([("suite", suite), ("keywords", [])])
+            for keyword, totals in keywords.items():
+                phases = OrderedDict(
+                    (phase, round(totals["phases"][phase], 6)) for phase in PHASES if phase in totals["phases"]
+                )
+                suite_totals["keywords"].append(
+                    OrderedDict(
+                        [
+                            ("keyword", keyword),
+                            ("count", totals["count"]),
+                            ("seconds", round(totals["seconds"], 6)),
+                            ("max_seconds", round(totals["max_seconds"], 6)),
+                            ("match_attempts", totals["attempts"]),
+                            ("phases", phases),
+                        ]
+                    )
+                )
+            suites.append(suite_totals)
+        return json.dumps(OrderedDict([("suites", suites)]), indent=2)
+
+    def _to_prometheus(self):
+        check_lines = []
+        max_lines = []
+        attempt_lines = []
+        phase_lines = []
+        for suite, keywords in self._suites.items():
+            for keyword, totals in keywords.items():
+                labels = 'suite="%s",keyword="%s"' % (_escape_label(suite), _escape_label(keyword))
+                check_lines.append("eyeslibrary_check_seconds_sum{%s} %f" % (labels, totals["seconds"]))
+                check_lines.append("eyeslibrary_check_seconds_count{%s} %d" % (labels, totals["count"]))
+                max_lines.append("eyeslibrary_check_max_seconds{%s} %f" % (labels, totals["max_seconds"]))
+                attempt_lines.append("eyeslibrary_match_attempts_total{%s} %d" % (labels, totals["attempts"]))
+                for phase in PHASES:
+                    if phase in totals["phases"]:
+                        phase_lines.append(
+                            'eyeslibrary_check_phase_seconds_total{%s,phase="%s"} %f'
+                            % (labels, phase, totals["phases"][phase])
+                        )
+
+        lines = [
+            "# HELP eyeslibrary_check_seconds Time spent on the Eyes checkpoints and on closing the sessions.",
+            "# TYPE eyeslibrary_check_seconds summary",
+        ]
+        lines += check_lines
+        lines += [
+            "# HELP eyeslibrary_check_max_seconds Longest checkpoint.",
+            "# TYPE eyeslibrary_check_max_seconds gauge",
+        ]
+        lines += max_lines
+        lines += [
+            "# HELP eyeslibrary_match_attempts_total Matches sent to the Eyes server, including retries.",
+            "# TYPE eyeslibrary_match_attempts_total counter",
+        ]
+        lines += attempt_lines
+        lines += [
+            "# HELP eyeslibrary_check_phase_seconds_total Time spent on each phase of the checkpoints.",
+            "# TYPE eyeslibrary_check_phase_seconds_total counter",
+        ]
+        lines += phase_lines
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_file(path, content):
+    # Written aside and renamed, so that the file is never read half written
+    temporary_path = path + ".tmp"
+    with io.open(temporary_path, "w", encoding="utf-8") as metrics_file:
+        metrics_file.write(six.text_type(content))
+    if os.name == "nt" and os.path.exists(path):
+        os.remove(path)
+    os.rename(temporary_path, path)
+
+
+recorder = MetricsRecorder()
+
+
+def init(json_path=None, prometheus_path=None):
+    recorder.json_path = json_path
+    recorder.prometheus_path = prometheus_path
+
+
+atexit.register(recorder.write)
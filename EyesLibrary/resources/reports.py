@@ -0,0 +1,175 @@
+from __future__ import absolute_import
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from xml.sax.saxutils import escape, quoteattr
+
+
+ERROR = "Error"
+
+_COPY_BLOCK_SIZE = 64 * 1024
+
+
+class ResultsReport(object):
+    """
+    Report of the results of every Eyes session closed in the execution, written as compact JSON and as JUnit XML, if set.
+
+    Each session is written to temporary files as soon as it is resolved, and only the totals are kept in memory,
+    so that the memory stays flat whatever the number of sessions. `write` copies them into the reports, with the totals.
+    """
+
+    def __init__(self, json_path=None, junit_path=None):
+        self.json_path = json_path
+        self.junit_path = junit_path
+        self.totals = OrderedDict(
+            (total, 0)
+            for total in ("sessions", "passed", "unresolved", "failed", "new", "errors", "steps", "mismatches", "missing")
+        )
+        self._json_records = None
+        self._junit_records = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.json_path is not None or self.junit_path is not None
+
+    def add(self, test_name, suite, test_results, failure=None, error=None):
+        """
+        Adds the results of a session, None if closing it raised ``error``. ``failure`` is the message of a session that didn't pass.
+        """
+        if not self.enabled:
+            return
+
+        if test_results is None:
+            status = ERROR
+            record = OrderedDict([("test", test_name), ("suite", suite), ("status", status), ("error", str(error))])
+        else:
+            status = str(test_results.status)
+            record = OrderedDict(
+                [
+                    ("test", test_name),
+                    ("suite", suite),
+                    ("status", status),
+                    ("new", bool(test_results.is_new)),
+                    ("steps", test_results.steps),
+                    ("matches", test_results.matches),
+                    ("mismatches", test_results.mismatches),
+                    ("missing", test_results.missing),
+                    ("url", test_results.url),
+                ]
+            )
+            if failure is not None:
+                record["failure"] = failure
+
+        with self._lock:
+            if self._json_records is None:
+                self._json_records = tempfile.TemporaryFile()
+                self._junit_records = tempfile.TemporaryFile()
+            self._add_totals(status, test_results, failure)
+            json_record = json.dumps(record, separators=(",", ":"))
+            if self.totals["sessions"] > 1:
+                json_record = ",\n" + json_record
+            self._json_records.write(json_record.encode("utf-8"))
+            self._junit_records.write(_to_junit_case(record, failure).encode("utf-8"))
+
+    def _add_totals(self, status, test_results, failure):
+        self.totals["sessions"] += 1
+        if test_results is None:
+            self.totals["errors"] += 1
+            return
+        if test_results.is_new:
+            self.totals["new"] += 1
+        # Sessions whose missing steps were skipped by the library pass, whatever their status
+        if failure is None:
+            self.totals["passed"] += 1
+        elif status.lower() == "failed":
+            self.totals["failed"] += 1
+        else:
+            self.totals["unresolved"] += 1
+        self.totals["steps"] += test_results.steps
+        self.totals["mismatches"] += test_results.mismatches
+        self.totals["missing"] += test_results.missing
+
+    def write(self):
+        """
+        Writes the sessions added so far to the JSON report and to the JUnit XML report, if set.
+        """
+        with self._lock:
+            if self.json_path is not None:
+                _write_file(
+                    self.json_path,
+                    '{"summary":%s,"sessions":[\n' % json.dumps(self.totals, separators=(",", ":")),
+                    self._json_records,
+                    "\n]}\n",
+                )
+            if self.junit_path is not None:
+                _write_file(
+                    self.junit_path,
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<testsuite name="Eyes" tests="%d" failures="%d" errors="%d">\n'
+                    % (
+                        self.totals["sessions"],
+                        self.totals["sessions"] - self.totals["passed"] - self.totals["errors"],
+                        self.totals["errors"],
+                    ),
+                    self._junit_records,
+                    "</testsuite>\n",
+                )
+
+    def close(self):
+        with self._lock:
+            if self._json_records is not None:
+                self._json_records.close()
+                self._junit_records.close()
+                self._json_records = self._junit_records = None
+
+
+def _to_junit_case(record, failure):
+    case = '  <testcase classname=%s name=%s' % (quoteattr(record["suite"] or "Eyes"), quoteattr(record["test"] or ""))
+    if record["status"] == ERROR:
+        return case + ">\n    <error message=%s/>\n  </testcase>\n" % quoteattr(record["error"])
+    if failure is not None:
+        return case + ">\n    <failure message=%s>%s</failure>\n  </testcase>\n" % (
+            quoteattr(failure),
+            escape(record["url"] or ""),
+        )
+    return case + "/>\n"
+
+
+def _write_file(path, head, records, tail):
+    # Written aside and renamed, so that the file is never read half written
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as report_file:
+        report_file.write(head.encode("utf-8"))
+        if records is not None:
+            records.seek(0)
+            shutil.copyfileobj(records, report_file, _COPY_BLOCK_SIZE)
+            records.seek(0, os.SEEK_END)
+        report_file.write(tail.encode("utf-8"))
+    if os.name == "nt" and os.path.exists(path):
+        os.remove(path)
+    os.rename(temporary_path, path)
+
+
+report = ResultsReport()
+
+
+def init(json_path=None, junit_path=None):
+    """
+    Sets the files where the results are reported, on the library import. The sessions reported so far are dropped.
+    """
+    global report
+
+    report.close()
+    report = ResultsReport(json_path, junit_path)
+
+
+def _write_report():
+    report.write()
+
+
+atexit.register(_write_report)
@@ -0,0 +1,157 @@
+from __future__ import absolute_import
+import threading
+import time
+from . import instances, logs, metrics, reports, robotlog
+
+
+_pending = []
+_lock = threading.Lock()
+# Limits the sessions closed at once in the background, unlimited when None
+_close_slots = None
+
+
+class PendingResult(object):
+    """
+    Handle of an Eyes session being closed in the background.
+
+    Returned by `Close Eyes Session` when ``deferred`` is enabled and resolved by `Wait For All Eyes Results`.
+    """
+
+    def __init__(self, eyes, test_name, raise_exception=True, skipped_steps=0, on_resolved=None):
+        self.eyes = eyes
+        self.metrics = metrics.recorder.create("Close Eyes Session", test_name)
+        self.test_name = test_name
+        self.raise_exception = raise_exception
+        self.skipped_steps = skipped_steps
+        self.on_resolved = on_resolved
+        self.results = None
+        self.error = None
+        self.messages = []
+        self._variables = robotlog.get_variables()
+        # The logs are enabled per thread, so the closing thread logs like the test that closed the session
+        self._enable_eyes_log = logs.sink.enabled
+        self._enable_http_debug_log = logs.is_http_debug_enabled()
+        self._thread = threading.Thread(target=self._close, name="EyesClose-%s" % test_name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _close(self):
+        from applitools.core import logger
+
+        # Robot ignores the messages of this thread, they're written by `Wait For All Eyes Results`
+        with robotlog.collect(self.messages, self._variables):
+            logs.sink.enabled = self._enable_eyes_log
+            logs.set_http_debug(self._enable_http_debug_log)
+            slots = _close_slots
+            if slots is not None:
+                slots.acquire()
+            start = time.time()
+            try:
+                self.results = self.eyes.close(False)
+                self.metrics.add(metrics.CLOSE, time.time() - start)
+                if self.on_resolved is not None:
+                    start = time.time()
+                    self.on_resolved(self.results)
+                    self.metrics.add(metrics.LOCAL, time.time() - start)
+            except Exception as e:
+                self.error = e
+            finally:
+                try:
+                    self.eyes.abort_if_not_closed()
+                except Exception as e:
+                    logger.info("Failed to abort deferred session: %s" % e)
+                if slots is not None:
+                    slots.release()
+                instances.release(self.eyes)
+                # Recorded and written like the sessions closed synchronously, once resolved
+                metrics.recorder.record(self.metrics)
+                metrics.recorder.write()
+                if self.error is None:
+                    reports.report.add(
+                        self.test_name, self.metrics.suite, self.results, get_failure(self.results, self.skipped_steps)
+                    )
+                else:
+                    reports.report.add(self.test_name, self.metrics.suite, None, error=self.error)
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    @property
+    def failure(self):
+        """
+        Message describing why the session failed, or None if it passed.
+        Mirrors the exceptions raised by Eyes when closing synchronously.
+        """
+        if not self.done:
+            return "Timed out waiting for the results"
+        if self.error is not None:
+            return "%s: %s" % (type(self.error).__name__, self.error)
+        return get_failure(self.results, self.skipped_steps)
+
+
+def get_skipped_steps_warning(test_results, skipped_steps):
+    """
+    Returns the warning about the steps skipped by the hash gate, which the Eyes dashboard shows as missing, or None if there's none.
+    """
+    if not skipped_steps or test_results is None:
+        return None
+    return (
+        "%d step(s) skipped by the hash gate weren't sent to Eyes: the dashboard shows them as missing "
+        "and the session as Unresolved, although the test passes. See %s" % (skipped_steps, test_results.url)
+    )
+
+
+def get_failure(test_results, skipped_steps=0):
+    """
+    Returns the message describing why the session failed, or None if it passed.
+    Steps whose match was skipped by the library are reported by Eyes as missing, so they aren't considered failures.
+    """
+    from applitools.core.test_results import TestResultsStatus
+
+    if test_results is None:
+        return None
+
+    if (
+        skipped_steps
+        and not test_results.is_new
+        and test_results.mismatches == 0
+        and test_results.missing <= skipped_steps
+    ):
+        return None
+
+    status = test_results.status
+    if status == TestResultsStatus.Unresolved:
+        if test_results.is_new:
+            return "New test. Please approve the new baseline at %s" % test_results.url
+        return "Detected differences! See details at: %s" % test_results.url
+    elif status == TestResultsStatus.Failed:
+        return "Test failed. See details at: %s" % test_results.url
+    return None
+
+
+def defer_close(eyes, test_name, raise_exception=True, skipped_steps=0, on_resolved=None):
+    pending = PendingResult(eyes, test_name, raise_exception, skipped_steps, on_resolved)
+    with _lock:
+        _pending.append(pending)
+    return pending
+
+
+def init(close_threads=None):
+    """
+    Sets the number of sessions closed at once in the background, on the library import.
+    """
+    global _close_slots
+
+    _close_slots = threading.BoundedSemaphore(int(close_threads)) if close_threads else None
+
+
+def collect_pending():
+    global _pending
+    with _lock:
+        pending, _pending = _pending, []
+    return pending
@@ -0,0 +1,107 @@
+from __future__ import absolute_import
+import collections
+import contextlib
+import threading
+from robot.api import logger as loggerRobot
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+
+
+# Variables of Robot read by the calling thread for the threads of the library, which can't use BuiltIn
+VARIABLES = ("${SUITE NAME}", "${TEST NAME}", "${OUTPUT DIR}")
+
+_local = threading.local()
+_queued = collections.deque()
+_queued_lock = threading.Lock()
+
+
+class RobotLogger(object):
+    """
+    Logger of the library to the Robot log, from any thread.
+
+    Robot ignores the messages logged outside the main thread. Inside `collect`, the messages of the thread are kept
+    on the given list, to be written by the thread that started it with `write`, e.g. once the calls of `fanout.run_concurrently`
+    are done or a session closed in the background is resolved. The messages of the other threads are queued, and written
+    by the next `flush` of the main thread.
+    """
+
+    def info(self, msg, html=False):
+        self._write("info", msg, html)
+
+    def debug(self, msg, html=False):
+        self._write("debug", msg, html)
+
+    def warn(self, msg, html=False):
+        self._write("warn", msg, html)
+
+    @staticmethod
+    def _write(level, msg, html):
+        messages = getattr(_local, "messages", None)
+        if messages is not None:
+            messages.append((level, msg, html))
+        elif threading.current_thread().name == "MainThread":
+            getattr(loggerRobot, level)(msg, html=html)
+        else:
+            with _queued_lock:
+                _queued.append((level, msg, html))
+
+
+logger = RobotLogger()
+
+
+@contextlib.contextmanager
+def collect(messages, variables=None):
+    """
+    Keeps the messages logged by the current thread inside the block on the ``messages`` list.
+    ``variables``, taken by `get_variables` on the calling thread, are returned by `get_variable_value` inside the block.
+    """
+    previous_messages = getattr(_local, "messages", None)
+    previous_variables = getattr(_local, "variables", None)
+    _local.messages = messages
+    if variables is not None:
+        _local.variables = variables
+    try:
+        yield messages
+    finally:
+        _local.messages = previous_messages
+        _local.variables = previous_variables
+
+
+def write(messages):
+    """
+    Writes the messages kept by `collect` to the Robot log. Only on the main thread.
+    """
+    for level, msg, html in messages:
+        getattr(loggerRobot, level)(msg, html=html)
+
+
+def flush():
+    """
+    Writes the messages queued by the other threads to the Robot log. Does nothing outside the main thread.
+    """
+    if threading.current_thread().name != "MainThread":
+        return
+    with _queued_lock:
+        messages = list(_queued)
+        _queued.clear()
+    write(messages)
+
+
+def get_variables():
+    """
+    Returns the VARIABLES of Robot, to be given to the threads of the library through `collect`.
+    """
+    try:
+        return dict((name, BuiltIn().get_variable_value(name)) for name in VARIABLES)
+    except RobotNotRunningError:
+        return {}
+
+
+def get_variable_value(name, default=None):
+    """
+    Returns the value of a variable of Robot. Inside `collect`, only VARIABLES are available, as they were on the calling thread.
+    """
+    variables = getattr(_local, "variables", None)
+    if variables is None:
+        return BuiltIn().get_variable_value(name, default)
+    value = variables.get(name)
+    return default if value is None else value
@@ -0,0 +1,449 @@
+from __future__ import absolute_import
+import contextlib
+import io
+import tempfile
+import time
+from applitools.core import logger
+from applitools.eyes import Eyes, BatchInfo
+from applitools.core import agent_connector
+from applitools.core.errors import TestFailedError
+from applitools.core.agent_connector import AgentConnector
+from applitools.core.match_window_task import MatchWindowTask
+from applitools.selenium.capture import EyesWebDriverScreenshot
+from applitools.selenium.eyes import ScreenshotType
+from applitools.utils import image_utils
+from applitools.utils.compat import urljoin
+from . import connections, domcache, encoding, hashgate, logs, metrics, stability, stitching, traffic, uploads
+
+
+class _ScreenshotWithoutBytes(object):
+    """
+    Stands for the screenshot while Eyes builds the match data, so that only the data before the image is created.
+    """
+
+    @staticmethod
+    def get_bytes():
+        return b""
+
+
+class LibraryAgentConnector(AgentConnector):
+    """
+    Agent connector that measures the uploads of the screenshots and the matches of the Eyes server,
+    and uploads each DOM snapshot once.
+    When ``traffic`` is set, the requests are recorded or replayed by that `traffic.TrafficRecorder` or `traffic.TrafficReplayer`.
+    """
+
+    def __init__(self, server_url, eyes):
+        super(LibraryAgentConnector, self).__init__(server_url)
+        self._eyes = eyes
+        self.traffic = None
+
+    def start_session(self, session_start_info):
+        with traffic.use(self.traffic):
+            return super(LibraryAgentConnector, self).start_session(session_start_info)
+
+    def stop_session(self, running_session, is_aborted, save):
+        with traffic.use(self.traffic):
+            return super(LibraryAgentConnector, self).stop_session(running_session, is_aborted, save)
+
+    def post_dom_snapshot(self, dom_json):
+        # The same DOM is uploaded once, see `domcache.DomCache`
+        dom_url = domcache.cache.get_upload(dom_json)
+        if dom_url is not None:
+            return dom_url
+        with traffic.use(self.traffic):
+            dom_url = super(LibraryAgentConnector, self).post_dom_snapshot(dom_json)
+        if dom_url is not None:
+            domcache.cache.add_upload(dom_json, dom_url)
+        return dom_url
+
+    def post_screenshot(self, data):
+        """
+        Uploads an encoded screenshot, and returns its URL on the Eyes server, or None if the upload failed.
+        """
+        headers = AgentConnector._DEFAULT_HEADERS.copy()
+        headers["Content-Type"] = "application/octet-stream"
+        size = len(data)
+        start = time.time()
+        with traffic.use(self.traffic):
+            # Sent like the requests of the agent connector, see `connections.install`
+            response = agent_connector.requests.post(
+                urljoin(self._endpoint_uri, "running/data"),
+                data=data,
+                params=dict(apiKey=self.api_key),
+                headers=headers,
+                timeout=AgentConnector._TIMEOUT,
+            )
+        self._eyes.encoder.record_upload(size, (data.sent_at or time.time()) - start)
+        if not response.ok:
+            logger.warning("Failed to upload the screenshot: %s" % response.status_code)
+            return None
+        return response.headers["Location"]
+
+    def match_window(self, running_session, data):
+        # Streamed, to tell the upload from the server match by the time the whole body was sent
+        if not isinstance(data, stitching.StreamedBody):
+            data = stitching.StreamedBody(data, io.BytesIO())
+        size = len(data)
+        start = time.time()
+        try:
+            with traffic.use(self.traffic):
+                as_expected = super(LibraryAgentConnector, self).match_window(running_session, data)
+            if self._eyes.adaptive_timeout is not None:
+                self._eyes.adaptive_timeout.add_attempt(start, as_expected)
+            return as_expected
+        finally:
+            end = time.time()
+            sent_at = data.sent_at or end
+            self._eyes.encoder.record_upload(size, sent_at - start)
+            metrics.recorder.add_match(sent_at - start, end - sent_at)
+
+
+class _UnchangedCapture(object):
+    """
+    Stands for the match data of a retry whose screenshot is identical to the previous one, which isn't sent.
+    """
+
+
+_UNCHANGED_CAPTURE = _UnchangedCapture()
+
+
+class LibraryMatchWindowTask(MatchWindowTask):
+    """
+    Match window task that encodes the screenshots with the encoder of the library.
+
+    When the stitcher is set, the screenshots are encoded into a temporary file and uploaded as a stream,
+    instead of joining the whole image to the match data in memory.
+
+    While a mismatch is retried until the match timeout, the screenshots identical to the previous one aren't encoded nor sent,
+    as their match can't differ, and the retries stop once the screen has been unchanged for longer than the time left.
+    """
+
+    def __init__(self, eyes, agent_connector, running_session, default_retry_timeout):
+        super(LibraryMatchWindowTask, self).__init__(eyes, agent_connector, running_session, default_retry_timeout)
+        # Digest of the last screenshot taken for a retry, None when the retries aren't running
+        self._retry_digest = None
+
+    def _run_with_intervals(self, prepare_action, retry_timeout):
+        # Same as the Eyes SDK, except the unchanged screenshots are skipped
+        logger.debug("Matching with intervals...")
+        self._retry_digest = ""
+        try:
+            data = prepare_action(ignore_mismatch=True)
+            start = last_change = time.time()
+            as_expected = self._agent_connector.match_window(self._running_session, data)
+            if as_expected:
+                return {"as_expected": True, "screenshot": self._last_screenshot}
+            retry = time.time() - start
+
+            skipped = 0
+            while retry < retry_timeout:
+                time.sleep(self._MATCH_INTERVAL)
+                data = prepare_action(ignore_mismatch=True)
+                now = time.time()
+                retry = now - start
+                if data is _UNCHANGED_CAPTURE:
+                    skipped += 1
+                    if now - last_change > retry_timeout - retry:
+                        logger.debug("Screen unchanged for %.1f seconds, stopping the retries" % (now - last_change))
+                        break
+                    continue
+                last_change = now
+                as_expected = self._agent_connector.match_window(self._running_session, data)
+                if as_expected:
+                    return {"as_expected": True, "screenshot": self._last_screenshot}
+                retry = time.time() - start
+            if skipped:
+                logger.debug("%d unchanged screenshots not sent while retrying" % skipped)
+        finally:
+            self._retry_digest = None
+
+        # One last try, which records the mismatch
+        data = prepare_action()
+        as_expected = self._agent_connector.match_window(self._running_session, data)
+        return {"as_expected": as_expected, "screenshot": self._last_screenshot}
+
+    def _create_match_data_bytes(
+        self,
+        app_output,
+        user_inputs,
+        tag,
+        ignore_mismatch,
+        screenshot,
+        default_match_settings,
+        target,
+        ignore=None,
+        floating=None,
+    ):
+        if self._retry_digest is not None:
+            digest = hashgate.exact_hash(screenshot._screenshot)
+            if ignore_mismatch and digest == self._retry_digest:
+                return _UNCHANGED_CAPTURE
+            self._retry_digest = digest
+
+        encoder = self._eyes.encoder
+        if encoder.scale != 1.0:
+            ignore = [encoding.scale_region(region, encoder.scale) for region in ignore or []]
+            floating = [encoding.scale_region(region, encoder.scale) for region in floating or []]
+
+        stitcher = self._eyes.stitcher
+        if stitcher is None:
+            encoded_file = io.BytesIO()
+        else:
+            encoded_file = tempfile.SpooledTemporaryFile(max_size=stitcher.memory_limit, prefix="eyes_screenshot_")
+        encoder.encode(screenshot._screenshot, encoded_file)
+
+        upload_index = self._eyes.upload_index
+        if upload_index is not None:
+            screenshot_url = self._get_screenshot_url(upload_index, encoded_file)
+            if screenshot_url is not None:
+                encoded_file.close()
+                encoded_file = io.BytesIO()
+                app_output["screenshotUrl"] = screenshot_url
+
+        prefix = super(LibraryMatchWindowTask, self)._create_match_data_bytes(
+            app_output,
+            user_inputs,
+            tag,
+            ignore_mismatch,
+            _ScreenshotWithoutBytes(),
+            default_match_settings,
+            target,
+            ignore,
+            floating,
+        )
+
+        if stitcher is None:
+            return prefix + encoded_file.getvalue()
+        return stitching.StreamedBody(prefix, encoded_file)
+
+    def _get_screenshot_url(self, upload_index, encoded_file):
+        # The screenshot is uploaded apart the first time, so that the next identical ones of the batch refer to it
+        digest = uploads.get_digest(encoded_file)
+        size = encoded_file.tell()
+        screenshot_url = upload_index.get(digest, size)
+        if screenshot_url is None:
+            screenshot_url = self._agent_connector.post_screenshot(
+                stitching.StreamedBody(b"", encoded_file, close_file=False)
+            )
+            if screenshot_url is not None:
+                upload_index.add(digest, screenshot_url)
+        return screenshot_url
+
+
+class LibraryEyes(Eyes):
+    """
+    Eyes with the extensions of the library:
+    - Screenshots encoded by a `encoding.ScreenshotEncoder`, which reports the encoding and upload of each checkpoint
+    - Full page screenshots stitched by a `stitching.StripStitcher`, when it is set
+    - Checkpoints sharing a single viewport screenshot, inside `single_capture`
+    - Closing a session keeps the logger of the library open for the other sessions
+    - The phases of each checkpoint measured by `metrics.recorder`
+    - The traffic with the Eyes server recorded or replayed, when ``traffic`` is set
+    - Reset between tests when it's reused by an `instances.EyesPool`
+    - The match timeout of each checkpoint picked by a `timeouts.AdaptiveTimeout`, when it is set
+    - Identical screenshots of a batch uploaded once, when ``deduplicate_screenshots`` is enabled, through the `uploads.UploadIndex`
+      of the batch of the session, set to ``upload_index`` once the session is started
+    - Screenshots taken once the page is stable, when ``wait_before_screenshots`` is `stability.STABLE`
+    - Viewport screenshots taken from a MJPEG stream of the screen, when ``screen_stream`` is set to its `streaming.ScreenStream`
+    - The first viewport screenshot of a checkpoint taken from ``local_capture``, when the library already captured it for its local checks
+    """
+
+    # Attributes set by the SDK when a session starts, if they aren't configured
+    _SESSION_CONFIGURATION = ("batch", "branch_name", "parent_branch_name", "baseline_branch_name")
+
+    def __init__(self, server_url=Eyes.DEFAULT_EYES_SERVER):
+        # The SDK is only loaded once a session is opened, its logger and connections are replaced then
+        logs.install()
+        connections.install()
+        domcache.install()
+        super(LibraryEyes, self).__init__(server_url)
+        self._agent_connector = LibraryAgentConnector(server_url, self)
+        self.encoder = encoding.ScreenshotEncoder()
+        self.stitcher = None
+        self._is_single_capture = False
+        self._single_viewport_screenshot = None
+        self.adaptive_timeout = None
+        self.deduplicate_screenshots = False
+        self.upload_index = None
+        self.screen_stream = None
+        self.local_capture = None
+        self.stability_timeout = stability.DEFAULT_TIMEOUT
+        # Set by `instances.EyesPool` on the instances it builds
+        self.pool = None
+        self.pool_configuration = None
+        self.pool_idle = False
+        self._configured_session = {}
+
+    def keep_configuration(self):
+        """
+        Keeps the configuration of the instance that starting a session changes (the SDK sets a new batch and the branches
+        of the environment when they aren't set), so that `reset` restores it.
+        """
+        self._configured_session = dict((name, getattr(self, name)) for name in self._SESSION_CONFIGURATION)
+
+    @property
+    def traffic(self):
+        return self._agent_connector.traffic
+
+    @traffic.setter
+    def traffic(self, archive):
+        self._agent_connector.traffic = archive
+
+    @contextlib.contextmanager
+    def single_capture(self):
+        """
+        The checkpoints of the block crop their regions from the first viewport screenshot taken, instead of taking their own.
+        """
+        self._is_single_capture = True
+        try:
+            yield
+        finally:
+            self._is_single_capture = False
+            self._single_viewport_screenshot = None
+
+    def reset(self):
+        """
+        Clears the state left by the last session, so that the instance may be opened again with the same configuration.
+        """
+        self._driver = None
+        self._running_session = None
+        self._match_window_task = None
+        self._start_info = None
+        self._viewport_size = None
+        self._device_pixel_ratio = self._UNKNOWN_DEVICE_PIXEL_RATIO
+        self._element_position_provider = None
+        self._screenshot_type = None
+        self._region_to_check = None
+        self._last_screenshot = None
+        self._should_match_once_on_timeout = False
+        self._user_inputs = []
+        self._properties = []
+        self._is_single_capture = False
+        self._single_viewport_screenshot = None
+        self.adaptive_timeout = None
+        self.deduplicate_screenshots = False
+        self.upload_index = None
+        self.screen_stream = None
+        self.local_capture = None
+        self.is_disabled = False
+        for name, value in self._configured_session.items():
+            setattr(self, name, value)
+
+    def close(self, raise_ex=True):
+        running_session = self._running_session
+        try:
+            return super(LibraryEyes, self).close(raise_ex)
+        except TestFailedError:
+            raise
+        except Exception:
+            # The SDK forgets the server session even when it couldn't end it, it's kept so that it can still be aborted
+            self._running_session = running_session
+            raise
+        finally:
+            # Eyes closes the logger of the whole process, which would silence the other sessions
+            logger.open_()
+            self._release_upload_index()
+            self._close_traffic()
+
+    def abort_if_not_closed(self):
+        try:
+            super(LibraryEyes, self).abort_if_not_closed()
+        finally:
+            logger.open_()
+            self._release_upload_index()
+            self._close_traffic()
+
+    def _release_upload_index(self):
+        if self.upload_index is not None:
+            uploads.release_index(self.upload_index)
+            self.upload_index = None
+
+    def _close_traffic(self):
+        # The recorded archive is completed when a session ends, see `traffic.TrafficRecorder`
+        if self.traffic is not None and self.traffic.mode == traffic.RECORD:
+            self.traffic.close()
+
+    def _ensure_running_session(self):
+        if self._running_session:
+            return
+        self._start_session()
+        self._match_window_task = LibraryMatchWindowTask(
+            self, self._agent_connector, self._running_session, self.match_timeout
+        )
+        # The batch is only known once the session is started, the SDK creates one for the sessions without batch
+        if self.deduplicate_screenshots:
+            self.upload_index = uploads.acquire_index(self.batch.id)
+
+    def _check_window_base(self, tag=None, match_timeout=-1, target=None):
+        adaptive_timeout = self.adaptive_timeout if not self.is_disabled else None
+        if adaptive_timeout is not None:
+            match_timeout = adaptive_timeout.start(tag, match_timeout, self.match_timeout)
+        self.encoder.start_check()
+        try:
+            return super(LibraryEyes, self)._check_window_base(tag, match_timeout, target)
+        finally:
+            self.local_capture = None
+            if adaptive_timeout is not None:
+                adaptive_timeout.finish()
+            self.encoder.report(tag)
+
+    @property
+    def _seconds_to_wait_screenshot(self):
+        # Waited for by `_get_screenshot` instead of a fixed time
+        if self.wait_before_screenshots == stability.STABLE:
+            return 0
+        return self.wait_before_screenshots / 1000.0
+
+    def _get_screenshot(self):
+        # The local capture was taken once the page was stable
+        if self.wait_before_screenshots == stability.STABLE and self.local_capture is None:
+            with metrics.recorder.phase(metrics.CAPTURE):
+                stability.wait_for_stability(self._driver, self.stability_timeout)
+        if self._screenshot_type in (ScreenshotType.FULLPAGE_SCREENSHOT, ScreenshotType.ENTIRE_ELEMENT_SCREENSHOT):
+            phase = metrics.STITCHING
+        else:
+            phase = metrics.CAPTURE
+        with metrics.recorder.phase(phase):
+            return super(LibraryEyes, self)._get_screenshot()
+
+    def _try_capture_dom(self):
+        with metrics.recorder.phase(metrics.DOM):
+            return super(LibraryEyes, self)._try_capture_dom()
+
+    def _try_post_dom_snapshot(self, dom_json):
+        with metrics.recorder.phase(metrics.DOM):
+            return super(LibraryEyes, self)._try_post_dom_snapshot(dom_json)
+
+    def _viewport_screenshot(self, scale_provider):
+        if not self._is_single_capture:
+            return self._take_viewport_screenshot(scale_provider)
+
+        if self._single_viewport_screenshot is None:
+            self._single_viewport_screenshot = self._take_viewport_screenshot(scale_provider)
+        return self._single_viewport_screenshot
+
+    def _take_viewport_screenshot(self, scale_provider):
+        # The local capture is only used once, the next attempts of the checkpoint take their own
+        image, self.local_capture = self.local_capture, None
+        if image is None:
+            if self.screen_stream is None:
+                return super(LibraryEyes, self)._viewport_screenshot(scale_provider)
+            self._driver._wait_before_screenshot(self._seconds_to_wait_screenshot)
+            image = self.screen_stream.get_screenshot(self._driver)
+
+        # Same as the Eyes SDK, except the screenshot is taken from the stream or by the library
+        scale_provider.update_scale_ratio(image.width)
+        pixel_ratio = 1 / scale_provider.scale_ratio
+        if pixel_ratio != 1.0:
+            image = image_utils.scale_image(image, 1.0 / pixel_ratio)
+        return EyesWebDriverScreenshot.create_from_image(image, self._driver).get_viewport_screenshot()
+
+    def _full_page_screenshot(self, scale_provider):
+        if self.stitcher is None:
+            return super(LibraryEyes, self)._full_page_screenshot(scale_provider)
+
+        screenshot = self.stitcher.get_full_page_screenshot(
+            self._driver, self._seconds_to_wait_screenshot, scale_provider
+        )
+        return EyesWebDriverScreenshot.create_from_image(screenshot, self._driver)
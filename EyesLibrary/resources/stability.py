@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+import time
+import six
+from .robotlog import logger as loggerRobot
+
+
+STABLE = "STABLE"
+
+# Milliseconds to wait for the page to be stable, by default
+DEFAULT_TIMEOUT = 5000
+# Milliseconds without DOM mutations after which the page is considered stable
+QUIET_PERIOD = 200
+# Seconds between two polls of the page
+POLL_INTERVAL = 0.05
+
+# Returns the signals of the activity of the page. The first call installs the observers of the requests and DOM mutations,
+# kept on the page until it's navigated away, so the requests sent before are only known through the document state.
+STABILITY_SCRIPT = """
+var state = window.__eyesLibraryStability;
+if (!state) {
+    state = window.__eyesLibraryStability = {"requests": 0, "lastMutation": 0};
+    if (window.MutationObserver) {
+        // The scrollbars are hidden and the page scrolled by Eyes through the style of the root elements
+        new MutationObserver(function (mutations) {
+            if (mutations.some(function (mutation) {
+                return mutation.type !== "attributes" || (mutation.target !== document.documentElement && mutation.target !== document.body);
+            })) {
+                state.lastMutation = Date.now();
+            }
+        }).observe(document, {attributes: true, childList: true, characterData: true, subtree: true});
+    }
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            state.requests++;
+            var done = function () { state.requests--; };
+            var request = fetch.apply(this, arguments);
+            request.then(done, done);
+            return request;
+        };
+    }
+    if (window.XMLHttpRequest) {
+        var send = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            state.requests++;
+            this.addEventListener("loadend", function () { state.requests--; });
+            return send.apply(this, arguments);
+        };
+    }
+}
+
+var animations = 0;
+if (document.getAnimations) {
+    document.getAnimations().forEach(function (animation) {
+        // Endless animations never settle, they are left to the ignore regions
+        if (animation.playState === "running" && animation.effect && animation.effect.getComputedTiming().iterations !== Infinity) {
+            animations++;
+        }
+    });
+}
+
+var images = 0;
+for (var i = 0; i < document.images.length; i++) {
+    // Lazy images out of the viewport aren't loaded until scrolled to
+    if (document.images[i].src && !document.images[i].complete && document.images[i].loading !== "lazy") {
+        images++;
+    }
+}
+
+return {
+    "document": document.readyState === "complete",
+    "requests": Math.max(state.requests, 0),
+    "mutations": Date.now() - state.lastMutation < arguments[0],
+    "animations": animations,
+    "fonts": document.fonts ? document.fonts.status === "loading" : false,
+    "images": images
+};
+"""
+
+
+def get_wait_before_screenshots(wait_before_screenshots):
+    """
+    Returns the milliseconds to wait before the screenshots, or STABLE to wait until the page is stable.
+    """
+    from applitools.core import EyesIllegalArgument
+
+    if isinstance(wait_before_screenshots, six.string_types) and wait_before_screenshots.upper() == STABLE:
+        return STABLE
+    try:
+        return int(wait_before_screenshots)
+    except ValueError:
+        raise EyesIllegalArgument("Please select a valid wait before screenshots: a number of milliseconds or Stable")
+
+
+def get_busy_signals(state):
+    """
+    Returns the descriptions of the signals of the page still active, none when the page is stable.
+    """
+    signals = []
+    if not state["document"]:
+        signals.append("document loading")
+    if state["requests"]:
+        signals.append("%d pending requests" % state["requests"])
+    if state["mutations"]:
+        signals.append("DOM mutations")
+    if state["animations"]:
+        signals.append("%d running animations" % state["animations"])
+    if state["fonts"]:
+        signals.append("fonts loading")
+    if state["images"]:
+        signals.append("%d images loading" % state["images"])
+    return signals
+
+
+def wait_for_stability(driver, timeout=DEFAULT_TIMEOUT):
+    """
+    Polls the page until it's stable, or until ``timeout`` milliseconds have passed, and returns the seconds waited.
+
+    The page is stable once its document is loaded, no fetch or XHR request is pending, the DOM hasn't changed for a while,
+    and no animation, font or image is loading. Pages without javascript (e.g. native mobile apps) aren't waited for.
+    """
+    from selenium.common.exceptions import WebDriverException
+
+    start = time.time()
+    deadline = start + int(timeout) / 1000.0
+    while True:
+        try:
+            state = driver.execute_script(STABILITY_SCRIPT, QUIET_PERIOD)
+        except WebDriverException:
+            return time.time() - start
+        signals = get_busy_signals(state) if state else []
+        if not signals:
+            return time.time() - start
+        if time.time() >= deadline:
+            loggerRobot.debug(
+                "The page wasn't stable after %sms: %s. Taking the screenshot anyway" % (timeout, ", ".join(signals))
+            )
+            return time.time() - start
+        time.sleep(POLL_INTERVAL)
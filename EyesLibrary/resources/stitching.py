@@ -0,0 +1,178 @@
+from __future__ import absolute_import
+import base64
+import mmap
+import tempfile
+import time
+from PIL import Image
+from applitools.core import logger
+from applitools.core.geometry import Point, Region
+from applitools.utils import image_utils
+
+# Bytes per pixel of the stitched page (RGBA, as stitched by Eyes)
+_PIXEL_SIZE = 4
+# Size of the blocks read from the encoded screenshot while uploading it
+_READ_BLOCK_SIZE = 64 * 1024
+
+
+class PageBuffer(object):
+    """
+    Pixels of a stitched page, filled strip by strip.
+
+    Pages larger than the memory limit are kept on a memory-mapped temporary file,
+    so the operating system may page them out instead of growing the process memory.
+    """
+
+    def __init__(self, width, height, memory_limit):
+        self.width = width
+        self.height = height
+        size = width * height * _PIXEL_SIZE
+        self.is_mapped = size > memory_limit
+        if self.is_mapped:
+            # The file is removed as soon as it's closed, the mapping remains valid until the buffer is released
+            with tempfile.TemporaryFile(prefix="eyes_stitch_") as buffer_file:
+                buffer_file.truncate(size)
+                self.data = mmap.mmap(buffer_file.fileno(), size)
+        else:
+            self.data = bytearray(size)
+
+    def paste(self, image, left, top):
+        """
+        Copies the image to the given position of the page, cropping whatever is outside of the page.
+        """
+        width = min(image.width, self.width - left)
+        height = min(image.height, self.height - top)
+        if width <= 0 or height <= 0:
+            return
+        if (width, height) != image.size:
+            image = image.crop((0, 0, width, height))
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+
+        pixels = image.tobytes()
+        row_size = width * _PIXEL_SIZE
+        offset = (top * self.width + left) * _PIXEL_SIZE
+        if left == 0 and width == self.width:
+            self.data[offset:offset + len(pixels)] = pixels
+            return
+
+        page_row_size = self.width * _PIXEL_SIZE
+        for row in range(height):
+            self.data[offset:offset + row_size] = pixels[row * row_size:(row + 1) * row_size]
+            offset += page_row_size
+
+    def to_image(self):
+        """
+        Returns the page as a read-only image sharing the buffer, without copying it.
+        """
+        return Image.frombuffer(
+            "RGBA", (self.width, self.height), self.data, "raw", "RGBA", 0, 1
+        )
+
+
+class StreamedBody(object):
+    """
+    Body of a request made of a bytes prefix followed by the content of a file, read block by block when sent.
+    ``sent_at`` is the time when the whole body was read. The file is closed then, unless ``close_file`` is disabled.
+    """
+
+    def __init__(self, prefix, content_file, close_file=True):
+        self._prefix = prefix
+        self._file = content_file
+        self._close_file = close_file
+        self._file.seek(0, 2)
+        self._length = len(prefix) + self._file.tell()
+        self._file.seek(0)
+        self._prefix_sent = False
+        self.sent_at = None
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        block = self.read(_READ_BLOCK_SIZE)
+        while block:
+            yield block
+            block = self.read(_READ_BLOCK_SIZE)
+
+    def read(self, size=-1):
+        if not self._prefix_sent:
+            self._prefix_sent = True
+            if size is None or size < 0:
+                return self._prefix + self._file.read()
+            return self._prefix + self._file.read(max(size - len(self._prefix), 0))
+        if self.sent_at is not None:
+            return b""
+        data = self._file.read(size)
+        if not data:
+            if self._close_file:
+                self._file.close()
+            self.sent_at = time.time()
+        return data
+
+
+class StripStitcher(object):
+    """
+    Stitches full page screenshots strip by strip into a `PageBuffer`, holding a single strip image at a time.
+    Mirrors the stitching of Eyes, which keeps the whole page and every strip as images.
+    """
+
+    def __init__(self, memory_limit):
+        self.memory_limit = memory_limit
+
+    def get_full_page_screenshot(self, driver, wait_before_screenshots, scale_provider):
+        logger.info("getting strip-stitched full page screenshot..")
+
+        original_frame = driver.frame_chain
+        driver.switch_to.default_content()
+        driver.reset_origin()
+
+        entire_page_size = driver.get_entire_page_size()
+
+        driver._wait_before_screenshot(wait_before_screenshots)
+        screenshot = self._get_strip(driver, scale_provider, update_scale=True)
+
+        if screenshot.width >= entire_page_size["width"] and screenshot.height >= entire_page_size["height"]:
+            driver.restore_origin()
+            driver.switch_to.frames(original_frame)
+            return screenshot
+
+        # Smaller parts than the viewport avoid duplicating scroll bars and fixed footers
+        screenshot_part_size = {
+            "width": screenshot.width,
+            "height": max(screenshot.height - driver._MAX_SCROLL_BAR_SIZE, driver._MIN_SCREENSHOT_PART_HEIGHT),
+        }
+        entire_page = Region(0, 0, entire_page_size["width"], entire_page_size["height"])
+
+        page = PageBuffer(entire_page.width, entire_page.height, self.memory_limit)
+        logger.debug(
+            "Stitching %dx%d page %s"
+            % (entire_page.width, entire_page.height, "on a memory-mapped file" if page.is_mapped else "in memory")
+        )
+        page.paste(screenshot, 0, 0)
+        screenshot = None
+
+        driver.save_position()
+        try:
+            for part in entire_page.get_sub_regions(screenshot_part_size):
+                if part.left == 0 and part.top == 0:
+                    continue
+                driver._position_provider.set_position(Point(part.left, part.top))
+                driver._wait_before_screenshot(wait_before_screenshots)
+                # The page may not scroll all the way to the part
+                position = driver._position_provider.get_current_position()
+                page.paste(self._get_strip(driver, scale_provider), int(position.x), int(position.y))
+        finally:
+            driver.restore_position()
+            driver.restore_origin()
+            driver.switch_to.frames(original_frame)
+
+        return page.to_image()
+
+    @staticmethod
+    def _get_strip(driver, scale_provider, update_scale=False):
+        strip = image_utils.image_from_bytes(base64.b64decode(driver.get_screenshot_as_base64()))
+        if update_scale:
+            scale_provider.update_scale_ratio(strip.width)
+        if scale_provider.scale_ratio != 1.0:
+            strip = image_utils.scale_image(strip, scale_provider.scale_ratio)
+        return strip
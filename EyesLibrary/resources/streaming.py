@@ -0,0 +1,205 @@
+from __future__ import absolute_import
+import io
+import threading
+import time
+import six
+from PIL import Image
+from six.moves.urllib.parse import urlsplit
+from applitools.core import EyesIllegalArgument
+from applitools.utils import image_utils
+from .robotlog import logger as loggerRobot
+
+
+AUTO = "AUTO"
+
+# Ports of the MJPEG servers of Appium, when the capabilities don't set them
+IOS_STREAM_PORT = 9100
+ANDROID_STREAM_PORT = 8093
+# Seconds to wait for the connection to the stream, and for a frame once connected
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+# Seconds to wait for a frame received after the screenshot was requested, before taking it through the WebDriver endpoint
+FRAME_TIMEOUT = 1.0
+
+_JPEG_START = b"\xff\xd8"
+_JPEG_END = b"\xff\xd9"
+_CHUNK_SIZE = 16 * 1024
+# Bytes of a frame beyond which the stream isn't considered to be MJPEG
+_MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_stream_url(driver, screen_stream):
+    """
+    Returns the URL of the MJPEG stream of the screen of the driver, or None if it doesn't expose any.
+
+    ``screen_stream`` is either the URL of the stream or AUTO, which looks for the MJPEG server of Appium:
+    the ``mjpegScreenshotUrl`` capability, the MJPEG server of WebDriverAgent on iOS,
+    or the screen streaming of UiAutomator2 on Android, started on the Appium host.
+    """
+    if isinstance(screen_stream, six.string_types) and screen_stream.lower().startswith(("http://", "https://")):
+        return screen_stream
+    if not isinstance(screen_stream, six.string_types) or screen_stream.upper() != AUTO:
+        raise EyesIllegalArgument("Please select a valid screen stream: Auto or the URL of a MJPEG stream")
+
+    from selenium.common.exceptions import WebDriverException
+
+    capabilities = getattr(driver, "capabilities", None) or {}
+    if capabilities.get("mjpegScreenshotUrl"):
+        return capabilities["mjpegScreenshotUrl"]
+
+    executor_url = getattr(getattr(driver, "command_executor", None), "_url", None)
+    if not executor_url:
+        return None
+    host = urlsplit(executor_url).hostname
+    platform = str(capabilities.get("platformName", "")).lower()
+
+    if platform == "ios":
+        return "http://%s:%s" % (host, capabilities.get("mjpegServerPort", IOS_STREAM_PORT))
+    if platform == "android":
+        try:
+            driver.execute_script("mobile: startScreenStreaming", {"port": ANDROID_STREAM_PORT})
+        except WebDriverException as e:
+            loggerRobot.debug("The screen streaming of the device couldn't be started: %s" % e)
+            return None
+        return "http://%s:%s" % (host, ANDROID_STREAM_PORT)
+    return None
+
+
+def get_stream(url):
+    """
+    Returns the stream of the given URL, shared by every session of the process. A stream that stopped is connected again.
+    """
+    with _streams_lock:
+        stream = _streams.get(url)
+        if stream is None or not stream.is_alive:
+            stream = _streams[url] = ScreenStream(url)
+        return stream
+
+
+def fit_frame(image, size):
+    """
+    Returns the frame cropped to the aspect ratio of ``size`` (width, height), around its center, and resized to it.
+    """
+    width, height = size
+    if image.size == (width, height):
+        return image
+
+    crop_width = min(image.width, int(round(image.height * width / float(height))))
+    crop_height = min(image.height, int(round(image.width * height / float(width))))
+    left = (image.width - crop_width) // 2
+    top = (image.height - crop_height) // 2
+    if (crop_width, crop_height) != image.size:
+        image = image.crop((left, top, left + crop_width, top + crop_height))
+    return image.resize((width, height), Image.BICUBIC)
+
+
+class ScreenStream(object):
+    """
+    Reader of a MJPEG stream of the screen, keeping its last frame, so that the screenshots of Appium sessions are taken
+    from the stream instead of the WebDriver screenshot endpoint (a PNG encoded in base64 over HTTP, which is slow on devices).
+
+    The frames are decoded and fitted locally to the size of the screenshots of the endpoint, measured by the first screenshot.
+    When the stream is unavailable, or no frame is received in time, the screenshot is taken through the endpoint.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.frames = 0
+        self.fallbacks = 0
+        self.error = None
+        self.screenshot_size = None
+        self._frame = None
+        self._received = 0
+        self._reported = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._read, name="EyesScreenStream")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def get_screenshot(self, driver):
+        """
+        Returns the screenshot of the screen of the driver as a PIL Image, from the first frame received after the call.
+        """
+        # The first screenshot is taken through WebDriver, to measure the size of its screenshots
+        if self.screenshot_size is not None:
+            frame = self._get_frame(time.time(), FRAME_TIMEOUT)
+            if frame is None:
+                if not self._reported:
+                    self._reported = True
+                    loggerRobot.info(
+                        "No frame received from the screen stream %s (%s), the screenshot is taken through WebDriver"
+                        % (self.url, self.error or "timeout")
+                    )
+            else:
+                try:
+                    image = Image.open(io.BytesIO(frame)).convert("RGB")
+                except (IOError, SyntaxError) as e:
+                    loggerRobot.debug("Invalid frame of the screen stream %s: %s" % (self.url, e))
+                else:
+                    # Unless the screen was rotated since the size was measured, then it's measured again
+                    if (image.width > image.height) == (self.screenshot_size[0] > self.screenshot_size[1]):
+                        self.frames += 1
+                        return fit_frame(image, self.screenshot_size)
+
+        self.fallbacks += 1
+        image = image_utils.image_from_base64(driver.get_screenshot_as_base64())
+        self.screenshot_size = image.size
+        return image
+
+    def _get_frame(self, since, timeout):
+        deadline = since + timeout
+        with self._condition:
+            while self._received <= since:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.is_alive:
+                    return None
+                self._condition.wait(remaining)
+            return self._frame
+
+    def _add_frame(self, frame):
+        with self._condition:
+            self._frame = frame
+            self._received = time.time()
+            self._condition.notify_all()
+
+    def _read(self):
+        import requests
+
+        response = None
+        try:
+            response = requests.get(self.url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            response.raise_for_status()
+            buffer = bytearray()
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                buffer.extend(chunk)
+                # The frames are taken between the JPEG markers, whatever the multipart headers of the server
+                while True:
+                    start = buffer.find(_JPEG_START)
+                    if start == -1:
+                        del buffer[:-1]
+                        break
+                    end = buffer.find(_JPEG_END, start + 2)
+                    if end == -1:
+                        del buffer[:start]
+                        break
+                    self._add_frame(bytes(buffer[start : end + 2]))
+                    del buffer[: end + 2]
+                if len(buffer) > _MAX_FRAME_SIZE:
+                    raise IOError("No JPEG frame in the first %d bytes" % _MAX_FRAME_SIZE)
+        except Exception as e:
+            self.error = e
+        finally:
+            if response is not None:
+                response.close()
+            with self._condition:
+                self._condition.notify_all()
+
+    def __str__(self):
+        return "%d screenshots taken from %s, %d through WebDriver" % (self.frames, self.url, self.fallbacks)
@@ -0,0 +1,112 @@
+from __future__ import absolute_import
+import os
+import threading
+from .utils import JsonStore
+from .robotlog import logger as loggerRobot
+
+
+# Runs of each step kept in the history
+HISTORY_SIZE = 10
+# Runs of a step recorded before its match timeout is adapted
+LEARNING_RUNS = 3
+# Margin over the longest time a step took to match
+HEADROOM = 1.5
+# Interval of the Eyes SDK between the retries of a match, in milliseconds
+MATCH_INTERVAL = 500
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path):
+    """
+    Returns the timeout history of the given file, shared by every session of the process.
+    """
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TimeoutHistory(path)
+        return _stores[path]
+
+
+class TimeoutHistory(JsonStore):
+    """
+    Milliseconds each step took to match on its last runs, or None for the runs it didn't match,
+    persisted in a JSON file shared by parallel executions.
+    """
+
+    def _merge(self, stored_values, values):
+        for key, runs in values.items():
+            stored_values[key] = (stored_values.get(key, []) + runs)[-HISTORY_SIZE:]
+
+
+class AdaptiveTimeout(object):
+    """
+    Picks the match timeout of each step of a session from the history of its last runs:
+    - Steps that always matched on the first attempt, or never matched, are matched once
+    - Flaky steps are retried up to the longest time they took to match, with some headroom
+    - Steps with an explicit match timeout, or without enough history, keep their timeout
+
+    The time each step takes to match is recorded, and saved to the history once the session is closed.
+    """
+
+    def __init__(self, history, appname, testname):
+        self.history = history
+        self.appname = appname
+        self.testname = testname
+        self._pending = {}
+        self._step_counts = {}
+        self._key = None
+        self._first_attempt = None
+        self._matched_after = None
+
+    def start(self, name, match_timeout, default_timeout):
+        """
+        Starts measuring a step and returns its match timeout, in milliseconds, or -1 for the default one.
+        """
+        occurrence = self._step_counts.get(name, 0) + 1
+        self._step_counts[name] = occurrence
+        self._key = "%s|%s|%s|%d" % (self.appname, self.testname, name, occurrence)
+        self._first_attempt = None
+        self._matched_after = None
+
+        match_timeout = int(match_timeout)
+        if match_timeout >= 0:
+            return match_timeout
+
+        runs = self.history.get(self._key) or []
+        if len(runs) < LEARNING_RUNS:
+            return match_timeout
+
+        match_times = [run for run in runs if run is not None]
+        if not match_times or max(match_times) == 0:
+            adapted_timeout = 0
+        else:
+            adapted_timeout = int(max(match_times) * HEADROOM) + MATCH_INTERVAL
+        loggerRobot.debug(
+            "Adaptive timeout: '%s' matched on %d of its last %d runs, up to %sms after the first attempt. "
+            "Match timeout: %dms instead of %dms"
+            % (name, len(match_times), len(runs), max(match_times) if match_times else "-", adapted_timeout, default_timeout)
+        )
+        return adapted_timeout
+
+    def add_attempt(self, started, as_expected):
+        """
+        Records a match attempt of the current step, started at the given time.
+        """
+        if self._first_attempt is None:
+            self._first_attempt = started
+        if as_expected and self._matched_after is None:
+            self._matched_after = int(round((started - self._first_attempt) * 1000))
+
+    def finish(self):
+        """
+        Keeps the time the current step took to match, to be saved on close.
+        """
+        if self._key is not None and self._first_attempt is not None:
+            self._pending.setdefault(self._key, []).append(self._matched_after)
+        self._key = None
+
+    def on_close(self, test_results):
+        self.history.update(self._pending)
+        self._pending = {}
@@ -0,0 +1,248 @@
+from __future__ import absolute_import
+import atexit
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+import six
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from six.moves.urllib.parse import urlsplit
+from robot.api import logger as loggerRobot
+from applitools.core import EyesError, EyesIllegalArgument
+from . import connections
+
+
+RECORD = "RECORD"
+REPLAY = "REPLAY"
+
+# Headers of the responses kept in the archive, the others are left out
+_RESPONSE_HEADERS = ("Content-Type", "Location")
+
+_READ_BLOCK_SIZE = 64 * 1024
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def get_traffic_mode(traffic):
+
+    selected_mode = None
+
+    if traffic.upper() == RECORD:
+        selected_mode = RECORD
+    elif traffic.upper() == REPLAY:
+        selected_mode = REPLAY
+    else:
+        raise EyesIllegalArgument("Please select a valid traffic mode: Record, Replay")
+
+    return selected_mode
+
+
+def get_archive(path, mode):
+    """
+    Returns the recorder or the replayer of the given archive, shared by every session of the process.
+    """
+    path = os.path.abspath(path)
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is None or archive.mode != mode:
+            if archive is not None and archive.mode == RECORD:
+                archive.close()
+            archive = _archives[path] = TrafficRecorder(path) if mode == RECORD else TrafficReplayer(path)
+        connections.install()
+        return archive
+
+
+def close_archives():
+    """
+    Completes the archives being recorded, on the end of the execution.
+    """
+    with _archives_lock:
+        archives = list(_archives.values())
+    for archive in archives:
+        if archive.mode == RECORD:
+            archive.close()
+
+
+atexit.register(close_archives)
+
+
+def use(archive):
+    """
+    Sends the requests of the Eyes SDK made by the current thread inside the block through the archive, if any.
+    """
+    if archive is None:
+        return _no_archive()
+    return connections.use_transport(archive)
+
+
+@contextlib.contextmanager
+def _no_archive():
+    yield
+
+
+def _get_key(method, url):
+    # The server may differ between recording and replaying, the exchanges are identified by method and path
+    return "%s %s" % (method, urlsplit(url).path)
+
+
+class _RecordedBody(object):
+    """
+    Request body passed on to requests while being copied to a temporary file and hashed.
+    """
+
+    def __init__(self, data):
+        if isinstance(data, six.text_type):
+            data = data.encode("utf-8")
+        self._data = data
+        self._position = 0
+        self._length = len(data)
+        self.copy = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024, prefix="eyes_traffic_")
+        self.digest = hashlib.sha1()
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        block = self.read(_READ_BLOCK_SIZE)
+        while block:
+            yield block
+            block = self.read(_READ_BLOCK_SIZE)
+
+    def read(self, size=-1):
+        if isinstance(self._data, bytes):
+            end = self._length if size is None or size < 0 else self._position + size
+            block = self._data[self._position : end]
+            self._position += len(block)
+        else:
+            block = self._data.read(size)
+        self.copy.write(block)
+        self.digest.update(block)
+        return block
+
+
+class TrafficRecorder(object):
+    """
+    Sends the requests to the Eyes server and records every exchange into a ZIP archive:
+    an ``exchanges/<number>.json`` entry per request, with the response, and the request bodies under ``bodies/``,
+    named by their SHA-1 so that identical uploads are stored once. The API key isn't recorded.
+
+    The archive is rewritten by the first request of each execution. It's kept open while the sessions record into it,
+    and completed by `close`, when a session is closed or at the end of the execution.
+    """
+
+    mode = RECORD
+
+    def __init__(self, path):
+        self.path = path
+        self._count = 0
+        self._bodies = set()
+        self._archive = None
+        self._lock = threading.Lock()
+
+    def send(self, method, url, data, kwargs):
+        body = _RecordedBody(data) if data is not None else None
+        start = time.time()
+        response = connections.request(method, url, data=body, **kwargs)
+        elapsed = time.time() - start
+
+        params = dict((name, value) for name, value in (kwargs.get("params") or {}).items() if name != "apiKey")
+        exchange = {
+            "key": _get_key(method, url),
+            "params": params,
+            "request": {
+                "content_type": kwargs.get("headers", {}).get("Content-Type"),
+                "size": len(body) if body is not None else 0,
+                "body": body.digest.hexdigest() if body is not None else None,
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": dict(
+                    (name, response.headers[name]) for name in _RESPONSE_HEADERS if name in response.headers
+                ),
+                "body": response.content.decode("utf-8", "replace"),
+            },
+            "elapsed": round(elapsed, 6),
+        }
+        try:
+            self._write(exchange, body)
+        finally:
+            if body is not None:
+                body.copy.close()
+        return response
+
+    def close(self):
+        """
+        Completes the archive, so that it can be replayed. The next exchange opens it again, to append to it.
+        """
+        with self._lock:
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
+
+    def _write(self, exchange, body):
+        with self._lock:
+            if self._archive is None:
+                # A new archive on each execution, appended to afterwards
+                self._archive = zipfile.ZipFile(self.path, "a" if self._count else "w", zipfile.ZIP_DEFLATED)
+            self._count += 1
+            self._archive.writestr("exchanges/%06d.json" % self._count, json.dumps(exchange))
+            digest = exchange["request"]["body"]
+            if digest is not None and digest not in self._bodies:
+                self._bodies.add(digest)
+                body.copy.seek(0)
+                self._archive.writestr("bodies/" + digest, body.copy.read())
+
+
+class TrafficReplayer(object):
+    """
+    Answers the requests of the Eyes SDK with the responses recorded in the archive, without any network.
+    The responses of each method and path are replayed in their recorded order, skipping the ones asking to poll again,
+    so the sessions run at full speed. The request bodies are read as if they were sent.
+    """
+
+    mode = REPLAY
+
+    def __init__(self, path):
+        self.path = path
+        self._responses = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+
+        if not os.path.exists(path):
+            raise EyesIllegalArgument("Eyes traffic archive not found: %s" % path)
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist()):
+                if name.startswith("exchanges/"):
+                    exchange = json.loads(archive.read(name).decode("utf-8"))
+                    if exchange["response"]["status"] != 202:
+                        self._responses[exchange["key"]].append(exchange["response"])
+        loggerRobot.debug(
+            "Replaying %d Eyes server responses from %s"
+            % (sum(len(responses) for responses in self._responses.values()), path)
+        )
+
+    def send(self, method, url, data, kwargs):
+        if hasattr(data, "read"):
+            while data.read(_READ_BLOCK_SIZE):
+                pass
+
+        key = _get_key(method, url)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise EyesError("No recorded response left for %s in %s" % (key, self.path))
+            recorded = responses.popleft()
+
+        response = Response()
+        response.status_code = recorded["status"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response._content = recorded["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        return response
@@ -0,0 +1,100 @@
+from __future__ import absolute_import
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+_READ_BLOCK_SIZE = 64 * 1024
+
+# Indexes of the batches whose sessions are closed, kept for the next tests of the batch, the least recently used are dropped
+MAX_IDLE_INDEXES = 4
+
+_indexes = {}
+_idle_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def acquire_index(batch_id):
+    """
+    Returns the index of the screenshots uploaded in the given batch, shared by every open session of the batch, until `release_index`.
+    """
+    with _indexes_lock:
+        index = _indexes.get(batch_id)
+        if index is None:
+            index = _indexes[batch_id] = _idle_indexes.pop(batch_id, None) or UploadIndex(batch_id)
+        index.sessions += 1
+        return index
+
+
+def release_index(index):
+    """
+    Releases the index once a session of its batch is closed. Once every session of the batch is closed, the index is dropped,
+    unless it's one of the last batches used, which the next tests may join.
+    """
+    with _indexes_lock:
+        index.sessions -= 1
+        if index.sessions > 0 or _indexes.get(index.batch_id) is not index:
+            return
+        del _indexes[index.batch_id]
+        _idle_indexes[index.batch_id] = index
+        while len(_idle_indexes) > MAX_IDLE_INDEXES:
+            _idle_indexes.popitem(last=False)
+
+
+def get_digest(encoded_file):
+    """
+    Returns the SHA-1 of the content of the file, read from its start. The file is left at its end.
+    """
+    digest = hashlib.sha1()
+    encoded_file.seek(0)
+    block = encoded_file.read(_READ_BLOCK_SIZE)
+    while block:
+        digest.update(block)
+        block = encoded_file.read(_READ_BLOCK_SIZE)
+    return digest.hexdigest()
+
+
+class UploadIndex(object):
+    """
+    URLs of the screenshots uploaded to the Eyes server in a batch, by digest of the encoded screenshot,
+    so that identical screenshots of any test of the batch refer to the uploaded one instead of being sent again.
+    """
+
+    def __init__(self, batch_id):
+        self.batch_id = batch_id
+        # Open sessions of the batch using the index
+        self.sessions = 0
+        self.uploads = 0
+        self.reused = 0
+        self.bytes_saved = 0
+        self._urls = {}
+        self._lock = threading.Lock()
+
+    def get(self, digest, size):
+        """
+        Returns the URL of the screenshot, if it was uploaded before, counting the bytes it saves.
+        """
+        with self._lock:
+            url = self._urls.get(digest)
+            if url is not None:
+                self.reused += 1
+                self.bytes_saved += size
+            return url
+
+    def add(self, digest, url):
+        with self._lock:
+            self._urls[digest] = url
+            self.uploads += 1
+
+    @property
+    def hit_rate(self):
+        total = self.uploads + self.reused
+        return float(self.reused) / total if total else 0.0
+
+    def __str__(self):
+        return "%d of %d screenshots reused (%.0f%%), %.1fKB not uploaded" % (
+            self.reused,
+            self.uploads + self.reused,
+            self.hit_rate * 100,
+            self.bytes_saved / 1024.0,
+        )
@@ -1,17 +1,23 @@
 from __future__ import absolute_import
-import six.moves.http_client
+import json
 import os
-import logging
-from applitools.core import logger, StdoutLogger
-from applitools.eyes import MatchLevel
-from applitools.core import EyesIllegalArgument
-from applitools.selenium.positioning import StitchMode
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import InvalidElementStateException
-from . import variables
+import threading
+from . import logs, robotlog, stability
+from .lazy import LazyModule
+
+# Imported on first use, see `LazyModule`
+encoding = LazyModule("EyesLibrary.resources.encoding")
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
 
 
 def get_match_level(matchlevel):
+    from applitools.eyes import MatchLevel
+    from applitools.core import EyesIllegalArgument
 
     selected_match_level = None
 
@@ -32,6 +38,8 @@ def get_match_level(matchlevel):
 
 
 def get_stitch_mode(stitchmode):
+    from applitools.selenium.positioning import StitchMode
+    from applitools.core import EyesIllegalArgument
 
     selected_stitch_mode = None
 
@@ -48,6 +56,8 @@ def get_stitch_mode(stitchmode):
 
 
 def get_selector_strategy(selector):
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import InvalidElementStateException
 
     selected_strategy = None
 
@@ -76,40 +86,48 @@ def get_selector_strategy(selector):
 
 
 def manage_logging(enable_eyes_log=None, enable_http_debug_log=None):
-    
+    """
+    Enables or disables the logs of the current thread, and writes the Eyes log messages kept so far. See `logs.EyesLogSink`.
+    Also writes the messages of the library queued by the other threads. See `robotlog.RobotLogger`.
+    """
     if enable_eyes_log is True:
-        logger.set_logger(StdoutLogger())
-        logger.open_()
+        logs.sink.enabled = True
     elif enable_eyes_log is False:
-        logger.close()
-        logger.set_logger(None)
+        logs.sink.enabled = False
 
     if enable_http_debug_log is True:
-        six.moves.http_client.HTTPConnection.debuglevel = 1
+        logs.set_http_debug(True)
     elif enable_http_debug_log is False:
-        six.moves.http_client.HTTPConnection.debuglevel = 0
+        logs.set_http_debug(False)
+
+    logs.sink.flush()
+    robotlog.flush()
 
 
-def save_current_properties():
+def save_current_properties(session):
     return {
-        "force_full_page_screenshot": variables.eyes.force_full_page_screenshot,
-        "enable_eyes_log": logger._logger_to_use is not None,
-        "enable_http_debug_log": six.moves.http_client.HTTPConnection.debuglevel > 0,
-        "hidescrollbars": variables.eyes.hide_scrollbars,
-        "wait_before_screenshots": variables.eyes.wait_before_screenshots,
-        "send_dom": variables.eyes.send_dom,
-        "matchlevel": variables.eyes.match_level,
-        "stitchcontent": variables.stitchcontent,
-        "isdisabled": variables.eyes.is_disabled
+        "force_full_page_screenshot": session.eyes.force_full_page_screenshot,
+        "enable_eyes_log": logs.sink.enabled,
+        "enable_http_debug_log": logs.is_http_debug_enabled(),
+        "hidescrollbars": session.eyes.hide_scrollbars,
+        "wait_before_screenshots": session.eyes.wait_before_screenshots,
+        "send_dom": session.eyes.send_dom,
+        "matchlevel": session.eyes.match_level,
+        "stitchcontent": session.stitchcontent,
+        "isdisabled": session.eyes.is_disabled,
+        "compression": session.eyes.encoder.compression,
+        "screenshot_scale": session.eyes.encoder.scale,
+        "screenshot_format": session.eyes.encoder.image_format,
     }
 
 def save_current_logging_properties():
     return {
-        "enable_eyes_log": logger._logger_to_use is not None,
-        "enable_http_debug_log": six.moves.http_client.HTTPConnection.debuglevel > 0,
+        "enable_eyes_log": logs.sink.enabled,
+        "enable_http_debug_log": logs.is_http_debug_enabled(),
     }
 
 def update_properties(
+    session,
     force_full_page_screenshot=None,
     enable_eyes_log=None,
     enable_http_debug_log=None,
@@ -118,32 +136,110 @@ def update_properties(
     send_dom=None,
     matchlevel=None,
     stitchcontent=None,
-    isdisabled=None
+    isdisabled=None,
+    compression=None,
+    screenshot_scale=None,
+    screenshot_format=None,
 ):
 
     if force_full_page_screenshot is not None:
-        variables.eyes.force_full_page_screenshot = force_full_page_screenshot
+        session.eyes.force_full_page_screenshot = force_full_page_screenshot
 
     if enable_eyes_log is not None or enable_http_debug_log is not None:
         manage_logging(enable_eyes_log, enable_http_debug_log)
 
     if hidescrollbars is not None:
-        variables.eyes.hide_scrollbars = hidescrollbars
+        session.eyes.hide_scrollbars = hidescrollbars
 
     if wait_before_screenshots is not None:
-        variables.eyes.wait_before_screenshots = int(wait_before_screenshots)
+        session.eyes.wait_before_screenshots = stability.get_wait_before_screenshots(wait_before_screenshots)
 
     if send_dom is not None:
-        variables.eyes.send_dom = send_dom
+        session.eyes.send_dom = send_dom
 
     if matchlevel is not None:
         try:
-            variables.eyes.match_level = get_match_level(matchlevel)
+            session.eyes.match_level = get_match_level(matchlevel)
         except:
-            variables.eyes.match_level = matchlevel
+            session.eyes.match_level = matchlevel
 
     if stitchcontent is not None:
-        variables.stitchcontent = stitchcontent
+        session.stitchcontent = stitchcontent
 
     if isdisabled is not None:
-        variables.eyes.is_disabled = isdisabled
+        session.eyes.is_disabled = isdisabled
+
+    if compression is not None:
+        session.eyes.encoder.compression = encoding.get_compression(compression)
+
+    if screenshot_scale is not None:
+        session.eyes.encoder.scale = encoding.get_scale(screenshot_scale)
+
+    if screenshot_format is not None:
+        session.eyes.encoder.image_format = encoding.get_image_format(screenshot_format)
+
+
+def lock_file(opened_file):
+    """
+    Acquires an exclusive lock on the file, shared between processes. Blocks until the lock is available.
+    """
+    if fcntl is not None:
+        fcntl.flock(opened_file.fileno(), fcntl.LOCK_EX)
+    else:
+        opened_file.seek(0)
+        msvcrt.locking(opened_file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(opened_file):
+    if fcntl is not None:
+        fcntl.flock(opened_file.fileno(), fcntl.LOCK_UN)
+    else:
+        opened_file.seek(0)
+        msvcrt.locking(opened_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JsonStore(object):
+    """
+    Values of the last runs, persisted in a JSON file.
+    Updates are merged under a file lock, so that parallel executions may share the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._values = None
+
+    def get(self, key):
+        with self._lock:
+            if self._values is None:
+                self._values = self._read()
+            return self._values.get(key)
+
+    def update(self, values):
+        if not values:
+            return
+        with self._lock:
+            with open(self.path, "a+") as store_file:
+                lock_file(store_file)
+                try:
+                    store_file.seek(0)
+                    content = store_file.read()
+                    stored_values = json.loads(content) if content.strip() else {}
+                    self._merge(stored_values, values)
+                    store_file.seek(0)
+                    store_file.truncate()
+                    store_file.write(json.dumps(stored_values))
+                    store_file.flush()
+                finally:
+                    unlock_file(store_file)
+            self._values = stored_values
+
+    def _merge(self, stored_values, values):
+        stored_values.update(values)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as store_file:
+            content = store_file.read()
+        return json.loads(content) if content.strip() else {}
@@ -1,10 +1,93 @@
+from __future__ import absolute_import
+import threading
+from .batches import BatchRegistry
+
+
+DEFAULT_ALIAS = "default"
+
+
+class EyesSession(object):
+    """
+    State of a single Eyes session: the Eyes instance, the driver returned by Eyes and the session options.
+    """
+
+    def __init__(self, alias, eyes=None, driver=None):
+        self.alias = alias
+        self.eyes = eyes
+        self.driver = driver
+        self.stitchcontent = False
+        self.hash_gate = None
+        self.comparator = None
+
+
+class SessionRegistry(object):
+    """
+    Eyes sessions of the library, identified by alias.
+
+    The current session is tracked per thread, so that keywords running concurrently don't switch each other's session.
+    Threads that never opened or switched to a session use the last one activated in the process.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._last_alias = None
+
+    def register(self, session):
+        with self._lock:
+            self._sessions[session.alias] = session
+            self._activate(session.alias)
+        return session
+
+    def unregister(self, session):
+        """
+        Removes the session, closed or aborted, and clears it as the current session.
+        """
+        with self._lock:
+            if self._sessions.get(session.alias) is session:
+                del self._sessions[session.alias]
+            if getattr(self._local, "alias", None) == session.alias:
+                self._local.alias = None
+            if self._last_alias == session.alias:
+                self._last_alias = None
+
+    def switch(self, alias):
+        with self._lock:
+            if alias not in self._sessions:
+                raise ValueError("No Eyes session with alias '%s' was opened" % alias)
+            self._activate(alias)
+        return self._sessions[alias]
+
+    def get(self, alias=None):
+        with self._lock:
+            if alias is None:
+                alias = self.current_alias
+            try:
+                return self._sessions[alias]
+            except KeyError:
+                if alias is None:
+                    raise ValueError("No Eyes session is open. Please use Open Eyes Session")
+                raise ValueError("No Eyes session with alias '%s' was opened" % alias)
+
+    def has(self, alias=None):
+        with self._lock:
+            if alias is None:
+                alias = self.current_alias
+            return alias in self._sessions
+
+    @property
+    def current_alias(self):
+        return getattr(self._local, "alias", self._last_alias)
+
+    def _activate(self, alias):
+        self._local.alias = alias
+        self._last_alias = alias
+
+
 def init():
-    global eyes
-    global driver
+    global sessions
     global batches
-    global stitchcontent
 
-    eyes = None
-    driver = None
-    batches = []
-    stitchcontent = False
+    sessions = SessionRegistry()
+    batches = BatchRegistry()
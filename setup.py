@@ -40,10 +40,14 @@ setup(
     ],
     install_requires=[
         "robotframework > 3.0, < 4",
-        "eyes-selenium",
+        # The library extends internals of the SDK, which may change on any minor release
+        "eyes-selenium >= 3.16.2, < 3.17",
         "six > 1.0.0, < 2",
+        "requests >= 2.0, < 3",
+        "Pillow",
         "robotframework-seleniumlibrary",
         "robotframework-appiumlibrary",
     ],
+    extras_require={"local": ["numpy"]},
     packages=find_packages(exclude=["tests", "docs"]),
 )
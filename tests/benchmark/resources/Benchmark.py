@@ -0,0 +1,192 @@
+from __future__ import absolute_import
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import timeit
+from collections import OrderedDict
+import six
+from robot.api import logger
+from robot.libraries.BuiltIn import BuiltIn
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Benchmark(object):
+    """
+    Robot library measuring the time, throughput and memory of keywords, and comparing them with a previous report.
+
+    Each keyword runs ``warmup`` times unmeasured, ``iterations`` times measuring the time,
+    then ``memory_iterations`` times tracing the memory allocations, which would slow down the timed runs.
+    """
+
+    ROBOT_LIBRARY_SCOPE = "GLOBAL"
+
+    def __init__(self, iterations=50, warmup=5, memory_iterations=5):
+        self.iterations = int(iterations)
+        self.warmup = int(warmup)
+        self.memory_iterations = int(memory_iterations)
+        self.results = OrderedDict()
+
+    def benchmark_keyword(self, label, keyword, *args):
+        """
+        Runs the keyword with the given arguments and records its measures under the label.
+
+        | =Arguments= | =Description=                                          |
+        | Label       | *Mandatory* - Name of the measures in the report       |
+        | Keyword     | *Mandatory* - Keyword to measure                       |
+        | *args       | Arguments of the keyword                               |
+        """
+        builtin = BuiltIn()
+        for _ in range(self.warmup):
+            builtin.run_keyword(keyword, *args)
+
+        durations = []
+        for _ in range(self.iterations):
+            start = timeit.default_timer()
+            builtin.run_keyword(keyword, *args)
+            durations.append(timeit.default_timer() - start)
+
+        peak_kb, retained_kb = self._measure_memory(builtin, keyword, args)
+        return self._record(label, keyword, durations, peak_kb, retained_kb)
+
+    def benchmark_library_import(self, label, library="EyesLibrary", runs=10):
+        """
+        Measures importing and instantiating the library in a new Python process, as done by every pabot worker.
+        The time of starting the interpreter is measured apart and left out.
+
+        | =Arguments= | =Description=                                          |
+        | Label       | *Mandatory* - Name of the measures in the report       |
+        | Library     | Name of the library to import                          |
+        | Runs        | Number of processes to start                           |
+        """
+        script = (
+            "import timeit; start = timeit.default_timer(); import {0}; {0}.{0}(); "
+            "print(timeit.default_timer() - start)".format(library)
+        )
+        durations = [float(self._run_python(script)) for _ in range(int(runs))]
+        return self._record(label, "import " + library, durations, None, None)
+
+    def library_import_should_not_load(self, library, *modules):
+        """
+        Fails if importing and instantiating the library in a new Python process imports any of the given modules.
+
+        | =Arguments= | =Description=                                          |
+        | Library     | *Mandatory* - Name of the library to import            |
+        | *modules    | Names of the top level modules that must not be loaded |
+        """
+        script = (
+            "import sys; import {0}; {0}.{0}(); "
+            "print(' '.join(sorted(set(name.split('.')[0] for name in sys.modules))))".format(library)
+        )
+        loaded = set(self._run_python(script).split())
+        unexpected = [module for module in modules if module in loaded]
+        if unexpected:
+            raise AssertionError("Importing %s loaded %s" % (library, ", ".join(unexpected)))
+
+    @staticmethod
+    def _run_python(script):
+        output = subprocess.check_output([sys.executable, "-c", script])
+        return output.decode("utf-8").strip().splitlines()[-1]
+
+    def _record(self, label, keyword, durations, peak_kb, retained_kb):
+        durations.sort()
+        total = sum(durations)
+        result = OrderedDict(
+            [
+                ("keyword", keyword),
+                ("iterations", len(durations)),
+                ("mean_ms", round(total / len(durations) * 1000, 3)),
+                ("median_ms", round(durations[len(durations) // 2] * 1000, 3)),
+                ("p95_ms", round(durations[min(int(len(durations) * 0.95), len(durations) - 1)] * 1000, 3)),
+                ("calls_per_second", round(len(durations) / total, 2) if total else None),
+                ("peak_memory_kb", peak_kb),
+                ("retained_memory_kb", retained_kb),
+            ]
+        )
+        self.results[label] = result
+        logger.info(
+            "%s: mean %sms, p95 %sms, %s calls/s, peak memory %sKB, retained %sKB"
+            % (
+                label,
+                result["mean_ms"],
+                result["p95_ms"],
+                result["calls_per_second"],
+                result["peak_memory_kb"],
+                result["retained_memory_kb"],
+            )
+        )
+        return result
+
+    def _measure_memory(self, builtin, keyword, args):
+        if not self.memory_iterations:
+            return None, None
+
+        gc.collect()
+        if tracemalloc is not None:
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                for _ in range(self.memory_iterations):
+                    builtin.run_keyword(keyword, *args)
+                gc.collect()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return (
+                round((peak - before) / 1024.0, 1),
+                round((current - before) / 1024.0 / self.memory_iterations, 1),
+            )
+
+        # Without tracemalloc (Python 2), only the growth of the maximum resident size of the process is known
+        if resource is None:
+            return None, None
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for _ in range(self.memory_iterations):
+            builtin.run_keyword(keyword, *args)
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before), None
+
+    def write_benchmark_report(self, path):
+        """
+        Writes the measures of the benchmarked keywords to a JSON file.
+        """
+        with io.open(path, "w", encoding="utf-8") as report:
+            report.write(six.text_type(json.dumps(self.results, indent=2)))
+        logger.info("Benchmark report written to %s" % path)
+
+    def benchmarks_should_not_regress(self, baseline_path, tolerance=0.25):
+        """
+        Fails if the mean time of any keyword is more than ``tolerance`` (a ratio) over its mean in the baseline report.
+        Keywords missing from the baseline are ignored.
+        """
+        if not baseline_path or not os.path.exists(baseline_path):
+            logger.warn("No benchmark baseline found at %s, nothing to compare with" % baseline_path)
+            return
+
+        with io.open(baseline_path, encoding="utf-8") as report:
+            baseline = json.load(report)
+
+        regressions = []
+        for label, result in self.results.items():
+            previous = baseline.get(label)
+            if not previous or not previous.get("mean_ms"):
+                continue
+            ratio = result["mean_ms"] / previous["mean_ms"]
+            if ratio > 1 + float(tolerance):
+                regressions.append(
+                    "%s: %sms against %sms (+%d%%)"
+                    % (label, result["mean_ms"], previous["mean_ms"], round((ratio - 1) * 100))
+                )
+
+        if regressions:
+            raise AssertionError("Keywords slower than the baseline:\n" + "\n".join(regressions))
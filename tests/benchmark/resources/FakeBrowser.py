@@ -0,0 +1,380 @@
+from __future__ import absolute_import
+import base64
+import io
+import re
+from PIL import Image, ImageDraw
+from selenium.common.exceptions import NoSuchElementException, NoSuchFrameException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/75.0.3770.100 Safari/537.36"
+)
+
+# Elements of the fake page, by id: (left, top, width, height) relative to the page
+PAGE_ELEMENTS = {
+    "logo": (100, 50, 400, 200),
+    "search": (100, 300, 600, 60),
+    "content": (0, 400, 1000, 1600),
+    "frame": (200, 500, 600, 400),
+    "footer": (0, 2200, 1000, 200),
+}
+
+# Root elements of the fake page, their size is the size of the page
+DOCUMENT_ELEMENTS = ("html", "body")
+
+# Elements of the document inside the "frame" element, relative to the frame
+FRAME_ELEMENTS = {"body": (0, 0, 600, 400), "title": (20, 20, 300, 50)}
+
+# Width of the scrollbar drawn on the screenshots, unless the overflow of the document is hidden
+SCROLLBAR_WIDTH = 15
+
+COLORS = ("#e8553e", "#3e8ee8", "#4bb543", "#f2c14e", "#8e44ad")
+
+
+class FakeWebDriver(WebDriver):
+    """
+    WebDriver of a synthetic page, answering the commands and scripts used by EyesLibrary and the Eyes SDK
+    without a browser. The screenshots are crops of a generated page image, at the current scroll position.
+    """
+
+    def __init__(self, width=1000, height=800, page_height=2400, pixel_ratio=1):
+        self.viewport = {"width": int(width), "height": int(height)}
+        self.page_height = int(page_height)
+        self.pixel_ratio = float(pixel_ratio)
+        self.scroll = [0, 0]
+        self.overflow = ""
+        self.frame = None
+        self._page = None
+        self._screenshots = {}
+        self.screenshots_taken = 0
+        super(FakeWebDriver, self).__init__(
+            command_executor="http://127.0.0.1:4444/wd/hub", desired_capabilities={"browserName": "chrome"}
+        )
+
+    def start_session(self, capabilities, browser_profile=None):
+        self.session_id = "fake-session"
+        self.capabilities = {
+            "browserName": "chrome",
+            "browserVersion": "75.0",
+            "platformName": "linux",
+            "takesScreenshot": True,
+        }
+        self.w3c = True
+
+    def quit(self):
+        self._page = None
+        self._screenshots.clear()
+
+    def execute(self, driver_command, params=None):
+        handler = self._COMMANDS.get(driver_command)
+        value = handler(self, params or {}) if handler is not None else None
+        return {"success": 0, "value": value, "sessionId": self.session_id}
+
+    # Page
+
+    @property
+    def page_width(self):
+        return self.viewport["width"]
+
+    def _get_elements(self):
+        return FRAME_ELEMENTS if self.frame else PAGE_ELEMENTS
+
+    def _get_page_size(self):
+        if self.frame:
+            return list(PAGE_ELEMENTS[self.frame][2:])
+        return [self.page_width, max(self.page_height, self.viewport["height"])]
+
+    def _scroll_to(self, x, y):
+        if self.frame:
+            return
+        width, height = self._get_page_size()
+        self.scroll = [
+            int(max(0, min(x, width - self.viewport["width"]))),
+            int(max(0, min(y, height - self.viewport["height"]))),
+        ]
+
+    def _get_page_image(self):
+        if self._page is None:
+            ratio = self.pixel_ratio
+            width, height = self._get_page_size()
+            self._page = Image.new("RGB", (int(width * ratio), int(height * ratio)), "white")
+            draw = ImageDraw.Draw(self._page)
+            # Stripes, so that the parts of a stitched screenshot differ from each other
+            for top in range(0, height, 100):
+                draw.line([(0, top * ratio), (width * ratio, top * ratio)], fill="#dddddd", width=int(ratio))
+            for index, name in enumerate(sorted(PAGE_ELEMENTS)):
+                left, top, element_width, element_height = PAGE_ELEMENTS[name]
+                draw.rectangle(
+                    [left * ratio, top * ratio, (left + element_width) * ratio, (top + element_height) * ratio],
+                    outline=COLORS[index % len(COLORS)],
+                    width=int(2 * ratio),
+                )
+        return self._page
+
+    def _get_screenshot(self, params):
+        # The screenshot is of the top level viewport, even inside a frame
+        self.screenshots_taken += 1
+        key = (tuple(self.scroll), self.viewport["width"], self.viewport["height"], self.overflow)
+        if key not in self._screenshots:
+            ratio = self.pixel_ratio
+            left, top = self.scroll[0] * ratio, self.scroll[1] * ratio
+            box = (
+                int(left),
+                int(top),
+                int(left + self.viewport["width"] * ratio),
+                int(top + self.viewport["height"] * ratio),
+            )
+            image = self._get_page_image().crop(box)
+            if self.overflow != "hidden":
+                scrollbar_left = image.width - int(SCROLLBAR_WIDTH * ratio)
+                ImageDraw.Draw(image).rectangle([scrollbar_left, 0, image.width, image.height], fill="#c1c1c1")
+            stream = io.BytesIO()
+            image.save(stream, "PNG", compress_level=1)
+            self._screenshots[key] = base64.b64encode(stream.getvalue()).decode("ascii")
+        return self._screenshots[key]
+
+    # Elements
+
+    def _get_element_name(self, by, value):
+        name = value
+        if by == "css selector":
+            match = re.match(r'^\[(?:id|name)="(.+)"\]$', value)
+            name = match.group(1) if match else value.lstrip("#.")
+        elif by == "xpath":
+            match = re.search(r"@id=[\"']([^\"']+)[\"']", value)
+            name = match.group(1) if match else None
+        if name not in self._get_elements() and (self.frame or name not in DOCUMENT_ELEMENTS):
+            raise NoSuchElementException("No element with %s '%s' on the fake page" % (by, value))
+        return "%s/%s" % (self.frame, name) if self.frame else name
+
+    def _get_rect(self, element):
+        element_id = getattr(element, "element", element).id
+        name = element_id.split("/")[-1]
+        if element_id in DOCUMENT_ELEMENTS:
+            width, height = self._get_page_size()
+            return {"x": 0, "y": 0, "width": width, "height": height}
+        left, top, width, height = (FRAME_ELEMENTS if "/" in element_id else PAGE_ELEMENTS)[name]
+        return {"x": left, "y": top, "width": width, "height": height}
+
+    def _find_element(self, params):
+        return self.create_web_element(self._get_element_name(params["using"], params["value"]))
+
+    def _find_elements(self, params):
+        try:
+            return [self._find_element(params)]
+        except NoSuchElementException:
+            return []
+
+    def _get_element_rect(self, params):
+        return self._get_rect(WebElement(self, params["id"], w3c=True))
+
+    def _get_element_location(self, params):
+        rect = self._get_element_rect(params)
+        return {"x": rect["x"], "y": rect["y"]}
+
+    def _get_element_size(self, params):
+        rect = self._get_element_rect(params)
+        return {"width": rect["width"], "height": rect["height"]}
+
+    # Window and frames
+
+    def _get_window_rect(self, params):
+        return {"x": 0, "y": 0, "width": self.viewport["width"], "height": self.viewport["height"]}
+
+    def _set_window_rect(self, params):
+        if params.get("width") is not None:
+            self.viewport = {"width": int(params["width"]), "height": int(params["height"])}
+            self._page = None
+            self._screenshots.clear()
+            self._scroll_to(*self.scroll)
+        return self._get_window_rect(params)
+
+    def _switch_to_frame(self, params):
+        reference = params.get("id")
+        if reference is None:
+            self.frame = None
+            return None
+        if isinstance(reference, int):
+            reference = self.create_web_element("frame")
+        name = getattr(reference, "element", reference).id
+        if name != "frame":
+            raise NoSuchFrameException("'%s' is not a frame of the fake page" % name)
+        self.frame = name
+        return None
+
+    def _switch_to_parent_frame(self, params):
+        self.frame = None
+
+    # Scripts
+
+    def _execute_script(self, params):
+        script = params["script"]
+        args = params.get("args") or []
+
+        if "__eyesLibrarySelectorCache" in script:
+            return self._get_rects(args[0], args[1])
+        if "navigator.userAgent.match" in script:
+            return False
+        if "navigator.userAgent" in script:
+            return USER_AGENT
+        if "devicePixelRatio" in script:
+            return self.pixel_ratio
+        if "document.readyState" in script:
+            return "complete"
+        if "window.scrollTo(" in script:
+            x, y = re.search(r"scrollTo\(\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*\)", script).groups()
+            self._scroll_to(float(x), float(y))
+            return None
+        if "translate(" in script:
+            # CSS stitching translates the document instead of scrolling it
+            x, y = re.search(r"translate\(\s*(-?[\d.]+)px\s*,\s*(-?[\d.]+)px\s*\)", script).groups()
+            self._scroll_to(-float(x), -float(y))
+            return None
+        if "transform" in script:
+            return {"transform": "", "-webkit-transform": ""}
+        if "return [totalWidth, totalHeight]" in script:
+            return self._get_page_size()
+        if "return [width, height]" in script:
+            return self._get_page_size() if self.frame else [self.viewport["width"], self.viewport["height"]]
+        if "return [x, y]" in script:
+            # The document of the frame isn't scrollable
+            return [0, 0] if self.frame else list(self.scroll)
+        if "window.innerWidth" in script:
+            return dict(self.viewport)
+        if "window.pageXOffset" in script:
+            return {"x": 0, "y": 0} if self.frame else {"x": self.scroll[0], "y": self.scroll[1]}
+        if "getPropertyValue(styleProp)" in script:
+            # Computed style of a single property, e.g. the borders or the overflow of an element
+            return "visible" if "'overflow'" in script else "0px"
+        if "border-left-width" in script:
+            borders = ["0px", "0px", "0px", "0px"]
+            if "clientWidth" in script and args:
+                rect = self._get_rect(args[0])
+                return [rect["width"], rect["height"]] + borders
+            return borders
+        if "getBoundingClientRect" in script and args:
+            rect = self._get_rect(args[0])
+            return {
+                "left": rect["x"] - self.scroll[0],
+                "top": rect["y"] - self.scroll[1],
+                "width": rect["width"],
+                "height": rect["height"],
+            }
+        if "getComputedStyle" in script:
+            return "visible" if "overflow" in script else "0px"
+        if "documentElement.style.overflow = " in script:
+            # Hiding the scrollbars of the document, and restoring them
+            original_overflow = self.overflow
+            overflow = re.search(r"documentElement\.style\.overflow = [\"']?([\w-]*)", script).group(1)
+            self.overflow = "" if overflow == "undefined" else overflow
+            return original_overflow
+        if "style.overflow" in script:
+            return ""
+        if "arguments[0]" in script and args:
+            rect = self._get_rect(args[0])
+            for name, value in (
+                ("scrollLeft", 0),
+                ("scrollTop", 0),
+                ("scrollWidth", rect["width"]),
+                ("clientWidth", rect["width"]),
+                ("scrollHeight", rect["height"]),
+                ("clientHeight", rect["height"]),
+            ):
+                if name in script:
+                    return value
+            return None
+        if "scrollWidth" in script:
+            return self._get_page_size()[0]
+        if "scrollHeight" in script:
+            return self._get_page_size()[1]
+        if "clientHeight" in script:
+            return self.viewport["height"]
+        if "clientWidth" in script:
+            return self.viewport["width"]
+        return None
+
+    def _get_rects(self, items, relative_to_viewport):
+        rects = []
+        for item in items:
+            if isinstance(item, list):
+                try:
+                    item = self.create_web_element(self._get_element_name(*item))
+                except NoSuchElementException:
+                    rects.append(None)
+                    continue
+            rect = self._get_rect(item)
+            scroll = self.scroll if relative_to_viewport and not self.frame else [0, 0]
+            rects.append(
+                {
+                    "left": rect["x"] - scroll[0],
+                    "top": rect["y"] - scroll[1],
+                    "width": rect["width"],
+                    "height": rect["height"],
+                }
+            )
+        return rects
+
+    _COMMANDS = {
+        Command.SCREENSHOT: _get_screenshot,
+        Command.W3C_EXECUTE_SCRIPT: _execute_script,
+        Command.EXECUTE_SCRIPT: _execute_script,
+        Command.FIND_ELEMENT: _find_element,
+        Command.FIND_ELEMENTS: _find_elements,
+        Command.FIND_CHILD_ELEMENT: _find_element,
+        Command.FIND_CHILD_ELEMENTS: _find_elements,
+        Command.GET_ELEMENT_RECT: _get_element_rect,
+        Command.GET_ELEMENT_LOCATION: _get_element_location,
+        Command.GET_ELEMENT_SIZE: _get_element_size,
+        Command.GET_ELEMENT_TAG_NAME: lambda self, params: "div",
+        Command.IS_ELEMENT_DISPLAYED: lambda self, params: True,
+        Command.GET_WINDOW_RECT: _get_window_rect,
+        Command.SET_WINDOW_RECT: _set_window_rect,
+        Command.SWITCH_TO_FRAME: _switch_to_frame,
+        Command.SWITCH_TO_PARENT_FRAME: _switch_to_parent_frame,
+        Command.GET_CURRENT_URL: lambda self, params: "http://fake.page/",
+        Command.GET_TITLE: lambda self, params: "Fake Page",
+    }
+
+
+class FakeBrowser(object):
+    """
+    Robot library opening a `FakeWebDriver`, to be given as the ``library`` of EyesLibrary.
+    """
+
+    ROBOT_LIBRARY_SCOPE = "GLOBAL"
+
+    def __init__(self):
+        self.driver = None
+
+    def open_fake_browser(self, width=1000, height=800, page_height=2400, pixel_ratio=1):
+        """
+        Opens the fake browser, with a viewport of the given size on a page of the given height.
+        """
+        self.driver = FakeWebDriver(width, height, page_height, pixel_ratio)
+        return self.driver
+
+    def close_fake_browser(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+    def scroll_fake_page(self, x=0, y=0):
+        """
+        Scrolls the fake page to the given position, e.g. back to the top after the checks that scrolled to their element.
+        """
+        self.driver._scroll_to(float(x), float(y))
+
+    def get_fake_screenshot_count(self):
+        """
+        Returns the number of screenshots taken from the fake browser since it was opened.
+        """
+        return self.driver.screenshots_taken
+
+    def get_fake_element(self, element_id):
+        """
+        Returns the element of the fake page with the given id.
+        """
+        return self.driver.find_element("id", element_id)
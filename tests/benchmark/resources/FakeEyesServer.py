@@ -0,0 +1,184 @@
+from __future__ import absolute_import
+import hashlib
+import itertools
+import json
+import struct
+import threading
+import time
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _EyesRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers the requests of the Eyes SDK as the Eyes server does, matching every screenshot.
+    """
+
+    protocol_version = "HTTP/1.1"
+    sessions_path = "/api/sessions/running"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self._read_body()
+        stand_in = self.server.stand_in
+        path = self.path.split("?")[0].rstrip("/")
+
+        if path == self.sessions_path:
+            session_id = stand_in.start_session()
+            self._send_json(
+                {
+                    "id": session_id,
+                    "sessionId": session_id,
+                    "batchId": "fake-batch",
+                    "baselineId": "fake-baseline",
+                    "url": "%s/app/sessions/%s" % (stand_in.url, session_id),
+                }
+            )
+        elif path == self.sessions_path + "/data":
+            self._send_json({}, status=201, headers={"Location": "%s/data/%d" % (stand_in.url, len(body))})
+        elif path.startswith(self.sessions_path + "/"):
+            stand_in.match(path.rsplit("/", 1)[-1], body)
+            self._send_json({"asExpected": True})
+        else:
+            self._send_json({}, status=404)
+
+    def do_DELETE(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if not path.startswith(self.sessions_path + "/"):
+            self._send_json({}, status=404)
+            return
+
+        steps = self.server.stand_in.stop_session(path.rsplit("/", 1)[-1])
+        self._send_json(
+            {
+                "steps": steps,
+                "matches": steps,
+                "mismatches": 0,
+                "missing": 0,
+                "exactMatches": 0,
+                "strictMatches": 0,
+                "contentMatches": 0,
+                "layoutMatches": steps,
+                "noneMatches": 0,
+                "status": "Passed",
+            }
+        )
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                chunk = self.rfile.read(size + 2)[:size]
+                if not size:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, content, status=200, headers=None):
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class EyesServerStandIn(object):
+    """
+    Local HTTP server standing in for the Eyes server, with an optional delay before each match.
+    """
+
+    def __init__(self, match_delay=0.0):
+        self.match_delay = match_delay
+        self.matches = 0
+        self.bytes_received = 0
+        self.last_screenshot = None
+        self._steps = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer(("127.0.0.1", 0), _EyesRequestHandler)
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FakeEyesServer")
+        self._thread.daemon = True
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def start_session(self):
+        with self._lock:
+            session_id = str(next(self._ids))
+            self._steps[session_id] = 0
+        return session_id
+
+    def match(self, session_id, body):
+        if self.match_delay:
+            time.sleep(self.match_delay)
+        # The match data is its JSON, prefixed by its size, followed by the screenshot, if it isn't referred to by URL
+        json_size = struct.unpack(">L", body[:4])[0]
+        screenshot = body[4 + json_size :]
+        with self._lock:
+            self._steps[session_id] = self._steps.get(session_id, 0) + 1
+            self.matches += 1
+            self.bytes_received += len(body)
+            if screenshot:
+                self.last_screenshot = hashlib.sha1(screenshot).hexdigest()
+
+    def stop_session(self, session_id):
+        with self._lock:
+            return self._steps.pop(session_id, 0)
+
+
+class FakeEyesServer(object):
+    """
+    Robot library starting and stopping the `EyesServerStandIn`.
+    """
+
+    ROBOT_LIBRARY_SCOPE = "GLOBAL"
+
+    def __init__(self):
+        self.server = None
+
+    def start_fake_eyes_server(self, match_delay=0):
+        """
+        Starts the fake Eyes server and returns its URL, to be given as ``serverurl``.
+
+        ``match_delay`` is the time, in seconds, the server takes to match each screenshot.
+        """
+        self.server = EyesServerStandIn(float(match_delay))
+        return self.server.start()
+
+    def stop_fake_eyes_server(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+
+    def get_fake_eyes_server_stats(self):
+        """
+        Returns a dictionary with the matches and the bytes received by the fake Eyes server.
+        """
+        return {"matches": self.server.matches, "bytes_received": self.server.bytes_received}
+
+    def get_fake_eyes_server_last_screenshot(self):
+        """
+        Returns the SHA-1 of the last screenshot matched by the fake Eyes server.
+        """
+        return self.server.last_screenshot